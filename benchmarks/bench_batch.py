@@ -0,0 +1,44 @@
+"""
+Measures how is_satisfiable_many scales with the number of worker processes, on random
+expressions whose conversion to conjunctive normal form dominates.
+
+Usage: python benchmarks/bench_batch.py [num_exprs] [max_workers]
+"""
+from __future__ import print_function
+
+import multiprocessing
+import random
+import sys
+import time
+
+from pyreasoner.batch import is_satisfiable_many
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import variables
+
+VARIABLES = variables(['v%s' % i for i in range(12)])
+
+
+def make_expression(rng):
+    literals = [var if rng.random() < 0.5 else ~var for var in VARIABLES]
+    return And(*(
+        Or(*(And(*rng.sample(literals, 3)) for _ in range(4))) for _ in range(3)))
+
+
+def main(num_exprs=2000, max_workers=multiprocessing.cpu_count()):
+    rng = random.Random(0)
+    exprs = [make_expression(rng) for _ in range(num_exprs)]
+    expected = None
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        start = time.time()
+        results = list(is_satisfiable_many(exprs, workers=workers))
+        elapsed = time.time() - start
+        baseline = baseline or elapsed
+        assert expected is None or results == expected
+        expected = results
+        print('%2d workers: %6.2f s (%.1fx)' % (workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""
+Times repeated satisfiability queries on reorderings of the same formula, with and
+without a ``QueryCache``.
+
+Usage: python benchmarks/bench_cache.py [num_holes] [num_queries]
+"""
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+from pyreasoner.cache import QueryCache
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import is_satisfiable
+from pyreasoner.expressions import variables
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def make_pigeonhole_clauses(num_holes):
+    holes = [
+        variables(['p%s_%s' % (pigeon, hole) for hole in range(num_holes)])
+        for pigeon in range(num_holes + 1)]
+    return [Or(*pigeon) for pigeon in holes] + [
+        ~pigeon1[hole] | ~pigeon2[hole]
+        for hole in range(num_holes)
+        for i, pigeon1 in enumerate(holes) for pigeon2 in holes[i + 1:]]
+
+
+def main(num_holes=7, num_queries=20):
+    clauses = make_pigeonhole_clauses(num_holes)
+    queries = []
+    for _ in range(num_queries):
+        random.shuffle(clauses)
+        queries.append(And(*clauses))
+    timed('direct', lambda: [is_satisfiable(query) for query in queries])
+    cache = QueryCache()
+    timed('cached', lambda: [cache.is_satisfiable(query) for query in queries])
+    print(dict(cache.statistics))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
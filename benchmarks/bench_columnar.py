@@ -0,0 +1,47 @@
+"""
+Compares evaluating an expression for each record with ``eval_expr`` and with
+``evaluate_batch`` over the columns of all the records, whole and in chunks.
+
+Usage: python benchmarks/bench_columnar.py [num_rows]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import numpy
+
+from pyreasoner.columnar import evaluate_batch
+from pyreasoner.expressions import Eq
+from pyreasoner.expressions import LessThan
+from pyreasoner.expressions import eval_expr
+from pyreasoner.expressions import variables
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_rows=1000000):
+    a, b, c, x = variables('a b c x')
+    expr = (a & ~b) | (c & LessThan(x, 0.5)) | Eq(x, 0.25)
+    random = numpy.random.RandomState(0)
+    columns = {name: random.randint(0, 2, num_rows).astype(bool) for name in 'abc'}
+    columns['x'] = random.random_sample(num_rows)
+    batch = timed('batch', lambda: evaluate_batch(expr, columns))
+    chunked = timed('chunked', lambda: evaluate_batch(expr, columns, chunksize=65536))
+    assert numpy.array_equal(batch, chunked)
+    num_sampled = min(num_rows, 100000)
+    rows = [
+        {name: column[i].item() for name, column in columns.items()}
+        for i in range(num_sampled)]
+    results = timed('rows', lambda: [eval_expr(expr, row) for row in rows])
+    assert results == batch[:num_sampled].tolist()
+    print('(rows evaluated for %s records)' % num_sampled)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
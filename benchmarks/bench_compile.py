@@ -0,0 +1,50 @@
+"""
+Compares ``ExpressionNode.eval`` with the function returned by ``ExpressionNode.compile``
+by repeatedly evaluating a policy-like expression against random assignments.
+
+Usage: python benchmarks/bench_compile.py
+"""
+from __future__ import print_function
+
+import random
+import timeit
+
+from pyreasoner.expressions import Eq
+from pyreasoner.expressions import variables
+
+
+def make_expression(num_rules=20):
+    names = ['x%s' % i for i in range(3 * num_rules)]
+    xs = variables(names)
+    rules = [
+        (xs[3 * i] & ~xs[3 * i + 1]) | Eq(xs[3 * i + 2], True)
+        for i in range(num_rules)
+    ]
+    expr = rules[0]
+    for rule in rules[1:]:
+        expr = expr & rule
+    return expr
+
+
+def main(number=2000):
+    expr = make_expression()
+    random.seed(0)
+    Assignment = expr.assignment_class
+    assignments = [
+        Assignment(*(random.random() < 0.9 for _ in Assignment._fields))
+        for _ in range(100)
+    ]
+    namespaces = [assignment._asdict() for assignment in assignments]
+    compiled = expr.compile()
+
+    eval_time = timeit.timeit(
+        lambda: [expr.eval(namespace) for namespace in namespaces], number=number // 100)
+    compiled_time = timeit.timeit(
+        lambda: [compiled(*assignment) for assignment in assignments], number=number // 100)
+    print('eval:     %.2f us per call' % (1e6 * eval_time / number))
+    print('compiled: %.2f us per call' % (1e6 * compiled_time / number))
+    print('speedup:  %.1fx' % (eval_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Compares enumerating the solutions of independent subproblems through blocking clauses
+with solving the subproblems separately and enumerating their products.
+
+Usage: python benchmarks/bench_decompose.py [num_parts] [num_solutions]
+"""
+from __future__ import print_function
+
+import itertools
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import solve_SAT
+from pyreasoner.expressions import variables
+
+
+def make_expression(num_parts):
+    parts = []
+    for i in range(num_parts):
+        x, y, z = variables('x%s y%s z%s' % (i, i, i))
+        parts.append(Or(x, y) & Or(~x, z) & Or(~y, ~z))
+    return And(*parts)
+
+
+def main(num_parts=20, num_solutions=20000):
+    expr = make_expression(num_parts)
+    for decompose in [False, True]:
+        start = time.time()
+        solutions = list(itertools.islice(solve_SAT(expr, decompose=decompose), num_solutions))
+        assert len(solutions) == num_solutions
+        print('decompose=%-5s %6.2f s for %s solutions' % (
+            decompose, time.time() - start, num_solutions))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""
+Stress tests the expression traversals on an expression nested far deeper than the
+recursion limit, which is left at its default.
+
+Usage: python benchmarks/bench_deep.py [depth]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Not
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import convert_to_conjunctive_normal_form
+from pyreasoner.expressions import get_depth
+from pyreasoner.expressions import get_free_variables
+from pyreasoner.expressions import get_node_count
+from pyreasoner.expressions import get_truth_table
+from pyreasoner.expressions import is_logically_equivalent
+from pyreasoner.expressions import solve_SAT
+from pyreasoner.expressions import variables
+from pyreasoner.simplify import simplify
+
+a, b, c = variables('a b c')
+
+
+def make_expression(depth):
+    """
+    Alternates And and Or nodes, as operator overloads on machine generated rules would.
+    """
+    expr = a
+    for i in range(depth):
+        expr = (expr & ~b) if i % 2 else (expr | Not(c))
+    return expr
+
+
+def make_disjunction(depth):
+    """
+    Nests Ors and negated Ands, which collapse into a single clause.
+    """
+    expr = a
+    for i in range(depth):
+        expr = Or(expr, b) if i % 2 else Not(And(Not(expr), ~c))
+    return expr
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-12s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(depth=100000):
+    print('depth %s, recursion limit %s' % (depth, sys.getrecursionlimit()))
+    expr = timed('build', lambda: make_expression(depth))
+    assert timed('depth', lambda: get_depth(expr)) == depth + 2
+    assert timed('node_count', lambda: get_node_count(expr)) == 3 * depth + 1
+    assert timed('free_vars', lambda: get_free_variables(expr)) == {a, b, c}
+    timed('str', lambda: str(expr))
+    assert timed('eval', lambda: expr.eval(a=False, b=False, c=False)) is True
+    timed('reify', lambda: expr.reify(a=True))
+    timed('simplify', lambda: simplify(expr))
+    timed('truth_table', lambda: get_truth_table(expr))
+    timed('equivalent', lambda: is_logically_equivalent(expr, expr | (a & b)))
+    timed('solve', lambda: list(solve_SAT(expr, tseitin=True)))
+    disjunction = timed('build_cnf', lambda: make_disjunction(depth))
+    cnf = timed('cnf', lambda: convert_to_conjunctive_normal_form(disjunction))
+    assert len(cnf.children) == 1
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
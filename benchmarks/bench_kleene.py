@@ -0,0 +1,40 @@
+"""
+Compares ``eval`` with the short-circuiting ``partial_eval`` on a conjunction whose
+first child is False, and on a partial assignment.
+
+Usage: python benchmarks/bench_kleene.py [num_children]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import variables
+from pyreasoner.kleene import partial_eval
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_children=2000):
+    xs = variables(['x%s' % i for i in range(num_children)])
+    ys = variables(['y%s' % i for i in range(num_children)])
+    expr = And(~xs[0], *(Or(x, y) for x, y in zip(xs, ys)))
+    namespace = {x.name: True for x in xs}
+    timed('eval', lambda: expr.eval(namespace))
+    result = timed('partial', lambda: partial_eval(expr, namespace))
+    print('nodes visited: %s' % result.nodes_visited)
+    del namespace[xs[0].name]
+    timed('eval', lambda: expr.eval(namespace))
+    result = timed('partial', lambda: partial_eval(expr, namespace))
+    print('residual: %s, nodes visited: %s' % (result.residual, result.nodes_visited))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+Compares the memory used per node by expression nodes, including their entries in the
+interning table, with an ``ExpressionArena`` of the same expression.
+
+Usage: python benchmarks/bench_memory.py [num_clauses]
+"""
+from __future__ import print_function
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from pyreasoner.arena import ExpressionArena
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import Var
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def measure(name, function):
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    result = timed(name, function)
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - start
+
+
+def make_expression(num_clauses):
+    names = ['x%s' % i for i in range(num_clauses)]
+    return And(*(
+        Or(Var(names[i]), ~Var(names[(i + 1) % num_clauses]), Var(names[(i * 7) % num_clauses]))
+        for i in range(num_clauses)))
+
+
+def main(num_clauses=100000):
+    tracemalloc.start()
+    expr, expr_bytes = measure('nodes', lambda: make_expression(num_clauses))
+    num_nodes = len(ExpressionArena.from_expression(expr))
+    arena, arena_bytes = measure('arena', lambda: ExpressionArena.from_expression(expr))
+    print('%s distinct nodes' % num_nodes)
+    print('nodes    %6.1f bytes per node' % (expr_bytes / num_nodes))
+    print('arena    %6.1f bytes per node (%.1f in arrays)' % (
+        arena_bytes / num_nodes, arena.nbytes / num_nodes))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
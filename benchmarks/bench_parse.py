@@ -0,0 +1,54 @@
+"""
+Compares loading rules with ``pyreasoner.parse.parse_many`` against evaluating them as
+python source with the variables in scope.
+
+Usage: python benchmarks/bench_parse.py [num_rules]
+"""
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+from pyreasoner.expressions import Eq
+from pyreasoner.expressions import variables
+from pyreasoner.parse import parse_many
+
+
+def make_rules(num_rules, num_variables=1000):
+    random.seed(0)
+    names = ['x%s' % i for i in range(num_variables)]
+    for _ in range(num_rules):
+        x, y, z, w = random.sample(names, 4)
+        yield "(%s & ~%s) | (%s < %s) | Eq(%s, 'on')" % (
+            x, y, z, random.randint(0, 100), w)
+
+
+def main(num_rules=1000000, num_compared=100000):
+    # Eq is called rather than written as ==, which python would evaluate to a bool.
+    source_lines = list(make_rules(num_rules))
+    lines = [
+        line.replace('Eq(', '(').replace(", 'on')", " == 'on')") for line in source_lines]
+    namespace = {var.name: var for var in variables(['x%s' % i for i in range(1000)])}
+    namespace['Eq'] = Eq
+
+    start = time.time()
+    evaluated = [eval(line, namespace) for line in source_lines[:num_compared]]
+    eval_time = time.time() - start
+    del evaluated
+    start = time.time()
+    parsed = list(parse_many(lines[:num_compared]))
+    parse_time = time.time() - start
+    del parsed
+    print('eval:       %.2f s for %s rules' % (eval_time, num_compared))
+    print('parse_many: %.2f s for %s rules (%.1fx faster)' % (
+        parse_time, num_compared, eval_time / parse_time))
+
+    start = time.time()
+    for _ in parse_many(lines):
+        pass
+    print('parse_many: %.2f s for %s rules' % (time.time() - start, num_rules))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
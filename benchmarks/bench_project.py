@@ -0,0 +1,39 @@
+"""
+Compares enumerating the distinct values of a few variables by projection with
+enumerating every model and collecting their restrictions.
+
+Usage: python benchmarks/bench_project.py [num_projected] [num_hidden]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import Solver
+from pyreasoner.expressions import variables
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_projected=6, num_hidden=10):
+    projected = variables(['p%s' % i for i in range(num_projected)])
+    hidden = variables(['h%s' % i for i in range(num_hidden)])
+    # Each hidden variable is free when any projected variable is True.
+    solver = Solver(And(Or(*projected), *(h | p for h, p in zip(hidden, projected * num_hidden))))
+    full = timed('full', lambda: {
+        tuple(getattr(solution, var.name) for var in projected) for solution in solver.solve()})
+    projection = timed('project', lambda: list(solver.solve(project=projected)))
+    assert len(projection) == len(full)
+    print('solver calls: %s projected, %s for every model' % (
+        solver.statistics['projected_solver_calls'], len(list(solver.solve())) + 1))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
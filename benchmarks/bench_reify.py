@@ -0,0 +1,40 @@
+"""
+Times conditioning a large rule base on a few facts with ``reify``, compared with
+rebuilding every node, and a batch of namespaces with ``reify_many``.
+
+Usage: python benchmarks/bench_reify.py [num_rules] [num_namespaces]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import Var
+from pyreasoner.expressions import fold_expr
+from pyreasoner.expressions import reify_many
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_rules=100000, num_namespaces=100):
+    rules = And(*(
+        Or(Var('x%s' % i), ~Var('y%s' % i), Var('x%s' % (i // 2))) for i in range(num_rules)))
+    namespace = {'x1': True, 'y2': False}
+    # The free variables are cached on the nodes, so are only computed once.
+    timed('free', lambda: rules.free_variables)
+    rebuilt = timed('rebuild', lambda: fold_expr(rules, lambda node, children: (
+        node.reify(namespace) if isinstance(node, Var) else type(node)(*children))))
+    assert timed('reify', lambda: rules.reify(namespace)) is rebuilt
+    namespaces = [{'y%s' % i: False} for i in range(num_namespaces)]
+    timed('batch', lambda: reify_many(rules, namespaces))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,60 @@
+"""
+Compares the size and speed of the binary format with pickle, for a rule base whose
+rules share subexpressions.
+
+Usage: python benchmarks/bench_serialize.py [num_rules]
+"""
+from __future__ import print_function
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Eq
+from pyreasoner.expressions import LessThan
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import variables
+from pyreasoner.serialize import dumps
+from pyreasoner.serialize import load_mmap
+from pyreasoner.serialize import loads
+
+
+def make_rule_base(num_rules):
+    names = variables(['v%s' % i for i in range(100)])
+    shared = [names[i] & ~names[i + 1] for i in range(99)]
+    return And(*(
+        Or(shared[i % 99], LessThan(names[i % 97], i % 10), Eq(names[i % 89], 'on'))
+        for i in range(num_rules)))
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-14s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_rules=100000):
+    rules = make_rule_base(num_rules)
+    pickled = timed('pickle.dumps', lambda: pickle.dumps(rules, pickle.HIGHEST_PROTOCOL))
+    timed('pickle.loads', lambda: pickle.loads(pickled))
+    data = timed('dumps', lambda: dumps(rules))
+    assert timed('loads', lambda: loads(data)) is rules
+    print('pickle %s bytes, binary %s bytes' % (len(pickled), len(data)))
+
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, 'wb') as fileobj:
+            fileobj.write(data)
+        table = timed('load_mmap', lambda: load_mmap(path))
+        namespace = {var.name: True for var in rules.free_variables}
+        assert timed('mmap eval', lambda: table.eval(namespace)) == rules.eval(namespace)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
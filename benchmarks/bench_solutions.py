@@ -0,0 +1,38 @@
+"""
+Compares the cost of enumerating many models as assignments, numpy arrays and bitsets.
+The models are enumerated by decomposition, so the conversion of each model dominates.
+
+Usage: python benchmarks/bench_solutions.py [num_solutions]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyreasoner.expressions import And
+from pyreasoner.expressions import Or
+from pyreasoner.expressions import Solver
+from pyreasoner.expressions import variables
+
+
+def timed(name, function):
+    start = time.time()
+    result = function()
+    print('%-8s %6.2f s' % (name, time.time() - start))
+    return result
+
+
+def main(num_solutions=200000):
+    solver = Solver(And(*(Or(*variables('x%02d y%02d' % (i, i))) for i in range(16))))
+    assert timed('raw', lambda: sum(1 for _ in solver._solve_raw(
+        num_solutions, (), True, None)[0])) == num_solutions
+    assert timed('solve', lambda: sum(
+        1 for _ in solver.solve(num_solutions, decompose=True))) == num_solutions
+    assert timed('arrays', lambda: sum(len(array) for array in solver.solve_arrays(
+        num_solutions, batch_size=4096, decompose=True))) == num_solutions
+    assert timed('bitsets', lambda: sum(
+        1 for _ in solver.solve_bitsets(num_solutions, decompose=True))) == num_solutions
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,151 @@
+"""
+asyncio wrappers for SAT solving (python 3 only).
+
+The conversion to conjunctive normal form and the solving run in an executor, by
+default the event loop's thread pool, so they do not block the event loop. When the
+awaiting task is cancelled, the work in the executor is stopped with the ``cancelled``
+event of its ``Budget`` (see ``pyreasoner.expressions.Budget``), so executors must run
+in the same process, e.g. a ``concurrent.futures.ThreadPoolExecutor``.
+
+The module uses plain futures rather than ``async def``, so the package still compiles
+on python 2.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import asyncio
+import threading
+
+from .expressions import Budget
+from .expressions import SolverBudgetExceeded
+from .expressions import solve_SAT
+
+# Returned by the executor when there are no more solutions.
+_DONE = object()
+
+
+def _with_cancellation(budget):
+    """
+    Returns a copy of ``budget`` (which may be None) with a new ``cancelled`` event.
+    """
+    limits = {} if budget is None else dict(vars(budget))
+    limits['cancelled'] = threading.Event()
+    return Budget(**limits)
+
+
+def _chain(source, loop, convert=lambda result: result, on_cancel=None):
+    """
+    Returns a future for ``convert(source.result())``, which may raise. Cancelling the
+    returned future cancels ``source`` and calls ``on_cancel``.
+    """
+    target = loop.create_future()
+
+    def on_source_done(source):
+        if target.cancelled():
+            return
+        elif source.cancelled():
+            target.cancel()
+        elif source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            try:
+                target.set_result(convert(source.result()))
+            except Exception as error:
+                target.set_exception(error)
+
+    def on_target_done(target):
+        if target.cancelled():
+            source.cancel()
+            if on_cancel is not None:
+                on_cancel()
+
+    source.add_done_callback(on_source_done)
+    target.add_done_callback(on_target_done)
+    return target
+
+
+def _run_cancellably(loop, executor, budget, function):
+    """
+    Returns a future for ``function()`` run in ``executor``. Cancelling the future sets
+    the ``cancelled`` event of ``budget``, which stops the work.
+    """
+    return _chain(
+        loop.run_in_executor(executor, function), loop, on_cancel=budget.cancelled.set)
+
+
+def solve_async(expr, num_solutions=None, tseitin=False, simplify=True, budget=None,
+                executor=None, loop=None):
+    """
+    Returns an awaitable list of the solutions of ``expr``, as for ``solve_SAT``,
+    computed in ``executor``.
+    """
+    budget = _with_cancellation(budget)
+    return _run_cancellably(
+        loop or asyncio.get_event_loop(), executor, budget, lambda: list(
+            solve_SAT(expr, num_solutions, tseitin=tseitin, simplify=simplify, budget=budget)))
+
+
+def is_satisfiable_async(expr, tseitin=False, simplify=True, budget=None, executor=None,
+                         loop=None):
+    """
+    Returns an awaitable of whether ``expr`` is satisfiable, computed in ``executor``.
+    """
+    loop = loop or asyncio.get_event_loop()
+    return _chain(solve_async(expr, 1, tseitin, simplify, budget, executor, loop), loop, bool)
+
+
+def _get_solution(result):
+    if result is _DONE:
+        raise StopAsyncIteration
+    return result
+
+
+class AsyncSolutionIterator(object):
+    """
+    An asynchronous iterator of solutions, which are found in an executor one at a time
+    as they are requested. Cancelling the task waiting for a solution, or calling
+    ``close``, stops the iteration.
+    """
+
+    def __init__(self, expr, num_solutions=None, tseitin=False, simplify=True, budget=None,
+                 executor=None, loop=None):
+        self.budget = _with_cancellation(budget)
+        self._solve = lambda: solve_SAT(
+            expr, num_solutions, tseitin=tseitin, simplify=simplify, budget=self.budget)
+        self._solutions = None
+        self._executor = executor
+        self._loop = loop
+
+    def _next_solution(self):
+        if self._solutions is None:
+            self._solutions = self._solve()
+        return next(self._solutions, _DONE)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        loop = self._loop or asyncio.get_event_loop()
+        if self.budget.cancelled.is_set():
+            raise SolverBudgetExceeded('Cancelled')
+        return _chain(
+            _run_cancellably(loop, self._executor, self.budget, self._next_solution),
+            loop, _get_solution)
+
+    def close(self):
+        """
+        Stops the iteration, and any solving in progress.
+        """
+        self.budget.cancelled.set()
+
+
+def iter_solutions_async(expr, num_solutions=None, tseitin=False, simplify=True, budget=None,
+                         executor=None, loop=None):
+    """
+    Returns an ``AsyncSolutionIterator`` of the solutions of ``expr``, as for
+    ``solve_SAT``::
+
+        async for solution in iter_solutions_async(expr):
+            ...
+    """
+    return AsyncSolutionIterator(
+        expr, num_solutions, tseitin, simplify, budget, executor, loop)
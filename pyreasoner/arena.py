@@ -0,0 +1,268 @@
+"""
+An array-backed representation of expressions, for very large expressions which would
+take too much memory as nodes.
+
+An ``ExpressionArena`` stores the nodes of an expression in topological order in
+parallel arrays, as in ``pyreasoner.serialize``: an opcode per node, offsets into a
+flat array of child references, and the references themselves, where a nonnegative
+reference is the index of a node and a negative reference ``-(i + 1)`` is the ``i``'th
+constant. The child of a Var is the reference to its name. Each node takes 5 bytes,
+plus 4 bytes per child.
+
+Arenas can be built directly with ``add_var``, ``add`` and ``constant``, or from
+nodes with ``from_expression``. ``eval_expr``, ``get_free_variables``,
+``get_node_count``, ``get_depth``, ``convert_to_conjunctive_normal_form``,
+``solve_SAT`` and ``is_satisfiable`` accept arenas as well as nodes.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import array
+
+import six
+
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Or
+from .expressions import Solver
+from .expressions import Var
+from .expressions import _get_child_key
+from .expressions import convert_to_conjunctive_normal_form
+from .expressions import fold_expr
+from .serialize import NodeTable
+from .serialize import _OPCODES
+from .utils import is_valid_identifier_for_namedtuple
+
+_VAR = _OPCODES[Var]
+_AND = _OPCODES[And]
+_OR = _OPCODES[Or]
+_NOT = _OPCODES[Not]
+
+
+class ExpressionArena(NodeTable):
+    """
+    An expression stored in arrays. ``root`` is the reference to the expression, by
+    default the last node added.
+    """
+
+    is_arena = True
+
+    def __init__(self):
+        self.opcodes = array.array(str('B'))
+        self.offsets = array.array(str('I'), [0])
+        self.references = array.array(str('i'))
+        self.constants = []
+        self._constant_references = {}
+        self.root = None
+
+    @classmethod
+    def from_expression(cls, expr):
+        """
+        Returns an arena of ``expr``, with one node for each distinct node of ``expr``.
+        """
+        arena = cls()
+
+        def add_node(node, results):
+            if isinstance(node, Var):
+                return arena.add_var(node.name)
+            return arena.add(type(node), *(
+                result if isinstance(child, ExpressionNode) else arena.constant(child)
+                for child, result in zip(node.children, results)))
+
+        root = fold_expr(expr, add_node)
+        arena.root = root if isinstance(expr, ExpressionNode) else arena.constant(expr)
+        return arena
+
+    def constant(self, value):
+        """
+        Returns the reference to the constant ``value``.
+        """
+        key = _get_child_key(value)
+        if key not in self._constant_references:
+            self.constants.append(value)
+            self._constant_references[key] = -len(self.constants)
+        return self._constant_references[key]
+
+    def _add_node(self, opcode, references):
+        self.opcodes.append(opcode)
+        self.references.extend(references)
+        self.offsets.append(len(self.references))
+        self.root = len(self.opcodes) - 1
+        return self.root
+
+    def add_var(self, name):
+        """
+        Adds a variable, and returns its reference.
+        """
+        if not is_valid_identifier_for_namedtuple(name):
+            raise ValueError('%r is an invalid identifier' % name)
+        return self._add_node(_VAR, [self.constant(name)])
+
+    def add(self, cls, *references):
+        """
+        Adds a node of the operation ``cls`` (e.g. And) whose children are
+        ``references`` to nodes or constants of this arena, and returns its reference.
+        """
+        if cls is Var or cls not in _OPCODES:
+            raise ValueError('Cannot add %r' % cls)
+        if any(reference >= len(self.opcodes) for reference in references):
+            raise ValueError('Children must be added before their parents')
+        return self._add_node(_OPCODES[cls], references)
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes used by the arrays.
+        """
+        return sum(
+            values.itemsize * len(values)
+            for values in [self.opcodes, self.offsets, self.references])
+
+    def _get_reachable(self):
+        """
+        Returns a bytearray which is 1 for the nodes reachable from the root.
+        """
+        reachable = bytearray(len(self.opcodes))
+        if self.root < 0:
+            return reachable
+        reachable[self.root] = 1
+        references, offsets = self.references, self.offsets
+        for i in range(self.root, -1, -1):
+            if reachable[i]:
+                for reference in references[offsets[i]:offsets[i + 1]]:
+                    if reference >= 0:
+                        reachable[reference] = 1
+        return reachable
+
+    @property
+    def free_variables(self):
+        reachable = self._get_reachable()
+        return frozenset(
+            Var(self.constants[-self.references[self.offsets[i]] - 1])
+            for i, opcode in enumerate(self.opcodes) if opcode == _VAR and reachable[i])
+
+    @property
+    def depth(self):
+        return self._fold(
+            lambda opcode, depths: 1 if opcode == _VAR else 1 + max(depths or [0]),
+            lambda constant: 1)
+
+    @property
+    def node_count(self):
+        return self._fold(
+            lambda opcode, counts: 1 if opcode == _VAR else 1 + sum(counts),
+            lambda constant: 1)
+
+    def _get_tseitin_clauses(self):
+        """
+        Returns the clauses of the Tseitin transformation of the expression as pycosat
+        literals, and the {variable number: variable} dict, or None if it is not a
+        boolean expression or is constant.
+        """
+        encoder = _TseitinEncoder()
+        try:
+            root = self._fold(encoder.encode, _get_boolean_constant, self._get_reachable())
+        except _NotBoolean:
+            return None
+        if isinstance(root, bool):
+            return None
+        encoder.clauses.append([root])
+        return encoder.clauses, {index: Var(name) for name, index in encoder.indices.items()}
+
+    def to_solver(self, tseitin=False, simplify=True, budget=None):
+        """
+        Returns a ``Solver`` for the expression. With the Tseitin transformation, the
+        clauses are computed from the arrays without constructing nodes.
+        """
+        encoded = self._get_tseitin_clauses() if tseitin else None
+        if encoded is None:
+            return Solver(self.to_expression(), tseitin=tseitin, simplify=simplify,
+                          budget=budget)
+        clauses, variables = encoded
+        return Solver.from_clauses(clauses, variables, tseitin, simplify, budget)
+
+    def to_conjunctive_normal_form(self, tseitin=False):
+        """
+        Returns the expression in conjunctive normal form, as for
+        ``convert_to_conjunctive_normal_form``.
+        """
+        if tseitin:
+            return self.to_solver(tseitin=True, simplify=False).to_conjunctive_normal_form()
+        return convert_to_conjunctive_normal_form(self.to_expression())
+
+
+class _NotBoolean(Exception):
+    pass
+
+
+# Stands for constants which are not truth values (or the names of variables).
+_NON_BOOLEAN = object()
+
+
+def _get_boolean_constant(constant):
+    if isinstance(constant, (bool, six.text_type, bytes)):
+        return constant
+    return _NON_BOOLEAN
+
+
+def _check_literal(value):
+    if isinstance(value, bool) or not isinstance(value, six.integer_types):
+        raise _NotBoolean
+
+
+class _TseitinEncoder(object):
+    """
+    Encodes nodes as pycosat literals, given the literals (or truth values) of their
+    children, and adds the clauses which define them. Variables and junctions are
+    numbered consecutively.
+    """
+
+    def __init__(self):
+        self.num_indices = 0
+        # Maps the names of variables to their numbers.
+        self.indices = {}
+        self.clauses = []
+
+    def _new_index(self):
+        self.num_indices += 1
+        return self.num_indices
+
+    def encode(self, opcode, arguments):
+        if opcode == _VAR:
+            name, = arguments
+            if name not in self.indices:
+                self.indices[name] = self._new_index()
+            return self.indices[name]
+        elif opcode == _NOT:
+            value, = arguments
+            if isinstance(value, bool):
+                return not value
+            _check_literal(value)
+            return -value
+        elif opcode in (_AND, _OR):
+            return self._encode_junction(opcode == _OR, arguments)
+        raise _NotBoolean
+
+    def _encode_junction(self, is_or, arguments):
+        """
+        Returns the literal of an And (or, if ``is_or``, an Or) of ``arguments``, or its
+        truth value if it is constant.
+        """
+        literals = []
+        for argument in arguments:
+            if argument is is_or:
+                return is_or
+            elif not isinstance(argument, bool):
+                _check_literal(argument)
+                literals.append(argument)
+        if not literals:
+            return not is_or
+        elif len(literals) == 1:
+            return literals[0]
+        index = self._new_index()
+        # For And, index => each literal, and all the literals => index. Or is the dual.
+        sign = -1 if is_or else 1
+        for literal in literals:
+            self.clauses.append([-sign * index, sign * literal])
+        self.clauses.append([sign * index] + [-sign * literal for literal in literals])
+        return index
@@ -0,0 +1,110 @@
+"""
+Solving many independent expressions over a pool of processes.
+
+Expressions are sent to the workers in chunks, serialized with ``pyreasoner.serialize``
+(which unlike pickle does not recurse, so deep expressions can be sent), and both the
+conversion to conjunctive normal form and the SAT solving happen in the workers.
+Results are plain python objects, so they can be sent back without the dynamically
+created assignment classes.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+import itertools
+import multiprocessing
+from concurrent import futures
+
+from .expressions import is_satisfiable
+from .expressions import solve_SAT
+from .serialize import dumps
+from .serialize import loads
+
+DEFAULT_CHUNKSIZE = 64
+
+
+def _solve_chunk(payloads, num_solutions, tseitin, simplify):
+    return [
+        [dict(solution._asdict()) for solution in solve_SAT(
+            loads(payload), num_solutions, tseitin=tseitin, simplify=simplify)]
+        for payload in payloads]
+
+
+def _is_satisfiable_chunk(payloads, tseitin, simplify):
+    return [
+        is_satisfiable(loads(payload), tseitin=tseitin, simplify=simplify)
+        for payload in payloads]
+
+
+def _iter_chunks(exprs, chunksize):
+    exprs = iter(exprs)
+    while True:
+        chunk = [dumps(expr) for expr in itertools.islice(exprs, chunksize)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_chunks(function, args, exprs, workers, chunksize, ordered):
+    """
+    Yields ``function(chunk, *args)`` for chunks of ``exprs``, flattened, or (index,
+    result) pairs as they complete if ``ordered`` is False. At most two chunks per
+    worker are pending at once, so ``exprs`` can be a long iterator.
+    """
+    chunks = _iter_chunks(exprs, chunksize)
+    if workers == 1:
+        # Runs in this process, which avoids the overhead of a pool for small jobs.
+        results = itertools.chain.from_iterable(function(chunk, *args) for chunk in chunks)
+        return results if ordered else enumerate(results)
+    return _map_chunks_in_pool(function, args, chunks, workers, ordered)
+
+
+def _map_chunks_in_pool(function, args, chunks, workers, ordered):
+    max_pending = 2 * (workers or multiprocessing.cpu_count())
+    with futures.ProcessPoolExecutor(workers) as executor:
+        # Maps pending futures to the index of the first expression of their chunk.
+        pending = collections.OrderedDict()
+        start = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending[executor.submit(function, chunk, *args)] = start
+                    start += len(chunk)
+            if not pending:
+                return
+            if ordered:
+                done = [next(iter(pending))]
+            else:
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                start_of_chunk = pending.pop(future)
+                for result in (results if ordered else enumerate(results, start_of_chunk)):
+                    yield result
+
+
+def solve_many(exprs, num_solutions=None, workers=None, chunksize=DEFAULT_CHUNKSIZE,
+               ordered=True, tseitin=False, simplify=True):
+    """
+    Returns an iterator of the solutions of each of ``exprs``, as for ``solve_SAT``,
+    computed in ``workers`` processes (by default, one per CPU). The solutions of each
+    expression are a list of {variable name: truth value} dicts.
+
+    If ``ordered`` is False, (index, solutions) pairs are yielded as soon as their chunk
+    of ``chunksize`` expressions has been solved, rather than in the order of ``exprs``.
+    """
+    return _map_chunks(
+        _solve_chunk, (num_solutions, tseitin, simplify), exprs, workers, chunksize, ordered)
+
+
+def is_satisfiable_many(exprs, workers=None, chunksize=DEFAULT_CHUNKSIZE, ordered=True,
+                        tseitin=False, simplify=True):
+    """
+    Returns an iterator of whether each of ``exprs`` is satisfiable, computed in
+    ``workers`` processes as for ``solve_many``.
+    """
+    return _map_chunks(
+        _is_satisfiable_chunk, (tseitin, simplify), exprs, workers, chunksize, ordered)
@@ -0,0 +1,519 @@
+"""
+Reduced ordered binary decision diagrams (ROBDDs).
+
+See https://en.wikipedia.org/wiki/Binary_decision_diagram. A ``BDDManager`` owns a
+table of nodes shared between all the BDDs it creates, so two BDDs from the same
+manager are logically equivalent if and only if they are the same node.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+import operator
+
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Operation
+from .expressions import Or
+from .expressions import Var
+from .expressions import fold_expr
+from .expressions import get_assignment_class_for_variables
+from .expressions import get_free_variables
+
+FALSE = 0
+TRUE = 1
+
+AND = 'and'
+OR = 'or'
+XOR = 'xor'
+
+
+def get_appearance_order(expr):
+    """
+    Orders variables by their first appearance in a left-to-right traversal of ``expr``.
+    Variables which occur near each other in an expression tend to be related, so this
+    is usually a good ordering for structured expressions.
+    """
+    order = collections.OrderedDict()
+    stack = [expr]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Var):
+            order.setdefault(node, None)
+        elif isinstance(node, Operation) and node not in seen:
+            seen.add(node)
+            stack.extend(reversed(node.children))
+    return list(order)
+
+
+def get_alphabetical_order(expr):
+    return sorted(get_free_variables(expr), key=operator.attrgetter('name'))
+
+
+def get_occurrence_order(expr):
+    """
+    Orders variables by the number of subexpressions they occur in, most frequent first.
+    Ties are broken by order of appearance.
+    """
+    counts = collections.Counter()
+    stack = [expr]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Operation) and node not in seen:
+            seen.add(node)
+            counts.update(child for child in node.children if isinstance(child, Var))
+            stack.extend(node.children)
+    appearance_order = get_appearance_order(expr)
+    return sorted(appearance_order, key=lambda var: -counts[var])
+
+
+ORDERINGS = {
+    'appearance': get_appearance_order,
+    'alphabetical': get_alphabetical_order,
+    'occurrence': get_occurrence_order,
+}
+
+
+# Each of these returns the result of the operation if it can be computed without
+# looking at the children of either node, and None otherwise.
+
+def _and_terminal_case(u, v):
+    if u == FALSE or v == FALSE:
+        return FALSE
+    elif u == TRUE or u == v:
+        return v
+    elif v == TRUE:
+        return u
+
+
+def _or_terminal_case(u, v):
+    if u == TRUE or v == TRUE:
+        return TRUE
+    elif u == FALSE or u == v:
+        return v
+    elif v == FALSE:
+        return u
+
+
+def _xor_terminal_case(u, v):
+    if u == v:
+        return FALSE
+    elif u == FALSE:
+        return v
+    elif v == FALSE:
+        return u
+
+
+TERMINAL_CASES = {
+    AND: _and_terminal_case,
+    OR: _or_terminal_case,
+    XOR: _xor_terminal_case,
+}
+
+
+def _fold_nodes(root, get_children, combine, results):
+    """
+    Returns ``results[root]``, after setting ``results[node]`` to
+    ``combine(node, child_results)`` for each node reachable from ``root`` through
+    ``get_children``, children first. ``results`` must already contain the results for
+    the terminals. The traversal uses an explicit stack, since BDDs can be as deep as
+    they have variables.
+    """
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if node in results:
+            stack.pop()
+            continue
+        children = get_children(node)
+        pending = [child for child in children if child not in results]
+        if pending:
+            stack.extend(pending)
+        else:
+            stack.pop()
+            results[node] = combine(node, [results[child] for child in children])
+    return results[root]
+
+
+class BDDManager(object):
+    """
+    Owns the nodes of a collection of BDDs over a shared variable order.
+
+    Nodes are integers, with 0 and 1 as the False and True terminals. The unique
+    table ensures no two nodes have the same variable and children, and the results
+    of ``apply`` are memoized in a fixed size computed table, where newer entries
+    evict older entries which hash to the same slot.
+
+    ``variables`` fixes the start of the variable order. Variables of compiled
+    expressions which are not yet in the order are appended to it in the order given
+    by ``ordering``, which is one of the keys of ``ORDERINGS`` or a function from
+    expressions to lists of variables.
+    """
+
+    def __init__(self, variables=(), ordering='appearance', cache_size=2 ** 16):
+        self.ordering = ORDERINGS.get(ordering, ordering)
+        self.variables = []
+        self._var2level = {}
+        # The variable level and children of each node, indexed by node.
+        self._levels = [None, None]  # Terminals have no variable, see level().
+        self._lows = [FALSE, TRUE]
+        self._highs = [FALSE, TRUE]
+        self._unique_table = {}
+        self._cache = [None] * cache_size
+        self.cache_hits = self.cache_misses = 0
+        for var in variables:
+            self.add_variable(var)
+
+    @property
+    def false(self):
+        return BDD(self, FALSE)
+
+    @property
+    def true(self):
+        return BDD(self, TRUE)
+
+    def __len__(self):
+        """
+        Returns the number of nodes, including the terminals.
+        """
+        return len(self._levels)
+
+    def add_variable(self, var):
+        if var not in self._var2level:
+            self._var2level[var] = len(self.variables)
+            self.variables.append(var)
+
+    def level(self, node):
+        # Terminals are below every variable.
+        return len(self.variables) if node <= TRUE else self._levels[node]
+
+    def make_node(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self._unique_table.get(key)
+        if node is None:
+            node = self._unique_table[key] = len(self._levels)
+            self._levels.append(level)
+            self._lows.append(low)
+            self._highs.append(high)
+        return node
+
+    def _cofactors(self, node, level):
+        if node > TRUE and self._levels[node] == level:
+            return self._lows[node], self._highs[node]
+        return node, node
+
+    def _lookup(self, op, u, v, results):
+        """
+        Returns the node for ``u <op> v`` if it is known without recursing, and None
+        otherwise.
+        """
+        result = TERMINAL_CASES[op](u, v)
+        if result is not None:
+            return result
+        # Every operation is commutative.
+        key = (op, u, v) if u < v else (op, v, u)
+        if key in results:
+            return results[key]
+        entry = self._cache[hash(key) % len(self._cache)]
+        if entry is not None and entry[0] == key:
+            self.cache_hits += 1
+            results[key] = entry[1]
+            return entry[1]
+        return None
+
+    def apply(self, op, u, v):
+        """
+        Returns the node for ``u <op> v``, where ``op`` is one of AND, OR or XOR.
+        """
+        # Pairs of nodes still to be combined. The computed table is lossy, so results
+        # of this call are also kept in ``results`` until it returns.
+        results = {}
+        stack = [(u, v)]
+        while stack:
+            top_u, top_v = stack[-1]
+            if self._lookup(op, top_u, top_v, results) is not None:
+                stack.pop()
+                continue
+            level = min(self.level(top_u), self.level(top_v))
+            u_low, u_high = self._cofactors(top_u, level)
+            v_low, v_high = self._cofactors(top_v, level)
+            low = self._lookup(op, u_low, v_low, results)
+            high = self._lookup(op, u_high, v_high, results)
+            if low is None:
+                stack.append((u_low, v_low))
+            if high is None:
+                stack.append((u_high, v_high))
+            if low is None or high is None:
+                continue
+
+            stack.pop()
+            self.cache_misses += 1
+            key = (op, top_u, top_v) if top_u < top_v else (op, top_v, top_u)
+            result = results[key] = self.make_node(level, low, high)
+            self._cache[hash(key) % len(self._cache)] = (key, result)
+        return self._lookup(op, u, v, results)
+
+    def negate(self, u):
+        return self.apply(XOR, u, TRUE)
+
+    def _get_children(self, node):
+        return self._lows[node], self._highs[node]
+
+    def restrict(self, u, values):
+        """
+        Returns the node for ``u`` with the variables at the levels in ``values``
+        replaced by the corresponding truth values.
+        """
+        def get_children(node):
+            level = self._levels[node]
+            if level in values:
+                return [self._highs[node] if values[level] else self._lows[node]]
+            return self._get_children(node)
+
+        def combine(node, children):
+            if len(children) == 1:
+                return children[0]
+            return self.make_node(self._levels[node], *children)
+
+        return _fold_nodes(u, get_children, combine, {FALSE: FALSE, TRUE: TRUE})
+
+    def exists(self, u, levels):
+        """
+        Returns the node for ``u`` with the variables at ``levels`` existentially quantified.
+        """
+        def combine(node, children):
+            level = self._levels[node]
+            if level in levels:
+                return self.apply(OR, *children)
+            return self.make_node(level, *children)
+
+        return _fold_nodes(u, self._get_children, combine, {FALSE: FALSE, TRUE: TRUE})
+
+    def compile(self, expr):
+        """
+        Returns the BDD of ``expr``, which may only contain And, Or, Not, variables and
+        truth literals.
+        """
+        for var in self.ordering(expr):
+            self.add_variable(var)
+
+        def compile_node(node, results):
+            if isinstance(node, Var):
+                return self.make_node(self._var2level[node], FALSE, TRUE)
+            # Constant children are truth literals.
+            children = [
+                result if isinstance(child, ExpressionNode) else (TRUE if child else FALSE)
+                for child, result in zip(node.children, results)]
+            if isinstance(node, Not):
+                return self.negate(children[0])
+            elif isinstance(node, (And, Or)):
+                op = AND if isinstance(node, And) else OR
+                # Combining neighbours pairwise keeps the intermediate BDDs small for long
+                # chains, where folding from the left would be quadratic.
+                while len(children) > 1:
+                    children = [
+                        self.apply(op, *children[i:i + 2]) if i + 1 < len(children)
+                        else children[i]
+                        for i in range(0, len(children), 2)]
+                return children[0] if children else (TRUE if op == AND else FALSE)
+            raise TypeError('Cannot compile non-boolean expression %r' % node)
+
+        if not isinstance(expr, ExpressionNode):
+            return BDD(self, TRUE if expr else FALSE)
+        return BDD(self, fold_expr(expr, compile_node))
+
+
+class BDD(object):
+    """
+    A boolean function, represented as a node of a ``BDDManager``.
+
+    BDDs support the &, |, ^ and ~ operators, and two BDDs from the same manager
+    compare equal if and only if they are logically equivalent.
+    """
+
+    def __init__(self, manager, node):
+        self.manager = manager
+        self.node = node
+
+    def _get_node(self, other):
+        if isinstance(other, bool):
+            return TRUE if other else FALSE
+        elif not isinstance(other, BDD) or other.manager is not self.manager:
+            raise ValueError('Cannot combine %r with a BDD from another manager' % other)
+        return other.node
+
+    def __and__(self, other):
+        return BDD(self.manager, self.manager.apply(AND, self.node, self._get_node(other)))
+
+    def __or__(self, other):
+        return BDD(self.manager, self.manager.apply(OR, self.node, self._get_node(other)))
+
+    def __xor__(self, other):
+        return BDD(self.manager, self.manager.apply(XOR, self.node, self._get_node(other)))
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __invert__(self):
+        return BDD(self.manager, self.manager.negate(self.node))
+
+    def __eq__(self, other):
+        return isinstance(other, BDD) and (self.manager, self.node) == (other.manager, other.node)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.manager), self.node))
+
+    def __repr__(self):
+        return 'BDD(%r)' % self.to_expression()
+
+    @property
+    def is_true(self):
+        return self.node == TRUE
+
+    @property
+    def is_false(self):
+        return self.node == FALSE
+
+    def _iter_nodes(self):
+        seen = set()
+        stack = [self.node]
+        while stack:
+            node = stack.pop()
+            if node > TRUE and node not in seen:
+                seen.add(node)
+                yield node
+                stack.append(self.manager._lows[node])
+                stack.append(self.manager._highs[node])
+
+    @property
+    def node_count(self):
+        """
+        The number of non-terminal nodes in the BDD.
+        """
+        return sum(1 for _ in self._iter_nodes())
+
+    @property
+    def support(self):
+        """
+        The variables which the function depends on.
+        """
+        variables = self.manager.variables
+        return frozenset(variables[self.manager._levels[node]] for node in self._iter_nodes())
+
+    def _get_levels(self, namespace):
+        return {self.manager._var2level[var]: value for var, value in namespace.items()
+                if var in self.manager._var2level}
+
+    def restrict(self, namespace=None, **kwargs):
+        """
+        Returns the BDD with the variables in ``namespace`` (a ``{var: bool}`` dict) or
+        ``kwargs`` replaced by truth values.
+        """
+        namespace = dict(namespace or kwargs)
+        namespace = {
+            var if isinstance(var, Var) else Var(var): value for var, value in namespace.items()}
+        return BDD(self.manager, self.manager.restrict(self.node, self._get_levels(namespace)))
+
+    def exists(self, variables):
+        """
+        Returns the BDD of ``exists variables: self``.
+        """
+        levels = set(self._get_levels(dict.fromkeys(variables)))
+        return BDD(self.manager, self.manager.exists(self.node, levels))
+
+    def _get_ordered_variables(self, variables):
+        if variables is None:
+            variables = self.support
+        elif not self.support <= set(variables):
+            raise ValueError('%r do not include %r' % (variables, self.support))
+        for var in sorted(variables, key=operator.attrgetter('name')):
+            self.manager.add_variable(var)
+        return sorted(variables, key=self.manager._var2level.get)
+
+    def count(self, variables=None):
+        """
+        Returns the number of satisfying assignments to ``variables``, which defaults
+        to the support of the function.
+        """
+        ordered = self._get_ordered_variables(variables)
+        manager = self.manager
+        ranks = {manager._var2level[var]: i for i, var in enumerate(ordered)}
+
+        def rank(node):
+            return len(ordered) if node <= TRUE else ranks[manager._levels[node]]
+
+        def count(node, counts):
+            # The number of assignments to the variables at or below the rank of node.
+            low, high = manager._get_children(node)
+            low_count, high_count = counts
+            return (
+                low_count * 2 ** (rank(low) - rank(node) - 1) +
+                high_count * 2 ** (rank(high) - rank(node) - 1))
+
+        total = _fold_nodes(self.node, manager._get_children, count, {FALSE: 0, TRUE: 1})
+        return total * 2 ** rank(self.node)
+
+    def iter_solutions(self, variables=None):
+        """
+        Yields the satisfying assignments to ``variables``, which defaults to the support
+        of the function.
+        """
+        ordered = self._get_ordered_variables(variables)
+        Assignment = get_assignment_class_for_variables(ordered)
+        positions = {var.name: i for i, var in enumerate(ordered)}
+        field_positions = [positions[name] for name in Assignment._fields]
+        manager = self.manager
+        values = [None] * len(ordered)
+
+        # A depth first search over the paths, where each entry is a node, the number of
+        # variables assigned on the path to it, and the value of the last one.
+        stack = [(self.node, 0, None)]
+        while stack:
+            node, i, value = stack.pop()
+            if i:
+                values[i - 1] = value
+            if node == FALSE:
+                continue
+            elif i == len(ordered):
+                yield Assignment(*[values[j] for j in field_positions])
+                continue
+            low, high = manager._cofactors(node, manager._var2level[ordered[i]])
+            stack.append((high, i + 1, True))
+            stack.append((low, i + 1, False))
+
+    def to_expression(self):
+        """
+        Returns an expression equivalent to the BDD, built by Shannon expansion.
+        """
+        manager = self.manager
+
+        def to_expression(node, children):
+            var = manager.variables[manager._levels[node]]
+            low, high = children
+            if low is False:
+                return var if high is True else var & high
+            elif high is False:
+                return ~var if low is True else ~var & low
+            elif low is True:
+                return ~var | high
+            elif high is True:
+                return var | low
+            return Or(And(var, high), And(Not(var), low))
+
+        return _fold_nodes(
+            self.node, manager._get_children, to_expression, {FALSE: False, TRUE: True})
+
+
+def get_bdd(expr, ordering='appearance'):
+    """
+    Compiles ``expr`` into a BDD, using a new ``BDDManager``.
+    """
+    return BDDManager(ordering=ordering).compile(expr)
@@ -0,0 +1,191 @@
+"""
+A bounded LRU cache of the results of satisfiability queries.
+
+Queries are looked up by the ``structural_hash`` of the ``canonicalize``d expression,
+so expressions which only differ in the order of the children of And and Or, or
+(mostly) in the names of their variables, share a result. Results are stored in terms
+of the canonical variables, and renamed to the variables of each query.
+
+The cache can be saved to and loaded from a file, so it persists between processes.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+import os
+import pickle
+
+from .canonical import canonicalize
+from .canonical import structural_hash
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Or
+from .expressions import convert_to_conjunctive_normal_form
+from .expressions import get_assignment_class_for_variables
+from .expressions import get_node_count
+from .expressions import is_logically_equivalent
+from .expressions import is_satisfiable
+from .expressions import reify_many
+from .expressions import solve_SAT
+from .serialize import dumps
+from .serialize import loads
+
+# The names of the statistics.
+HITS = 'hits'
+MISSES = 'misses'
+EVICTIONS = 'evictions'
+
+# Files saved by version 1 keyed variables like the string constants of their names.
+_VERSION = 2
+
+
+class QueryCache(object):
+    """
+    Caches up to ``maxsize`` results, evicting the least recently used. If
+    ``max_cost`` is given, the total cost of the results is also bounded, where the
+    cost of a result is 1 for a truth value, 1 plus the number of solutions for
+    ``solve_SAT`` and the number of nodes for a conjunctive normal form. Results which
+    cost more than ``max_cost`` are not cached.
+
+    If ``path`` is given, the cache is loaded from it if it exists, and ``save``
+    writes it there.
+    """
+
+    def __init__(self, maxsize=1024, max_cost=None, path=None):
+        self.maxsize = maxsize
+        self.max_cost = max_cost
+        self.path = path
+        # Maps keys to (result, cost) pairs, from least to most recently used.
+        self._entries = collections.OrderedDict()
+        self.cost = 0
+        self.statistics = collections.Counter()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.cost = 0
+
+    def _get(self, key, compute):
+        """
+        Returns the cached result for ``key``, or caches and returns ``compute()``.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.statistics[HITS] += 1
+            self._entries[key] = entry
+            return entry[0]
+        self.statistics[MISSES] += 1
+        result, cost = compute()
+        self._put(key, result, cost)
+        return result
+
+    def _put(self, key, result, cost):
+        if self.max_cost is not None and cost > self.max_cost:
+            return
+        self._entries[key] = result, cost
+        self.cost += cost
+        while len(self._entries) > self.maxsize or (
+                self.max_cost is not None and self.cost > self.max_cost):
+            _, (_, evicted_cost) = self._entries.popitem(last=False)
+            self.cost -= evicted_cost
+            self.statistics[EVICTIONS] += 1
+
+    def is_satisfiable(self, expr, tseitin=False, simplify=True, budget=None):
+        """
+        Returns ``is_satisfiable(expr, tseitin, simplify, budget)``, which is not cached
+        if the budget is exceeded.
+        """
+        if not isinstance(expr, ExpressionNode):
+            return is_satisfiable(expr, tseitin, simplify, budget)
+        canonical, _ = canonicalize(expr)
+        return self._get(('satisfiable', structural_hash(canonical)), lambda: (
+            is_satisfiable(canonical, tseitin, simplify, budget), 1))
+
+    def solve_SAT(self, expr, num_solutions=None, tseitin=False, simplify=True, budget=None):
+        """
+        Returns a list of the solutions of ``solve_SAT(expr, ...)``, though not
+        necessarily in the same order.
+        """
+        if not isinstance(expr, ExpressionNode):
+            return list(solve_SAT(expr, num_solutions, tseitin, simplify, budget))
+        canonical, renaming = canonicalize(expr)
+
+        def compute():
+            solutions = list(solve_SAT(canonical, num_solutions, tseitin, simplify, budget))
+            fields = solutions[0]._fields if solutions else ()
+            return (fields, [tuple(solution) for solution in solutions]), 1 + len(solutions)
+
+        fields, solutions = self._get(
+            ('solutions', structural_hash(canonical), num_solutions, tseitin, simplify),
+            compute)
+        original = {new.name: old for old, new in renaming.items()}
+        variables = [original[name] for name in fields]
+        assignment_class = get_assignment_class_for_variables(variables)
+        return [
+            assignment_class(**{var.name: value for var, value in zip(variables, solution)})
+            for solution in solutions]
+
+    def convert_to_conjunctive_normal_form(self, expr, tseitin=False):
+        """
+        Returns an expression in conjunctive normal form equivalent to (or, if
+        ``tseitin`` is True, equisatisfiable with) ``expr``, as for
+        ``convert_to_conjunctive_normal_form``. The order of its clauses and literals
+        may differ.
+        """
+        if not isinstance(expr, ExpressionNode):
+            return convert_to_conjunctive_normal_form(expr, tseitin)
+        canonical, renaming = canonicalize(expr)
+
+        def compute():
+            result = convert_to_conjunctive_normal_form(canonical, tseitin)
+            return result, get_node_count(result)
+
+        result = self._get(('cnf', structural_hash(canonical), tseitin), compute)
+        original = {new: old for old, new in renaming.items()}
+        return reify_many(result, [original])[0]
+
+    def is_logically_equivalent(self, expr1, expr2):
+        """
+        Returns ``is_logically_equivalent(expr1, expr2)``.
+        """
+        # Renamings of both expressions together share the result.
+        miter = Or(And(expr1, Not(expr2)), And(Not(expr1), expr2))
+        canonical, _ = canonicalize(miter)
+        return self._get(('equivalent', structural_hash(canonical)), lambda: (
+            is_logically_equivalent(expr1, expr2), 1))
+
+    def _encode(self, result):
+        # Expressions are serialized without recursion, so deep ones can be saved.
+        if isinstance(result, ExpressionNode):
+            return 'expression', dumps(result)
+        return 'value', result
+
+    def _decode(self, encoded):
+        kind, value = encoded
+        return loads(value) if kind == 'expression' else value
+
+    def save(self, path=None):
+        """
+        Writes the cache to ``path``, by default the ``path`` it was created with.
+        """
+        entries = [
+            (key, self._encode(result), cost)
+            for key, (result, cost) in self._entries.items()]
+        with open(path or self.path, 'wb') as fileobj:
+            pickle.dump((_VERSION, entries), fileobj, protocol=2)
+
+    def load(self, path):
+        """
+        Adds the entries saved in ``path`` to the cache. Files saved by other versions
+        are ignored.
+        """
+        with open(path, 'rb') as fileobj:
+            version, entries = pickle.load(fileobj)
+        if version != _VERSION:
+            return
+        for key, encoded, cost in entries:
+            self._put(key, self._decode(encoded), cost)
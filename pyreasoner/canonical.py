@@ -0,0 +1,123 @@
+"""
+Canonical forms of expressions, up to the order of the children of And and Or and the
+names of variables.
+
+``canonicalize`` flattens nested Ands and Ors, sorts their children, and renames the
+variables to ``v0, v1, ...`` in order of first occurrence. Expressions with the same
+canonical form are the same up to renaming, so have the same satisfiability, and
+their solutions correspond through the renamings. Finding a canonical form which is
+the same for every renaming is as hard as graph isomorphism, so children which only
+differ in the names of their variables are ordered as they were given. Some renamings
+of an expression therefore have different canonical forms.
+
+``structural_hash`` is a digest of the structure of an expression which, unlike
+``hash``, is the same in every process, so can be used as a key in persistent caches.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+import hashlib
+
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Or
+from .expressions import Var
+from .expressions import fold_expr
+
+Canonical = collections.namedtuple('Canonical', ['expr', 'renaming'])
+Canonical.__doc__ = """
+A canonical expression, and the {original variable: canonical variable} renaming which
+gives it.
+"""
+
+
+def _get_constant_key(value):
+    # Includes the type, since constants like True, 1 and 1.0 compare equal.
+    return '%s:%r' % (type(value).__name__, value)
+
+
+def _get_node_key(name, child_keys):
+    return hashlib.sha1('\0'.join([name] + child_keys).encode('utf-8')).hexdigest()
+
+
+def _rebuild(expr, get_var, get_var_key, normalize):
+    """
+    Returns ``expr`` with each variable replaced by ``get_var(var)`` and, if
+    ``normalize`` is True, the children of And and Or nodes flattened and sorted by
+    their keys, along with the {node: key} dict of the keys of the result's nodes. The
+    key of a variable is ``get_var_key(var)``, and other keys are digests of their
+    node's structure.
+    """
+    keys = {}
+
+    def get_key(child):
+        return keys[child] if isinstance(child, ExpressionNode) else _get_constant_key(child)
+
+    def combine(node, children):
+        if isinstance(node, Var):
+            result = get_var(node)
+            keys[result] = get_var_key(result)
+            return result
+        cls = type(node)
+        if normalize and cls in (And, Or):
+            flattened = []
+            for child in children:
+                if type(child) is cls:
+                    flattened.extend(child.children)
+                else:
+                    flattened.append(child)
+            children = sorted(flattened, key=get_key)
+        result = cls(*children)
+        keys[result] = _get_node_key(cls.__name__, [get_key(child) for child in children])
+        return result
+
+    return fold_expr(expr, combine), keys
+
+
+def _get_variable_order(expr):
+    """
+    Returns the variables of ``expr`` in the order they first occur from left to right.
+    """
+    order = collections.OrderedDict()
+    visited = set()
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Var):
+            order.setdefault(node)
+        elif isinstance(node, ExpressionNode) and node not in visited:
+            visited.add(node)
+            stack.extend(reversed(node.children))
+    return list(order)
+
+
+def _get_var_key(var):
+    # Distinct from the key of the string constant with the same name.
+    return 'Var:%s' % var.name
+
+
+def canonicalize(expr):
+    """
+    Returns the ``Canonical`` form of ``expr``.
+    """
+    if not isinstance(expr, ExpressionNode):
+        return Canonical(expr, {})
+    # Orders children by their structure without the names of variables, so the order
+    # of the variables, and so their new names, mostly do not depend on the old names.
+    shaped, _ = _rebuild(expr, lambda var: var, lambda var: 'Var', normalize=True)
+    renaming = {
+        var: Var('v%s' % i) for i, var in enumerate(_get_variable_order(shaped))}
+    # Ties are then broken by the new names.
+    canonical, _ = _rebuild(shaped, renaming.get, _get_var_key, normalize=True)
+    return Canonical(canonical, renaming)
+
+
+def structural_hash(expr):
+    """
+    Returns a hex digest of the structure of ``expr``, including the names of its
+    variables and the order of children, which is stable between processes.
+    """
+    if not isinstance(expr, ExpressionNode):
+        return _get_node_key('constant', [_get_constant_key(expr)])
+    _, keys = _rebuild(expr, lambda var: var, _get_var_key, normalize=False)
+    return keys[expr]
@@ -0,0 +1,95 @@
+"""
+Evaluating an expression over many records at once, stored as columns.
+
+Rather than calling ``eval_expr`` once per record, each node of the expression is
+evaluated once per batch, with vectorized numpy operations over whole columns. Columns
+can be given as a mapping of variable names to arrays, a numpy structured array, or a
+columnar table with a ``column(name)`` method (like a ``pyarrow.Table``).
+
+Inputs larger than memory can be evaluated in chunks of rows, either from an iterator
+of chunks (``iter_evaluate_batch``) or by slicing columns which are not read until they
+are used, like ``numpy.memmap`` arrays (``evaluate_batch`` with ``chunksize``).
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+from functools import reduce
+
+import numpy
+
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Or
+from .expressions import Var
+from .expressions import fold_expr
+from .expressions import get_free_variables
+
+_REDUCERS = {And: numpy.logical_and, Or: numpy.logical_or}
+
+
+def _get_column(columns, name):
+    if isinstance(columns, numpy.ndarray):
+        column = columns[name]
+    elif hasattr(columns, 'column'):
+        column = columns.column(name)
+    else:
+        column = columns[name]
+    return numpy.asarray(column)
+
+
+def _get_num_rows(columns):
+    if isinstance(columns, numpy.ndarray):
+        return len(columns)
+    elif hasattr(columns, 'num_rows'):
+        return columns.num_rows
+    return min([len(column) for column in columns.values()] or [0])
+
+
+def _evaluate_node(node, values, columns):
+    if isinstance(node, Var):
+        return _get_column(columns, node.name)
+    elif isinstance(node, Not):
+        value, = values
+        return numpy.logical_not(value)
+    elif type(node) in _REDUCERS:
+        if not values:
+            return node.default_reduce_value
+        return reduce(_REDUCERS[type(node)], values)
+    return node.operator(*values)
+
+
+def _evaluate_chunk(expr, columns, num_rows):
+    result = fold_expr(
+        expr, lambda node, values: _evaluate_node(node, values, columns))
+    # Subexpressions without variables evaluate to scalars.
+    return numpy.broadcast_to(numpy.asarray(result, dtype=bool), (num_rows, ))
+
+
+def iter_evaluate_batch(expr, chunks):
+    """
+    Yields a boolean array of the value of ``expr`` for each record of each chunk in
+    ``chunks``, which are columns as for ``evaluate_batch``.
+    """
+    for columns in chunks:
+        yield _evaluate_chunk(expr, columns, _get_num_rows(columns))
+
+
+def evaluate_batch(expr, columns, chunksize=None):
+    """
+    Returns a boolean array of the value of ``expr`` for each record of ``columns``,
+    which maps the name of each free variable of ``expr`` to an array of its values.
+
+    If ``chunksize`` is given, the columns are evaluated that many rows at a time, so
+    the intermediate arrays, and the parts of the columns which are read at once, are
+    at most that long.
+    """
+    num_rows = _get_num_rows(columns)
+    if chunksize is None or not isinstance(expr, ExpressionNode):
+        return numpy.array(_evaluate_chunk(expr, columns, num_rows))
+    names = sorted(var.name for var in get_free_variables(expr))
+    result = numpy.empty(num_rows, dtype=bool)
+    for start in range(0, num_rows, chunksize):
+        chunk = {name: _get_column(columns, name)[start:start + chunksize] for name in names}
+        result[start:start + chunksize] = _evaluate_chunk(
+            expr, chunk, min(chunksize, num_rows - start))
+    return result
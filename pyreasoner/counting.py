@@ -0,0 +1,213 @@
+"""
+Model counting (#SAT) without enumerating models.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+
+import pycosat
+
+from .bdd import get_bdd
+from .expressions import Solver
+from .expressions import _get_components
+from .expressions import get_free_variables
+
+
+def _condition(clauses, literal):
+    """
+    Returns the clauses simplified by assigning ``literal`` to True.
+    """
+    return [
+        tuple(other for other in clause if other != -literal)
+        for clause in clauses if literal not in clause
+    ]
+
+
+def _propagate(clauses):
+    """
+    Repeatedly assigns the literals of unit clauses. Returns the simplified clauses and
+    the assigned literals, or None if the clauses are unsatisfiable.
+    """
+    if () in clauses:
+        return None
+    assigned = []
+    while True:
+        units = {clause[0] for clause in clauses if len(clause) == 1}
+        if not units:
+            return clauses, assigned
+        if any(-literal in units for literal in units):
+            return None
+        # All the units are assigned in one pass over the clauses.
+        clauses = [
+            tuple(other for other in clause if -other not in units)
+            for clause in clauses if units.isdisjoint(clause)
+        ]
+        if () in clauses:
+            return None
+        assigned.extend(units)
+
+
+def _get_distances(clauses, clauses_of, start):
+    """
+    Returns the {variable: distance} dict of the distances from the variable ``start``
+    in the graph where variables are adjacent if they share a clause.
+    """
+    distances = {start: 0}
+    visited_clauses = set()
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for var in frontier:
+            for i in clauses_of[var]:
+                if i in visited_clauses:
+                    continue
+                visited_clauses.add(i)
+                for literal in clauses[i]:
+                    if abs(literal) not in distances:
+                        distances[abs(literal)] = distances[var] + 1
+                        next_frontier.append(abs(literal))
+        frontier = next_frontier
+    return distances
+
+
+def _choose_variable(clauses, counted):
+    """
+    Returns the variable of ``counted`` to branch on: one which occurs in the most
+    clauses. Ties are broken by the variable nearest the middle of a long path between
+    the (connected) clauses' variables, whose assignment is likely to split them into
+    components of similar sizes, so chains of clauses are split in halves rather than
+    shortened by one variable at a time.
+    """
+    clauses_of = collections.defaultdict(list)
+    for i, clause in enumerate(clauses):
+        for literal in clause:
+            clauses_of[abs(literal)].append(i)
+    most = max(len(clauses_of[var]) for var in counted)
+    candidates = [var for var in counted if len(clauses_of[var]) == most]
+    if len(candidates) == 1:
+        return candidates[0]
+    # The farthest variable from any variable is at one end of a long path.
+    distances = _get_distances(clauses, clauses_of, candidates[0])
+    distances = _get_distances(clauses, clauses_of, max(distances, key=distances.get))
+    middle = max(distances.values()) / 2
+    return min(candidates, key=lambda var: abs(distances[var] - middle))
+
+
+class _Result(object):
+    """
+    Yielded by a step of the search with its count, rather than a step to run.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _ModelCounter(object):
+    """
+    Counts models by DPLL search, splitting the clauses into independent components
+    whose counts are multiplied, and caching the counts of components.
+
+    Only the variables in ``counted`` are counted; the others are existentially
+    quantified, so a component without counted variables contributes a factor of
+    1 if it is satisfiable, and 0 otherwise.
+    """
+
+    def __init__(self, counted, cache_size):
+        self.counted = counted
+        self.cache_size = cache_size
+        self.cache = {}
+
+    def count(self, clauses, variables):
+        """
+        Returns the number of assignments to the counted variables in ``variables``
+        which can be extended to satisfy ``clauses``. The steps of the search are kept
+        on a stack of generators, which yield the steps they depend on, so the depth of
+        the search is not limited by recursion.
+        """
+        stack = [self._count(clauses, variables)]
+        value = None
+        while True:
+            step = stack[-1].send(value)
+            if isinstance(step, _Result):
+                value = step.value
+                stack.pop()
+                if not stack:
+                    return value
+            else:
+                stack.append(step)
+                value = None
+
+    def _count(self, clauses, variables):
+        propagated = _propagate(clauses)
+        if propagated is None:
+            yield _Result(0)
+            return
+        clauses, assigned = propagated
+        remaining = {abs(literal) for clause in clauses for literal in clause}
+        unconstrained = (variables - remaining - {abs(literal) for literal in assigned})
+        result = 2 ** len(unconstrained & self.counted)
+        for component in _get_components(clauses):
+            result *= yield self._count_component(component)
+            if not result:
+                break
+        yield _Result(result)
+
+    def _count_component(self, clauses):
+        key = frozenset(clauses)
+        if key in self.cache:
+            yield _Result(self.cache[key])
+            return
+
+        variables = {abs(literal) for clause in clauses for literal in clause}
+        counted = variables & self.counted
+        if not counted:
+            result = int(pycosat.solve([list(clause) for clause in clauses]) != 'UNSAT')
+        elif len(clauses) == 1:
+            # A single clause is only falsified by one assignment, which must be to counted
+            # variables only.
+            result = 2 ** len(counted) - (counted == variables)
+        else:
+            var = _choose_variable(clauses, counted)
+            variables.discard(var)
+            result = yield self._count(_condition(clauses, var), variables)
+            result += yield self._count(_condition(clauses, -var), variables)
+
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[key] = result
+        yield _Result(result)
+
+
+def count_solutions(expr, variables=None, method='dpll', cache_size=2 ** 16):
+    """
+    Returns the number of assignments to ``variables`` which can be extended to a
+    satisfying assignment of ``expr``. ``variables`` defaults to the free variables of
+    ``expr``, in which case this is the number of models of ``expr``. Variables which
+    do not occur in ``expr`` double the count.
+
+    With ``method='dpll'`` the expression is Tseitin encoded, and counted by a DPLL
+    search which caches the counts of independent components (at most ``cache_size``
+    of them). With ``method='bdd'`` the count is computed from the expression's BDD,
+    which is faster when the BDD is small.
+    """
+    free_variables = get_free_variables(expr)
+    variables = free_variables if variables is None else frozenset(variables)
+    if method == 'bdd':
+        bdd = get_bdd(expr)
+        if not variables >= free_variables:
+            bdd = bdd.exists(free_variables - variables)
+        return bdd.count(variables)
+    elif method != 'dpll':
+        raise ValueError('Unknown method %r' % method)
+
+    solver = Solver(expr, tseitin=True)
+    all_indices = set(range(1, solver.num_indices + 1))
+    if variables >= free_variables:
+        # Tseitin auxiliary variables are determined by the free variables, so counting
+        # them does not change the count.
+        counted = all_indices
+    else:
+        counted = {solver.get_index(var) for var in variables & free_variables}
+    counter = _ModelCounter(frozenset(counted), cache_size)
+    count = counter.count([tuple(clause) for clause in solver.clauses], all_indices)
+    return count * 2 ** len(variables - free_variables)
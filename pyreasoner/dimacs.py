@@ -0,0 +1,98 @@
+"""
+Reading and writing clauses in the DIMACS CNF format used by SAT solvers and benchmark
+suites: http://www.satcompetition.org/2009/format-benchmarks2009.html
+
+Files written by ``to_dimacs`` record the name of each numbered variable in a comment
+line like ``c var 3 name``, so solutions read back from them use the original variables.
+Other files are read with variables named ``x<n>`` after their numbers.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import itertools
+
+from .expressions import Solver
+from .expressions import Var
+
+_VARIABLE_COMMENT = 'c var '
+
+
+def write_dimacs(solver, fileobj):
+    """
+    Writes the clauses of ``solver`` to ``fileobj``, one line per clause.
+    """
+    for var in solver.variables:
+        if '\n' in var.name:
+            raise ValueError('Cannot write variable name %r' % var.name)
+        fileobj.write('%s%d %s\n' % (_VARIABLE_COMMENT, solver.get_index(var), var.name))
+    fileobj.write('p cnf %d %d\n' % (solver.num_indices, len(solver.clauses)))
+    for clause in solver.clauses:
+        fileobj.write(' '.join(['%d' % literal for literal in clause] + ['0\n']))
+
+
+def to_dimacs(expr, fileobj, tseitin=False, simplify=True):
+    """
+    Encodes ``expr`` as clauses, as ``solve_SAT`` would, and writes them to ``fileobj``.
+    With ``tseitin=True`` the clauses are encoded directly as lists of variable numbers,
+    while otherwise the conversion to conjunctive normal form builds an Or node for each
+    clause. The clauses are kept in memory until they are all encoded, since the
+    problem line which precedes them gives their number.
+    """
+    write_dimacs(Solver(expr, tseitin=tseitin, simplify=simplify), fileobj)
+
+
+def _read_header(lines):
+    """
+    Reads the comments and problem line before the first clause of DIMACS ``lines``.
+    Returns the named variables, the number of variables, and the first clause line.
+    """
+    names = {}
+    num_indices = 0
+    for line in lines:
+        if line.startswith(_VARIABLE_COMMENT):
+            index, name = line[len(_VARIABLE_COMMENT):].rstrip('\r\n').split(' ', 1)
+            names[int(index)] = name
+        elif line.startswith('p'):
+            num_indices = int(line.split()[2])
+        elif not line.startswith('c'):
+            return names, num_indices, line
+    return names, num_indices, ''
+
+
+def _iter_clauses(lines):
+    """
+    Yields the clauses of DIMACS ``lines`` as lists of literals. Clauses may span lines,
+    and end at a 0.
+    """
+    clause = []
+    for line in lines:
+        if line.startswith('c'):
+            continue
+        elif line.startswith('%'):
+            # The end marker of the SATLIB benchmarks.
+            break
+        for literal in map(int, line.split()):
+            if literal:
+                clause.append(literal)
+            else:
+                yield clause
+                clause = []
+    if clause:
+        yield clause
+
+
+def from_dimacs(fileobj, tseitin=False, simplify=True, budget=None):
+    """
+    Returns a ``Solver`` for the clauses read from ``fileobj``, which are streamed into
+    the solver without building expressions. More constraints can be added to it, and
+    ``tseitin``, ``simplify`` and ``budget`` apply to them as for ``Solver``.
+    """
+    lines = iter(fileobj)
+    names, num_indices, first_line = _read_header(lines)
+    if names:
+        # Numbers without a name are auxiliary variables, e.g. from a Tseitin encoding.
+        variables = {index: Var(name) for index, name in names.items()}
+    else:
+        variables = {index: Var('x%d' % index) for index in range(1, num_indices + 1)}
+    clauses = _iter_clauses(itertools.chain([first_line], lines))
+    return Solver.from_clauses(
+        clauses, variables, tseitin=tseitin, simplify=simplify, budget=budget)
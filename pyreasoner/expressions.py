@@ -1,22 +1,33 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import abc
+import collections
 import itertools
 import operator
 import re
+import time
 import typing  # noqa
+import weakref
 from functools import reduce
 from itertools import chain
 
 import pycosat
 
+import six
 from six import with_metaclass
 
+from .utils import cached_property
 from .utils import is_valid_identifier_for_namedtuple
 
 
+def _is_arena(expr):
+    # Arenas (see ``pyreasoner.arena``) provide the same evaluation and analysis as
+    # nodes, without constructing them.
+    return getattr(type(expr), 'is_arena', False)
+
+
 def eval_expr(expr, namespace):
-    if isinstance(expr, ExpressionNode):
+    if isinstance(expr, ExpressionNode) or _is_arena(expr):
         return expr.eval(namespace)
     else:
         return expr
@@ -29,6 +40,141 @@ def reify_expr(expr, namespace):
         return expr
 
 
+def _is_substituted(var, namespace):
+    """
+    Returns whether ``Var.reify`` replaces ``var`` with a value from ``namespace``.
+    """
+    if isinstance(namespace, dict):
+        return var in namespace or var.name in namespace
+    return hasattr(namespace, var.name)
+
+
+def _get_substituted_variables(free_variables, namespace):
+    """
+    Returns the variables of ``free_variables`` which are substituted in ``namespace``.
+    """
+    if isinstance(namespace, dict) and len(namespace) < len(free_variables):
+        # Looks up the keys of small namespaces, rather than every variable.
+        keys = [
+            key if isinstance(key, Var) else Var(key) for key in namespace
+            if isinstance(key, Var) or (
+                isinstance(key, six.string_types) and is_valid_identifier_for_namedtuple(key))]
+        return free_variables.intersection(keys)
+    return frozenset(var for var in free_variables if _is_substituted(var, namespace))
+
+
+def reify_many(expr, namespaces):
+    """
+    Returns ``reify_expr(expr, namespace)`` for each of ``namespaces``.
+
+    Only the nodes which contain substituted variables are visited, and they are found
+    once for the whole batch. Subexpressions whose variables are not substituted, or
+    whose children are all unchanged, are returned by identity rather than rebuilt.
+    """
+    namespaces = list(namespaces)
+    if not isinstance(expr, ExpressionNode):
+        return [expr] * len(namespaces)
+    free_variables = get_free_variables(expr)
+    substituted = [
+        _get_substituted_variables(free_variables, namespace) for namespace in namespaces]
+    any_substituted = frozenset().union(*substituted)
+
+    # The nodes containing any substituted variable, children first.
+    nodes = []
+
+    def add_node(node, results):
+        if not any_substituted.isdisjoint(get_free_variables(node)):
+            nodes.append(node)
+
+    fold_expr(expr, add_node, lambda node: (
+        () if any_substituted.isdisjoint(get_free_variables(node)) else _get_children(node)))
+
+    results = []
+    for namespace, replaced in zip(namespaces, substituted):
+        reified = {}
+        for node in nodes:
+            if replaced.isdisjoint(get_free_variables(node)):
+                continue
+            elif isinstance(node, Var):
+                reified[node] = node.reify(namespace)
+                continue
+            children = [
+                reified.get(child, child) if isinstance(type(child), _InterningMeta) else child
+                for child in node.children]
+            if all(map(operator.is_, children, node.children)):
+                reified[node] = node
+            else:
+                reified[node] = type(node)(*children)
+        results.append(reified.get(expr, expr))
+    return results
+
+
+def _get_children(node):
+    return getattr(node, 'children', ())
+
+
+def fold_expr(expr, combine, get_children=_get_children):
+    """
+    Returns ``combine(node, results)`` for the root of ``expr``, where ``results`` are
+    the results for the node's children, computed the same way. Children which are not
+    expression nodes are passed through unchanged.
+
+    The traversal uses an explicit stack rather than recursion, so it works for
+    arbitrarily deep expressions, and ``combine`` is called once per distinct node.
+    ``get_children`` can be given to stop the traversal early at some nodes.
+    """
+    if not isinstance(expr, ExpressionNode):
+        return expr
+    # Checking the metaclass of children avoids the slower ABCMeta instance check.
+    results = {}
+    stack = [expr]
+    while stack:
+        node = stack[-1]
+        if node in results:
+            stack.pop()
+            continue
+        children = get_children(node)
+        pending = [
+            child for child in children
+            if isinstance(type(child), _InterningMeta) and child not in results]
+        if pending:
+            stack.extend(reversed(pending))
+        else:
+            stack.pop()
+            results[node] = combine(node, [
+                results[child] if isinstance(type(child), _InterningMeta) else child
+                for child in children])
+    return results[expr]
+
+
+def _get_operation_children(node):
+    return [child for child in node.children if isinstance(child, Operation)]
+
+
+def _compute_cached(node, name, compute, get_dependencies=_get_operation_children):
+    """
+    Returns ``compute(node)`` and caches it as the attribute ``name``, first doing the
+    same for the nodes it depends on, in post-order and without recursion. ``compute``
+    can then read the cached attribute of its dependencies without recursing.
+    """
+    stack = [node]
+    # Dependencies may only be referenced from the interning table, so are kept alive
+    # until their dependents have been computed.
+    computed = []
+    while stack:
+        top = stack[-1]
+        if hasattr(top, name):
+            stack.pop()
+            continue
+        pending = [dep for dep in get_dependencies(top) if not hasattr(dep, name)]
+        if pending:
+            stack.extend(pending)
+        else:
+            setattr(top, name, compute(top))
+            computed.append(stack.pop())
+    return getattr(node, name)
+
+
 def variables(names):
     if not isinstance(names, (list, tuple)):
         names = re.split(r'[, ]+', names)
@@ -47,54 +193,171 @@ def is_disjunction_of_atoms(expr):
 
 
 def is_conjunctive_normal_form(expr):
-    if is_boolean_atom(expr):
-        return True
-    return is_disjunction_of_atoms(expr) or (
-        isinstance(expr, And) and
-        all(is_disjunction_of_atoms(child) for child in expr.children)
-    )
+    if isinstance(expr, ExpressionNode):
+        return expr.is_conjunctive_normal_form
+    return is_boolean_atom(expr)
 
 
-def _convert_to_conjunctive_normal_form(expr):
+def _convert_to_conjunctive_normal_form(expr, check_budget=None):
     """
     Dumb conjunctive normal form algorithm based off this algorithm:
     https://april.eecs.umich.edu/courses/eecs492_w10/wiki/images/6/6b/CNF_conversion.pdf
 
+    Returns the clauses in order. Subexpressions still to be converted are kept on a
+    stack, so the conversion does not recurse. If given, ``check_budget`` is called
+    with the number of clauses so far at each step, and can raise to stop the conversion.
+
     TODO: Include some of the optimizations in http://cs.jhu.edu/~jason/tutorials/convert-to-CNF
     (at least for SAT solving).
     """
-    if is_disjunction_of_atoms(expr):
-        return expr
-    elif isinstance(expr, Not):
-        return _convert_to_conjunctive_normal_form(expr.distribute_inwards())
-    elif isinstance(expr, Or):
-        collapsed = expr.recursive_collapse()
-        if is_disjunction_of_atoms(collapsed):
-            return collapsed
-        for i, child in enumerate(collapsed.children):
-            if isinstance(child, And):
-                other_disjuncts = Or(*chain(collapsed.children[:i], collapsed.children[i + 1:]))
-                result = _convert_to_conjunctive_normal_form(
-                    And(*(descendant | other_disjuncts for descendant in child.children)))
-                return result
-
-        # This would indicate a bug in recursive_collapse or is_disjunction_of_atoms.
-        assert False, 'Bug: Should be unreachable: %r' % expr
-    elif isinstance(expr, And):
-        return reduce(
-            operator.and_,
-            (_convert_to_conjunctive_normal_form(child) for child in expr.children),
-            And())
-    else:  # pragma: no cover
-        assert False, 'Unhandled: %r' % expr
+    clauses = []
+    stack = [expr]
+    while stack:
+        if check_budget is not None:
+            check_budget(len(clauses))
+        expr = stack.pop()
+        if is_disjunction_of_atoms(expr):
+            clauses.append(expr)
+        elif isinstance(expr, Not):
+            distributed = expr.distribute_inwards()
+            if distributed is expr:
+                # The negation of a relation or a non-boolean constant.
+                raise TypeError('Cannot encode non-boolean expression %r' % expr)
+            stack.append(distributed)
+        elif isinstance(expr, Or):
+            stack.append(_distribute_disjunction(expr))
+        elif isinstance(expr, And):
+            stack.extend(reversed(expr.children))
+        else:
+            raise TypeError('Cannot encode non-boolean expression %r' % expr)
+    return clauses
+
+
+def _distribute_disjunction(expr):
+    """
+    Returns a disjunction of atoms, or an And of disjunctions equivalent to ``expr``.
+    """
+    collapsed = expr.recursive_collapse()
+    if is_disjunction_of_atoms(collapsed):
+        return collapsed
+    for i, child in enumerate(collapsed.children):
+        if isinstance(child, And):
+            other_disjuncts = Or(*chain(collapsed.children[:i], collapsed.children[i + 1:]))
+            return And(*(descendant | other_disjuncts for descendant in child.children))
+
+    # This would indicate a bug in recursive_collapse or is_disjunction_of_atoms.
+    assert False, 'Bug: Should be unreachable: %r' % expr
+
+
+def _convert_to_tseitin_normal_form(expr):
+    """
+    Tseitin transformation: https://en.wikipedia.org/wiki/Tseitin_transformation
+
+    Every And/Or subexpression is replaced by an auxiliary variable named
+    ``TSEITIN_<n>`` which is constrained to be equivalent to it, so the result
+    grows linearly in the size of ``expr`` rather than exponentially. The result is
+    equisatisfiable with ``expr``, not logically equivalent to it. Since each
+    auxiliary variable is determined by the variables of ``expr``, every model of
+    ``expr`` extends to exactly one model of the result.
+    """
+    return Solver(expr, tseitin=True).to_conjunctive_normal_form()
+
+
+def convert_to_conjunctive_normal_form(expr, tseitin=False):
+    """
+    Returns an And node in conjunctive normal form.
+
+    By default the result is logically equivalent to ``expr``, but may be exponentially
+    larger. If ``tseitin`` is True, the result is instead an equisatisfiable expression
+    of linear size which includes auxiliary ``TSEITIN_<n>`` variables.
+    """
+    if _is_arena(expr):
+        return expr.to_conjunctive_normal_form(tseitin)
+    elif tseitin:
+        return _convert_to_tseitin_normal_form(expr)
+    return And(*_convert_to_conjunctive_normal_form(expr))
+
+
+# Assignment classes are shared between expressions with the same free variables.
+_assignment_classes = weakref.WeakValueDictionary()
+
+
+def _get_assignment_class_for_names(names):
+    names = tuple(names)
+    assignment_class = _assignment_classes.get(names)
+    if assignment_class is None:
+        assignment_class = typing.NamedTuple('Assignment', [(name, bool) for name in names])
+        # The classes are created dynamically, so cannot be pickled by reference.
+        assignment_class.__reduce__ = _reduce_assignment
+        assignment_class = _assignment_classes.setdefault(names, assignment_class)
+    return assignment_class
 
 
-def convert_to_conjunctive_normal_form(expr):
-    # Hack handle the boolean literal case so the return value is always an And node.
-    return And() & _convert_to_conjunctive_normal_form(expr)
+def _reduce_assignment(assignment):
+    return _make_assignment, (assignment._fields, tuple(assignment))
 
 
-class ExpressionNode(with_metaclass(abc.ABCMeta)):
+def _make_assignment(names, values):
+    return _get_assignment_class_for_names(names)(*values)
+
+
+# Maps interning keys to weak references to the unique live node with that structure.
+# This is a plain dict rather than a WeakValueDictionary, whose python level methods
+# dominate the cost of constructing nodes.
+_interned_nodes = {}
+
+
+def _remove_interned_node(ref):
+    # The key may already refer to a new node, if the old one was replaced after it died.
+    if _interned_nodes.get(ref.key) is ref:
+        del _interned_nodes[ref.key]
+
+
+def _get_child_key(child):
+    # Checking the metaclass avoids the slower ABCMeta instance check.
+    if isinstance(type(child), _InterningMeta):
+        return child
+    try:
+        hash(child)
+    except TypeError:
+        # Unhashable constants (e.g. lists) are compared by identity.
+        return (None, id(child))
+    # Include the type, since constants like True, 1 and 1.0 compare equal.
+    return (type(child), child)
+
+
+class _InterningMeta(abc.ABCMeta):
+    """
+    Hash-conses expression nodes, so constructing a node which is structurally
+    identical to a live node returns that node instead of a copy.
+
+    Since the children of a node are interned before the node itself, the interning
+    key only needs to be hashed and compared one level deep. Equal nodes are
+    identical, so nodes use the default identity-based ``__eq__`` and ``__hash__``.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        key = cls._get_interning_key(*args, **kwargs)
+        if key is None:
+            return super(_InterningMeta, cls).__call__(*args, **kwargs)
+        ref = _interned_nodes.get(key)
+        node = None if ref is None else ref()
+        if node is None:
+            node = super(_InterningMeta, cls).__call__(*args, **kwargs)
+            _interned_nodes[key] = weakref.KeyedRef(node, _remove_interned_node, key)
+        return node
+
+
+class ExpressionNode(with_metaclass(_InterningMeta)):
+    # Nodes are slotted, since there can be very many of them. Cached values are stored
+    # in underscored slots (see ``cached_property``), and nodes are weakly referenced
+    # from the interning table.
+    __slots__ = ('__weakref__', '_is_conjunctive_normal_form', '_assignment_class', '_compiled')
+
+    @classmethod
+    @abc.abstractmethod
+    def _get_interning_key(cls, *args, **kwargs):  # pragma: no cover
+        raise NotImplementedError
 
     @abc.abstractmethod
     def eval(self, namespace=None, **kwargs):  # pragma: no cover
@@ -108,13 +371,51 @@ class ExpressionNode(with_metaclass(abc.ABCMeta)):
     def free_variables(self):  # pragma: no cover
         raise NotImplementedError
 
-    @property
+    @abc.abstractproperty
+    def depth(self):  # pragma: no cover
+        raise NotImplementedError
+
+    @abc.abstractproperty
+    def node_count(self):  # pragma: no cover
+        raise NotImplementedError
+
+    @cached_property
+    def is_conjunctive_normal_form(self):
+        return is_disjunction_of_atoms(self) or (
+            isinstance(self, And) and
+            all(is_disjunction_of_atoms(child) for child in self.children)
+        )
+
+    @cached_property
     def assignment_class(self):
-        if not hasattr(self, '_assignment_class'):
-            self._assignment_class = typing.NamedTuple(
-                'Assignment', sorted((var.name, bool) for var in self.free_variables))
+        return _get_assignment_class_for_names(sorted(var.name for var in self.free_variables))
+
+    def compile(self):
+        """
+        Returns a python function which evaluates this expression.
+
+        The arguments of the function are the free variables of the expression in
+        alphabetical order (the field order of ``assignment_class``), and may be
+        passed positionally or as keywords. Unlike ``eval``, every variable must be
+        given a value. And/Or short-circuit, so for non-boolean values the result may
+        differ from ``eval``, which uses the bitwise &/| operators.
+
+        The function is cached on the node.
+        """
+        if not hasattr(self, '_compiled'):
+            self._compiled = _compile(self)
+        return self._compiled
+
+    def __setattr__(self, name, value):
+        # Nodes are shared between expressions, so their structure cannot change once set.
+        # Underscored attributes are used for caches.
+        if not name.startswith('_') and hasattr(self, name):
+            raise AttributeError('Cannot reassign %r of immutable %r' % (name, self))
+        super(ExpressionNode, self).__setattr__(name, value)
 
-        return self._assignment_class
+    def __reduce__(self):
+        # Unpickling goes through the constructor, so the result is interned.
+        return type(self), self.children
 
     def __or__(self, other):
         return Or(self, other)
@@ -133,6 +434,7 @@ class ExpressionNode(with_metaclass(abc.ABCMeta)):
 
 
 class Var(ExpressionNode):
+    __slots__ = ('name', '_free_variables')
 
     def __init__(self, name=None):
         if name is None:
@@ -141,6 +443,11 @@ class Var(ExpressionNode):
             raise ValueError('%r is an invalid identifier' % name)
         self.name = name
 
+    @classmethod
+    def _get_interning_key(cls, name=None):
+        # Anonymous variables are unique, so do not need to be interned.
+        return None if name is None else (cls, name)
+
     def reify(self, namespace=None, **kwargs):
         """
         Replace with the assignment in ``namespace``.
@@ -171,17 +478,20 @@ class Var(ExpressionNode):
             return reified.eval(namespace)
         return reified
 
-    @property
+    @cached_property
     def free_variables(self):
-        return {self}
+        return frozenset([self])
+
+    depth = 1
+    node_count = 1
 
     def __str__(self):
         return self.name
 
     __repr__ = __str__
 
-    def __hash__(self):
-        return hash(self.name)
+    def __reduce__(self):
+        return Var, (self.name, )
 
     def __lt__(self, other):
         return LessThan(self, other)
@@ -189,48 +499,93 @@ class Var(ExpressionNode):
     def __gt__(self, other):
         return LessThan(other, self)
 
-    def __eq__(self, other):
-        return isinstance(other, Var) and self.name == other.name
-
 
 class Operation(ExpressionNode):
+    __slots__ = ('children', '_free_variables', '_depth', '_node_count')
+
     def __init__(self, *children):
         self.children = children
 
-    @property
+    @classmethod
+    def _get_interning_key(cls, *children):
+        return (cls, ) + tuple(map(_get_child_key, children))
+
+    # The cached properties are computed for descendants first, so the computation
+    # never recurses more than one level.
+    @cached_property
     def free_variables(self):
-        # operator.or_ is the set union operation.
-        return reduce(operator.or_, (get_free_variables(child) for child in self.children))
+        return _compute_cached(self, '_free_variables', lambda node: frozenset().union(
+            *(get_free_variables(child) for child in node.children)))
+
+    @cached_property
+    def depth(self):
+        """
+        The number of nodes on the longest path from this node to a leaf.
+        Constants count as leaves.
+        """
+        return _compute_cached(self, '_depth', lambda node: 1 + max(
+            [get_depth(child) for child in node.children] or [0]))
+
+    @cached_property
+    def node_count(self):
+        """
+        The number of nodes in the expression tree, including constants. Shared
+        subexpressions are counted once for each occurrence.
+        """
+        return _compute_cached(self, '_node_count', lambda node: 1 + sum(
+            get_node_count(child) for child in node.children))
 
     def reify(self, namespace=None, **kwargs):
         if namespace is not None and kwargs:
             raise ValueError('Cannot specify both namespace and kwargs')
         namespace = namespace or kwargs
-        reified = [reify_expr(child, namespace) for child in self.children]
-        return type(self)(*reified)
+        return reify_many(self, [namespace])[0]
 
     def eval(self, namespace=None, **kwargs):
         if namespace is not None and kwargs:
             raise ValueError('Cannot specify both namespace and kwargs')
         namespace = namespace or kwargs
-        evaluated = [eval_expr(child, namespace) for child in self.children]
+        return fold_expr(self, lambda node, evaluated: (
+            node.eval(namespace) if isinstance(node, Var) else node._apply(evaluated)))
+
+    def _apply(self, evaluated):
+        """
+        Returns the value of this node given the values of its children.
+        """
         if hasattr(self, 'default_reduce_value'):
             return reduce(self.operator, evaluated, self.default_reduce_value)
         else:
             return reduce(self.operator, evaluated)
 
-    def __eq__(self, other):
-        return type(self) == type(other) and self.children == other.children
+    def __str__(self):
+        # Built from a stack of pieces rather than recursively, so deep expressions
+        # can be printed.
+        pieces = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Operation):
+                stack.extend(reversed(item._get_string_pieces()))
+            else:
+                pieces.append(str(item))
+        return ''.join(pieces)
+
+    __repr__ = __str__
+
+    def _get_string_pieces(self):
+        """
+        Returns the strings and children which make up the string of this node.
+        """
+        return ['%s(' % type(self).__name__] + _interleave(self.children, ', ') + [')']
 
 
 class Or(Operation):
+    __slots__ = ('_collapsed', )
     operator = operator.or_
     default_reduce_value = False  # An empty disjunction is defined to be True.
 
-    def __str__(self):
-        return '(%s)' % ' | '.join(str(child) for child in self.children)
-
-    __repr__ = __str__
+    def _get_string_pieces(self):
+        return ['('] + _interleave(self.children, ' | ') + [')']
 
     def __or__(self, other):
         if isinstance(other, Or):
@@ -245,25 +600,33 @@ class Or(Operation):
         """
         Returns an Or node whose Or children have been promoted to the top level
         """
+        if not hasattr(self, '_collapsed'):
+            self._collapsed = self._recursive_collapse()
+        return self._collapsed
+
+    def _recursive_collapse(self):
+        # Nested Ors are flattened with an explicit stack, so only this node's result
+        # is cached and the work is linear in the size of the expression.
         children = []
-        for child in self.children:
-            if isinstance(child, Not):
-                child = child.distribute_inwards()
-            if isinstance(child, Or):
-                children.extend(child.recursive_collapse().children)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Not):
+                node = node.distribute_inwards()
+            if isinstance(node, Or):
+                stack.extend(reversed(node.children))
             else:
-                children.append(child)
+                children.append(node)
         return Or(*children)
 
 
 class And(Operation):
+    __slots__ = ()
     operator = operator.and_
     default_reduce_value = True  # An empty conjunction is defined to be False.
 
-    def __str__(self):
-        return '(%s)' % ' & '.join(str(child) for child in self.children)
-
-    __repr__ = __str__
+    def _get_string_pieces(self):
+        return ['('] + _interleave(self.children, ' & ') + [')']
 
     def __and__(self, other):
         if isinstance(other, And):
@@ -276,14 +639,13 @@ class And(Operation):
 
 
 class Not(Operation):
+    __slots__ = ('_distributed', )
+
     def __init__(self, child):
         self.children = (child, )
 
-    def eval(self, namespace=None, **kwargs):
-        if namespace is not None and kwargs:
-            raise ValueError('Cannot specify both namespace and kwargs')
-        namespace = namespace or kwargs
-        evaluated = eval_expr(self.children[0], namespace)
+    def _apply(self, evaluated):
+        evaluated, = evaluated
         if isinstance(evaluated, ExpressionNode):
             return ~evaluated
         elif isinstance(evaluated, bool):
@@ -291,14 +653,25 @@ class Not(Operation):
         else:  # pragma: no cover
             raise TypeError(evaluated)
 
-    def __str__(self):
+    def _get_string_pieces(self):
         if isinstance(self.children[0], bool):
-            return 'Not(%s)' % self.children[0]
-        return '~%s' % self.children[0]
-
-    __repr__ = __str__
+            return ['Not(', self.children[0], ')']
+        return ['~', self.children[0]]
 
     def distribute_inwards(self):
+        return _compute_cached(
+            self, '_distributed', Not._distribute_inwards, Not._get_distribution_dependencies)
+
+    def _get_distribution_dependencies(self):
+        child = self.children[0]
+        if isinstance(child, Not):
+            grandchild = child.children[0]
+            return [grandchild] if isinstance(grandchild, Not) else []
+        elif isinstance(child, (And, Or)):
+            return [Not(descendant) for descendant in child.children]
+        return []
+
+    def _distribute_inwards(self):
         child = self.children[0]
         if isinstance(child, bool):
             return not child
@@ -319,30 +692,169 @@ class Not(Operation):
 
 
 class BinaryExpression(Operation):
+    __slots__ = ()
     operation_name = None
 
     def __init__(self, lhs, rhs):
-        self.children = self.lhs, self.rhs = [lhs, rhs]
+        self.children = (lhs, rhs)
 
-    def __repr__(self):
-        return '(%s %s %s)' % (self.lhs, self.operation_name, self.rhs)
+    @property
+    def lhs(self):
+        return self.children[0]
+
+    @property
+    def rhs(self):
+        return self.children[1]
+
+    def _get_string_pieces(self):
+        return ['(', self.lhs, ' %s ' % self.operation_name, self.rhs, ')']
 
 
 class LessThan(BinaryExpression):
+    __slots__ = ()
     operation_name = '<'
     operator = operator.lt
 
 
 class Eq(BinaryExpression):
+    __slots__ = ()
     operation_name = '=='
     operator = operator.eq
 
 
+def _interleave(items, separator):
+    pieces = []
+    for item in items:
+        pieces.extend((item, separator))
+    return pieces[:-1]
+
+
+# Subexpressions nested deeper than this are split out into separate functions, to stay
+# within the limits of the python compiler.
+MAX_COMPILED_EXPRESSION_DEPTH = 50
+
+# Python before 3.7 does not allow functions with more than 255 arguments, so functions
+# of more variables are passed a dict of their values instead.
+MAX_COMPILED_ARGUMENTS = 255
+
+
+def _count_references(expr):
+    references = collections.Counter()
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        references[node] += 1
+        if references[node] == 1 and isinstance(node, Operation):
+            stack.extend(child for child in node.children if isinstance(child, Operation))
+    return references
+
+
+def _get_operation_source(node, children):
+    if isinstance(node, Not):
+        return '(not %s)' % children[0]
+    elif isinstance(node, And):
+        return '(%s)' % ' and '.join(children) if children else 'True'
+    elif isinstance(node, Or):
+        return '(%s)' % ' or '.join(children) if children else 'False'
+    elif isinstance(node, BinaryExpression):
+        return '(%s %s %s)' % (children[0], node.operation_name, children[1])
+    else:  # pragma: no cover
+        raise TypeError('Cannot compile %r' % node)
+
+
+def _compile(expr):
+    """
+    Generates python source for a function which evaluates ``expr``, and compiles it.
+
+    Subexpressions which occur more than once are split out into nested functions,
+    so the size of the source is linear in the number of distinct nodes. So are
+    subexpressions whose source would be nested too deeply.
+    """
+    references = _count_references(expr)
+    namespace = {}
+    helpers = []
+
+    def get_constant_source(value):
+        if isinstance(value, bool):
+            return repr(value)
+        name = '_c%s' % len(namespace)
+        namespace[name] = value
+        return name
+
+    def get_source(node, results):
+        # Returns the source of the node, and how deeply nested it is.
+        if isinstance(node, Var):
+            return node.name, 0
+        children = [
+            result if isinstance(child, ExpressionNode) else (get_constant_source(child), 0)
+            for child, result in zip(node.children, results)]
+        source = _get_operation_source(node, [source for source, _ in children])
+        depth = 1 + max([depth for _, depth in children] or [0])
+        if references[node] > 1 or depth >= MAX_COMPILED_EXPRESSION_DEPTH:
+            name = '_f%s' % len(helpers)
+            helpers.append('    def %s():\n        return %s\n' % (name, source))
+            return '%s()' % name, 0
+        return source, depth
+
+    body, _ = fold_expr(expr, get_source)
+    arg_names = sorted(var.name for var in get_free_variables(expr))
+    if len(arg_names) <= MAX_COMPILED_ARGUMENTS:
+        parameters, assignments = ', '.join(arg_names), []
+    else:
+        # Names of variables cannot start with an underscore, so cannot clash.
+        parameters = '_values'
+        assignments = ['    %s = _values[%r]\n' % (name, name) for name in arg_names]
+    source = 'def evaluate(%s):\n%s%s    return %s\n' % (
+        parameters, ''.join(assignments), ''.join(helpers), body)
+    six.exec_(compile(source, '<compiled %s>' % type(expr).__name__, 'exec'), namespace)
+    if assignments:
+        return _pass_arguments_as_dict(namespace['evaluate'], arg_names)
+    return namespace['evaluate']
+
+
+def _pass_arguments_as_dict(evaluate, arg_names):
+    """
+    Returns a function which takes the arguments ``arg_names`` positionally or as
+    keywords, and calls ``evaluate`` with the {name: value} dict of them.
+    """
+    known_names = frozenset(arg_names)
+
+    def evaluate_arguments(*args, **kwargs):
+        if len(args) > len(arg_names):
+            raise TypeError('evaluate() takes %s arguments (%s given)' % (
+                len(arg_names), len(args)))
+        values = dict(zip(arg_names, args))
+        for name, value in kwargs.items():
+            if name not in known_names or name in values:
+                raise TypeError('evaluate() got an unexpected or repeated argument %r' % name)
+            values[name] = value
+        if len(values) < len(arg_names):
+            missing = sorted(known_names.difference(values))
+            raise TypeError('evaluate() is missing arguments %s' % ', '.join(missing))
+        return evaluate(values)
+
+    return evaluate_arguments
+
+
 def get_free_variables(expr):
-    if hasattr(expr, 'free_variables'):
+    if isinstance(expr, ExpressionNode) or _is_arena(expr):
         return expr.free_variables
     else:
-        return set()
+        return frozenset()
+
+
+def get_depth(expr):
+    if isinstance(expr, ExpressionNode) or _is_arena(expr):
+        return expr.depth
+    else:
+        return 1
+
+
+def get_node_count(expr):
+    if isinstance(expr, ExpressionNode) or _is_arena(expr):
+        return expr.node_count
+    else:
+        return 1
 
 
 EmptyAssignment = typing.NamedTuple('EmptyAssignment', [])
@@ -355,6 +867,15 @@ def get_assignment_class(expr):
         return EmptyAssignment
 
 
+def get_assignment_class_for_variables(variables):
+    """
+    Returns the assignment class whose fields are the names of ``variables`` in
+    alphabetical order. This is the same class as ``expr.assignment_class`` for any
+    expression with those free variables.
+    """
+    return _get_assignment_class_for_names(sorted(var.name for var in variables))
+
+
 def get_truth_table(expr):
     """
     Returns a ``{var_assignment: truth_value}`` dict representing the truth_table for the
@@ -362,84 +883,779 @@ def get_truth_table(expr):
 
     ``var_assignment`` is a namedtuple, whose attributes are alphabetically ordered variables
     of all the free variables in ``expr``.
+
+    See ``pyreasoner.truth_tables.get_packed_truth_table`` for a more compact representation.
     """
-    AssignmentClass = get_assignment_class(expr)
-    bools = [True, False]
-    assignments = itertools.starmap(
-        AssignmentClass, itertools.product(*([bools] * len(AssignmentClass._fields))))
-    return {
-        assignment: eval_expr(expr, assignment._asdict()) for assignment in assignments
-    }
+    # Imported here to avoid a circular import.
+    from .truth_tables import get_packed_truth_table
+    return get_packed_truth_table(expr).to_dict()
+
+
+# Below this many free variables, checking equivalence with a packed truth table is faster
+# than SAT solving.
+MAX_TRUTH_TABLE_EQUIVALENCE_VARIABLES = 16
+
+
+def find_counterexample(expr1, expr2):
+    """
+    Returns an assignment to the free variables of ``expr1`` and ``expr2`` under which
+    they have different truth values, or None if they are logically equivalent.
+
+    For all but the smallest expressions, this is done by checking the satisfiability
+    of their exclusive or (a "miter"), which avoids enumerating every assignment.
+    Relational expressions like ``Eq`` cannot be SAT solved, so expressions containing
+    them are always compared by their truth tables.
+    """
+    miter = Or(And(expr1, Not(expr2)), And(Not(expr1), expr2))
+    is_boolean = not any(
+        isinstance(node, BinaryExpression) for node in _count_references(miter))
+    if (not is_boolean or
+            len(get_free_variables(miter)) <= MAX_TRUTH_TABLE_EQUIVALENCE_VARIABLES):
+        from .truth_tables import get_packed_truth_table
+        return next(get_packed_truth_table(miter).iter_solutions(), None)
+    return next(solve_SAT(miter, 1, tseitin=True), None)
 
 
 def is_logically_equivalent(expr1, expr2):
-    return get_truth_table(expr1) == get_truth_table(expr2)
+    """
+    Returns True if ``expr1`` and ``expr2`` have the same truth value under every
+    assignment. Variables which only occur in one of the expressions are included,
+    so for example ``a | ~a`` is equivalent to ``True``.
+    """
+    return find_counterexample(expr1, expr2) is None
+
+
+def _negate_literal(literal):
+    return (not literal) if isinstance(literal, bool) else -literal
 
 
-def solve_SAT(expr, num_solutions=None):
+class SolverBudgetExceeded(Exception):
     """
-    Returns a iterator of {var: truth value} assignments which satisfy the given
-    expression.
+    Raised when encoding or solving exceeds a limit of the solver's ``Budget``.
+    """
+
+
+class Budget(object):
+    """
+    Limits on the work done by a ``Solver``, which raises ``SolverBudgetExceeded`` when
+    one is exceeded. Limits which are None are unlimited.
+
+    ``timeout`` is the wall-clock time in seconds for each query, from when its first
+    solution is requested, and ``prop_limit`` is the maximum number of propagations of
+    each call to pycosat. ``max_clauses`` and ``max_variables`` limit the size of the
+    encoding, and ``conversion_timeout`` is the time in seconds for encoding each
+    constraint, which is checked as the conversion proceeds.
+
+    ``cancelled`` can be a ``threading.Event``, which stops encoding and solving once it
+    is set, e.g. from another thread.
+    """
+
+    def __init__(self, timeout=None, prop_limit=None, max_clauses=None, max_variables=None,
+                 conversion_timeout=None, cancelled=None):
+        self.timeout = timeout
+        self.prop_limit = prop_limit
+        self.max_clauses = max_clauses
+        self.max_variables = max_variables
+        self.conversion_timeout = conversion_timeout
+        self.cancelled = cancelled
+
+
+# The propagation limit of the first call to pycosat when there is only a timeout.
+INITIAL_PROP_LIMIT = 10000
+
+
+def _solve_within_budget(clauses, num_indices, prop_limit, deadline, cancelled):
+    """
+    Returns the next solution of ``clauses``, None if they are unsatisfiable, or raises
+    SolverBudgetExceeded if it takes more than ``prop_limit`` propagations, lasts past
+    the time ``deadline`` or the ``cancelled`` event is set.
+
+    pycosat cannot be interrupted, so for a deadline or cancellation it is restarted
+    with a doubling propagation limit, which for a deadline is also sized by the rate of
+    earlier calls to fit in the remaining time. Cancellation is noticed between calls,
+    so it takes at most about as long as solving has taken so far.
+    """
+    restarts = deadline is not None or cancelled is not None
+    # pycosat treats a limit of 0 as unlimited.
+    limit = prop_limit or (INITIAL_PROP_LIMIT if restarts else 0)
+    while True:
+        start = time.time()
+        if deadline is not None and start >= deadline:
+            raise SolverBudgetExceeded('Timed out')
+        elif cancelled is not None and cancelled.is_set():
+            raise SolverBudgetExceeded('Cancelled')
+        result = pycosat.solve(clauses, vars=num_indices, prop_limit=limit)
+        if result == 'UNSAT':
+            return None
+        elif result != 'UNKNOWN':
+            return result
+        elif not restarts or limit == prop_limit:
+            raise SolverBudgetExceeded('Exceeded %s propagations' % limit)
+        limit *= 2
+        if deadline is not None:
+            now = time.time()
+            rate = limit / 2 / max(now - start, 1e-6)
+            limit = max(1, min(limit, int(rate * (deadline - now))))
+        if prop_limit is not None:
+            limit = min(limit, prop_limit)
+
+
+def _iter_solutions_within_budget(clauses, num_indices, budget):
+    """
+    Like ``pycosat.itersolve``, but raises SolverBudgetExceeded rather than stopping
+    when the budget is exceeded. The timeout applies to the whole iteration. Blocking
+    clauses are appended to the list ``clauses``.
+    """
+    deadline = None if budget.timeout is None else time.time() + budget.timeout
+    while True:
+        solution = _solve_within_budget(
+            clauses, num_indices, budget.prop_limit, deadline, budget.cancelled)
+        if solution is None:
+            return
+        yield solution
+        # Blocks the solution, as itersolve does.
+        clauses.append([-literal for literal in solution])
+
+
+def _get_components(clauses):
+    """
+    Partitions the nonempty clauses into groups which share no variables.
+    """
+    parents = {}
 
-    Expressions should not include a variable named ``TRUE_``, since those
-    are used in the internals of this function as stand-ins for truth literals.
-    """
-    expr = convert_to_conjunctive_normal_form(expr)
-    Assignment = get_assignment_class(expr)
-
-    # Hack to include a True literal (not directly supported by pycosat API).
-    # We add a trivial constraint to the list of constraints, forcing this
-    # variables to be True in any solutions. Note that this is still conjunctive
-    # normal form, since T and F are literals.
-    T = Var('TRUE_')
-    expr = expr & T
-
-    vars = list(get_free_variables(expr))
-
-    # 1-index, since pycosat expects nonzero integers.
-    var2pycosat_index = {v: i + 1 for i, v in enumerate(vars)}
-
-    def get_pycosat_index(literal):
-        # pycosat accepts input as a list of CNF subclauses (disjunctions of variables
-        # or negated variables).
-        if isinstance(literal, Not):
-            return -get_pycosat_index(literal.children[0])
-        elif isinstance(literal, Var):
-            return var2pycosat_index[literal]
-        elif isinstance(literal, ExpressionNode):  # pragma: no cover
-            raise TypeError('Unhandled literal type %r' % literal)
+    def find(var):
+        while parents.setdefault(var, var) != var:
+            parents[var] = parents[parents[var]]
+            var = parents[var]
+        return var
+
+    for clause in clauses:
+        root = find(abs(clause[0]))
+        for literal in clause[1:]:
+            parents[find(abs(literal))] = root
+
+    components = collections.defaultdict(list)
+    for clause in clauses:
+        components[find(abs(clause[0]))].append(clause)
+    return list(components.values())
+
+
+def _solve_component(clauses, num_indices, budget):
+    """
+    Returns the first solution of ``clauses``, or None if they are unsatisfiable.
+    """
+    if budget is None:
+        solution = pycosat.solve(clauses, vars=num_indices)
+        return None if solution == 'UNSAT' else solution
+    return next(_iter_solutions_within_budget(list(clauses), num_indices, budget), None)
+
+
+def _iter_component_solutions(clauses, num_indices, first, budget):
+    """
+    Yields the solution ``first`` of ``clauses``, and then the others.
+    """
+    yield first
+    clauses = clauses + [[-literal for literal in first]]
+    if budget is None:
+        for solution in pycosat.itersolve(clauses, vars=num_indices):
+            yield solution
+    else:
+        for solution in _iter_solutions_within_budget(clauses, num_indices, budget):
+            yield solution
+
+
+class _CachedIterator(object):
+    """
+    A sequence of the items of an iterator, which are consumed as they are indexed.
+    """
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._items = []
+
+    def has_index(self, i):
+        if i >= len(self._items):
+            self._items.extend(itertools.islice(self._iterator, i + 1 - len(self._items)))
+        return i < len(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+
+def _iter_product(iterators):
+    """
+    Like ``itertools.product``, but consumes the iterators as the products are needed,
+    rather than all at once. The last iterator varies fastest.
+    """
+    sequences = [_CachedIterator(iterator) for iterator in iterators]
+    indices = [0] * len(sequences)
+    if not all(sequence.has_index(0) for sequence in sequences):
+        return
+    while True:
+        yield [sequence[i] for sequence, i in zip(sequences, indices)]
+        position = len(indices) - 1
+        while position >= 0:
+            indices[position] += 1
+            if sequences[position].has_index(indices[position]):
+                break
+            indices[position] = 0
+            position -= 1
+        if position < 0:
+            return
+
+
+def _solve_decomposed(clauses, num_indices, budget, executor):
+    """
+    Like ``pycosat.itersolve``, but solves each group of clauses which shares no variables
+    with the others separately, and yields the products of their solutions. Each
+    variable in no clause is a group of its own, with two solutions.
+
+    Returns the iterator of solutions, and the variable numbers of their literals, since
+    each solution is the concatenation of the solutions of the groups. The first
+    solution of each group is found first, in ``executor`` if it is given, so nothing
+    more is solved if any group is unsatisfiable.
+    """
+    if any(not clause for clause in clauses):
+        return iter([]), list(range(1, num_indices + 1))
+    used = set(abs(literal) for clause in clauses for literal in clause)
+
+    # Renumbers the variables of each component from 1, so pycosat does not enumerate
+    # the variables of the other components.
+    renumbered = []
+    components_indices = []
+    for component in _get_components(clauses):
+        indices = sorted(set(abs(literal) for clause in component for literal in clause))
+        local = {index: i for i, index in enumerate(indices, 1)}
+        renumbered.append([
+            [local[literal] if literal > 0 else -local[-literal] for literal in clause]
+            for clause in component])
+        components_indices.append(indices)
+    for index in range(1, num_indices + 1):
+        if index not in used:
+            renumbered.append([])
+            components_indices.append([index])
+    layout = list(chain.from_iterable(components_indices))
+    return _iter_decomposed_solutions(renumbered, components_indices, budget, executor), layout
+
+
+def _iter_decomposed_solutions(components, components_indices, budget, executor):
+    sizes = [len(indices) for indices in components_indices]
+    if executor is None:
+        firsts = (
+            _solve_component(component, size, budget)
+            for component, size in zip(components, sizes))
+    else:
+        firsts = executor.map(_solve_component, components, sizes, [budget] * len(sizes))
+    iterators = []
+    for component, size, first in zip(components, sizes, firsts):
+        if first is None:
+            return
+        iterators.append(_iter_component_solutions(component, size, first, budget))
+
+    for parts in _iter_product(iterators):
+        # The literals keep the numbering of their group, since only their signs are used.
+        yield list(chain.from_iterable(parts))
+
+
+def _iter_solution_arrays(solutions, positions, batch_size):
+    """
+    Yields boolean arrays of up to ``batch_size`` of the pycosat ``solutions``, whose
+    columns are the values of the variables at the 0-based ``positions``.
+    """
+    # Imported here, since expressions does not otherwise need numpy.
+    import numpy
+    positions = numpy.array(positions, dtype=numpy.intp)
+    while True:
+        batch = list(itertools.islice(solutions, batch_size))
+        if not batch:
+            return
+        elif not len(positions):
+            yield numpy.zeros((len(batch), 0), dtype=bool)
         else:
-            # Here we assume this is some other python object, so we consider it
-            # a boolean.
-            return var2pycosat_index[T] if literal else -var2pycosat_index[T]
-
-    constraints = [
-        map(get_pycosat_index,
-            # Child is one of a literal or a disjunction of literals.
-            (child.children if isinstance(child, Or) else [child]))
-        for child in expr.children
-    ]
-
-    solutions = (
-        pycosat.itersolve(constraints)
-        if num_solutions is None else pycosat.itersolve(constraints, num_solutions))
-    for solution in solutions:
-        namespace = {}
-        for i, var_assignment in enumerate(solution):
-            # pycosat returns the solution as a list of positive or negative
-            # 1-indexed variable numbers. Positive indices correspond to assignments
-            # to True, and negative corresponds to False.
-            as_bool = var_assignment > 0
-            var = vars[i]
-            if var == T:
-                assert as_bool, 'Bug: Solution has an invalid solution to the T literal.'
+            # Faster than converting the nested lists with numpy.array.
+            literals = numpy.fromiter(
+                chain.from_iterable(batch), numpy.int64, len(batch) * len(batch[0]))
+            yield literals.reshape(len(batch), -1)[:, positions] > 0
+
+
+def _iter_solution_bitsets(arrays, num_variables):
+    import numpy
+    if num_variables < 64:
+        weights = numpy.uint64(1) << numpy.arange(num_variables, dtype=numpy.uint64)
+    else:
+        # Too many bits for a machine integer.
+        weights = numpy.array([1 << i for i in range(num_variables)], dtype=object)
+    for array in arrays:
+        for bitset in array.astype(weights.dtype).dot(weights).tolist():
+            yield bitset
+
+
+def _iter_projected_solutions(clauses, num_indices, indices, budget, statistics,
+                              count_saved):
+    """
+    Yields solutions of ``clauses`` whose restrictions to the variable numbers
+    ``indices`` are distinct, by blocking only those variables after each solution.
+    """
+    num_clauses = len(clauses)
+    deadline = None
+    if budget is not None and budget.timeout is not None:
+        deadline = time.time() + budget.timeout
+    num_projected = 0
+    while True:
+        statistics['projected_solver_calls'] += 1
+        if budget is None:
+            solution = pycosat.solve(clauses, vars=num_indices)
+            solution = None if solution == 'UNSAT' else solution
+        else:
+            solution = _solve_within_budget(
+                clauses, num_indices, budget.prop_limit, deadline, budget.cancelled)
+        if solution is None:
+            break
+        num_projected += 1
+        yield solution
+        clauses.append([-solution[index - 1] for index in indices])
+
+    if count_saved:
+        # Imported here to avoid a circular import.
+        from .counting import _ModelCounter
+        all_indices = set(range(1, num_indices + 1))
+        counter = _ModelCounter(frozenset(all_indices), 2 ** 16)
+        num_solutions = counter.count(
+            [tuple(clause) for clause in clauses[:num_clauses]], all_indices)
+        # Enumerating every solution takes one call per solution, and a final one.
+        statistics['projected_solver_calls_saved'] += num_solutions - num_projected
+
+
+class Solver(object):
+    """
+    An incremental SAT solving session.
+
+    Constraints are encoded into clauses once, when they are added with ``add``, and
+    the encoding and variable numbering are reused by every later query. ``push`` and
+    ``pop`` delimit scopes of temporary constraints, and ``assumptions`` passed to a
+    query only apply to that query.
+
+    pycosat has no incremental interface, so each query still passes the full clause
+    list to the solver, but expressions are never re-converted to conjunctive normal form.
+
+    If ``tseitin`` is True, constraints are encoded with the Tseitin transformation
+    (see ``convert_to_conjunctive_normal_form``). Auxiliary variables are numbered
+    internally and never appear in solutions, and the encodings of subexpressions
+    shared between constraints are reused.
+
+    If ``simplify`` is True, constraints are simplified with
+    ``pyreasoner.simplify.simplify`` before they are encoded, and subsumed clauses of
+    their conjunctive normal forms are removed. The number of times each simplification
+    applied is counted in ``statistics``.
+
+    If a ``Budget`` is given, adding a constraint or solving raises
+    ``SolverBudgetExceeded`` when it exceeds one of its limits. A constraint which
+    exceeds the budget is not added.
+    """
+
+    def __init__(self, expr=True, tseitin=False, simplify=True, budget=None):
+        self.tseitin = tseitin
+        self.simplify = simplify
+        self.budget = budget
+        self._conversion_deadline = None
+        self.statistics = collections.Counter()
+        # Lists of nonzero integers, in pycosat's format.
+        self.clauses = []
+        # The variables of the constraints, in the order they were numbered.
+        self.variables = []
+        self.num_indices = 0
+        self._var2index = {}
+        # Maps subexpressions to the literal of their Tseitin auxiliary variable.
+        self._encoded = {}
+        self._encoded_order = []
+        self._scopes = []
+        self.add(expr)
+
+    @classmethod
+    def from_clauses(cls, clauses, variables, tseitin=False, simplify=True, budget=None):
+        """
+        Returns a solver for ``clauses``, an iterable of lists of pycosat literals.
+        ``variables`` maps variable numbers to the variables which appear in solutions,
+        and any other numbers used by the clauses are auxiliary variables.
+        ``tseitin``, ``simplify`` and ``budget`` apply to constraints added later, and
+        ``budget`` to solving.
+        """
+        solver = cls(tseitin=tseitin, simplify=simplify, budget=budget)
+        for index, var in sorted(variables.items()):
+            solver.variables.append(var)
+            solver._var2index[var] = index
+        solver.num_indices = max(variables or [0])
+        if budget is None:
+            for clause in clauses:
+                solver._add_clause(clause)
+                solver.num_indices = max(
+                    [solver.num_indices] + [abs(literal) for literal in clause])
+            return solver
+        # Loading the clauses counts as converting them.
+        if budget.conversion_timeout is not None:
+            solver._conversion_deadline = time.time() + budget.conversion_timeout
+        try:
+            solver._check_variable_budget()
+            for clause in clauses:
+                solver._add_clause(clause)
+                solver.num_indices = max(
+                    [solver.num_indices] + [abs(literal) for literal in clause])
+                solver._check_variable_budget()
+                solver._check_conversion_budget()
+        finally:
+            solver._conversion_deadline = None
+        return solver
+
+    def _get_index(self, var):
+        if var not in self._var2index:
+            # The index is taken first, since it can exceed the budget.
+            index = self._new_index()
+            self.variables.append(var)
+            self._var2index[var] = index
+        return self._var2index[var]
+
+    def _new_index(self):
+        # 1-indexed, since pycosat expects nonzero integers.
+        self.num_indices += 1
+        if self.budget is not None:
+            self._check_variable_budget()
+        return self.num_indices
+
+    def _check_variable_budget(self):
+        max_variables = self.budget.max_variables
+        if max_variables is not None and self.num_indices > max_variables:
+            raise SolverBudgetExceeded('Exceeded %s variables' % max_variables)
+
+    def _check_conversion_budget(self, num_new_clauses=0):
+        """
+        Raises SolverBudgetExceeded if the constraint being encoded, which has
+        ``num_new_clauses`` clauses not yet added, exceeds the budget.
+        """
+        max_clauses = self.budget.max_clauses
+        if max_clauses is not None and len(self.clauses) + num_new_clauses > max_clauses:
+            raise SolverBudgetExceeded('Exceeded %s clauses' % max_clauses)
+        elif self._conversion_deadline is not None and time.time() >= self._conversion_deadline:
+            raise SolverBudgetExceeded(
+                'Conversion timed out after %s seconds' % self.budget.conversion_timeout)
+        elif self.budget.cancelled is not None and self.budget.cancelled.is_set():
+            raise SolverBudgetExceeded('Cancelled')
+
+    def _get_literal(self, atom):
+        if not isinstance(atom, ExpressionNode):
+            # Consider other python objects to be truth literals.
+            return bool(atom)
+        elif isinstance(atom, Var):
+            return self._get_index(atom)
+        elif isinstance(atom, Not):
+            return _negate_literal(self._get_literal(atom.children[0]))
+        else:
+            raise TypeError('Cannot encode non-boolean expression %r' % atom)
+
+    def _add_clause(self, literals):
+        """
+        Adds a clause, simplifying out truth literals, duplicate literals and tautologies.
+        """
+        clause = []
+        seen = set()
+        for literal in literals:
+            if literal is True or -literal in seen:
+                return
+            elif literal is not False and literal not in seen:
+                seen.add(literal)
+                clause.append(literal)
+        self.clauses.append(clause)
+
+    def _encode_tseitin(self, expr):
+        """
+        Returns the literal equivalent to ``expr``, adding clauses defining any
+        auxiliary variables it needs.
+        """
+        if not isinstance(expr, ExpressionNode):
+            return self._get_literal(expr)
+
+        def get_children(node):
+            # Atoms and previously encoded subexpressions are not traversed.
+            if is_boolean_atom(node) or node in self._encoded:
+                return ()
+            return node.children
+
+        return fold_expr(expr, self._encode_tseitin_node, get_children)
+
+    def _encode_tseitin_node(self, node, results):
+        if self.budget is not None:
+            self._check_conversion_budget()
+        if is_boolean_atom(node):
+            return self._get_literal(node)
+        elif node in self._encoded:
+            return self._encoded[node]
+        literals = [
+            result if isinstance(child, ExpressionNode) else self._get_literal(child)
+            for child, result in zip(node.children, results)]
+        if isinstance(node, Not):
+            return _negate_literal(literals[0])
+        elif not isinstance(node, (And, Or)):
+            raise TypeError('Cannot encode non-boolean expression %r' % node)
+
+        if isinstance(node, And):
+            # Encode ~(~l_1 | ... | ~l_n), so both cases can share the logic for Or.
+            literal = _negate_literal(self._encode_disjunction(map(_negate_literal, literals)))
+        else:
+            literal = self._encode_disjunction(literals)
+        self._encoded[node] = literal
+        self._encoded_order.append(node)
+        return literal
+
+    def _encode_disjunction(self, literals):
+        literals = [literal for literal in literals if literal is not False]
+        if any(literal is True for literal in literals):
+            return True
+        elif not literals:
+            return False
+        elif len(literals) == 1:
+            return literals[0]
+        aux = self._new_index()
+        # aux <-> (l_1 | ... | l_n)
+        self._add_clause([-aux] + literals)
+        for literal in literals:
+            self._add_clause([aux, -literal])
+        return aux
+
+    def add(self, expr):
+        """
+        Adds ``expr`` as a constraint in the current scope.
+        """
+        if self.budget is None:
+            return self._add(expr)
+        # A scope is used to roll back the constraint if it exceeds the budget.
+        self.push()
+        if self.budget.conversion_timeout is not None:
+            self._conversion_deadline = time.time() + self.budget.conversion_timeout
+        try:
+            self._add(expr)
+        except SolverBudgetExceeded:
+            self.pop()
+            raise
+        else:
+            self._scopes.pop()
+        finally:
+            self._conversion_deadline = None
+
+    def _add(self, expr):
+        # Variables are numbered before simplifying, so variables which are simplified
+        # away are still part of the solutions.
+        for var in sorted(get_free_variables(expr), key=operator.attrgetter('name')):
+            self._get_index(var)
+        if self.simplify:
+            # Imported here to avoid a circular import.
+            from .simplify import remove_subsumed_clauses, simplify
+            expr = simplify(expr, self.statistics)
+        if self.tseitin:
+            self._add_clause([self._encode_tseitin(expr)])
+        else:
+            num_clauses = len(self.clauses)
+            check_budget = None if self.budget is None else self._check_conversion_budget
+            for clause in _convert_to_conjunctive_normal_form(expr, check_budget):
+                self._add_clause(map(
+                    self._get_literal, clause.children if isinstance(clause, Or) else [clause]))
+            if self.simplify:
+                self.clauses[num_clauses:] = remove_subsumed_clauses(
+                    self.clauses[num_clauses:], self.statistics)
+
+    def push(self):
+        """
+        Starts a new scope. Constraints added in the scope are removed by ``pop``.
+        """
+        self._scopes.append((
+            len(self.clauses), len(self.variables), self.num_indices, len(self._encoded_order)))
+
+    def pop(self):
+        """
+        Restores the solver to its state when the matching ``push`` was called.
+        """
+        num_clauses, num_variables, num_indices, num_encoded = self._scopes.pop()
+        del self.clauses[num_clauses:]
+        for var in self.variables[num_variables:]:
+            del self._var2index[var]
+        del self.variables[num_variables:]
+        self.num_indices = num_indices
+        for node in self._encoded_order[num_encoded:]:
+            del self._encoded[node]
+        del self._encoded_order[num_encoded:]
+
+    def get_index(self, var):
+        """
+        Returns the pycosat variable number of ``var``.
+        """
+        return self._var2index[var]
+
+    @property
+    def assignment_class(self):
+        return get_assignment_class_for_variables(self.variables)
+
+    @property
+    def solution_variables(self):
+        """
+        The variables in the order of the fields of solutions (and ``assignment_class``),
+        the columns of ``solve_arrays`` and the bits of ``solve_bitsets``.
+        """
+        return sorted(self.variables, key=operator.attrgetter('name'))
+
+    def _solve_raw(self, num_solutions, assumptions, decompose, executor, project=None,
+                   count_saved=False):
+        """
+        Returns an iterator of solutions as lists of literals, the solution variables
+        (including any from ``assumptions``), and the 0-based positions of their literals
+        in the solutions.
+        """
+        self.push()
+        try:
+            for assumption in assumptions:
+                self.add(assumption)
+            # The index in the solutions of the literal of each variable number.
+            layout = range(1, self.num_indices + 1)
+            if project is not None:
+                if decompose:
+                    raise ValueError('Projected solutions cannot be decomposed')
+                projected = sorted(set(project), key=operator.attrgetter('name'))
+                # Numbers any variables which are not in the constraints.
+                indices = [self._get_index(var) for var in projected]
+                layout = range(1, self.num_indices + 1)
+                solutions = _iter_projected_solutions(
+                    list(self.clauses), self.num_indices, indices, self.budget,
+                    self.statistics, count_saved)
+            elif decompose:
+                solutions, layout = _solve_decomposed(
+                    list(self.clauses), self.num_indices, self.budget, executor)
+            elif self.budget is None:
+                # pycosat copies the clauses when the iterator is created.
+                solutions = pycosat.itersolve(self.clauses, vars=self.num_indices)
             else:
-                namespace[var.name] = as_bool
-        yield Assignment(**namespace)
+                solutions = _iter_solutions_within_budget(
+                    list(self.clauses), self.num_indices, self.budget)
+            variables = self.solution_variables if project is None else projected
+            index_positions = {index: position for position, index in enumerate(layout)}
+            positions = [index_positions[self._var2index[var]] for var in variables]
+        finally:
+            self.pop()
+        if num_solutions is not None:
+            solutions = itertools.islice(solutions, num_solutions)
+        return solutions, variables, positions
+
+    def solve(self, num_solutions=None, assumptions=(), decompose=False, executor=None,
+              project=None, count_saved=False):
+        """
+        Returns an iterator of assignments to ``variables`` which satisfy the
+        constraints and ``assumptions``. Each assignment is yielded once.
+
+        If ``project`` is given, the assignments are only to those variables, and are
+        the distinct restrictions of the solutions to them. Only the projected variables
+        are blocked between calls to the SAT solver, so it is called once per projected
+        solution. The calls are counted in ``statistics``, and if ``count_saved`` is True
+        the number of calls saved over enumerating every solution is counted too, once
+        the iteration is exhausted. That requires counting the solutions, which may be
+        expensive.
+
+        If ``decompose`` is True, groups of clauses which share no variables are solved
+        separately, and the solutions are the products of their solutions, found as they
+        are needed. This avoids enumerating the product through blocking clauses, and
+        stops early if any group is unsatisfiable. The first solution of each group can
+        be found in parallel in a ``concurrent.futures`` ``executor``. A budget's
+        timeout applies to each group separately.
+        """
+        solutions, variables, positions = self._solve_raw(
+            num_solutions, assumptions, decompose, executor, project, count_saved)
+        Assignment = get_assignment_class_for_variables(variables)
+        return (
+            # pycosat returns the solution as a list of positive or negative 1-indexed
+            # variable numbers. Positive indices correspond to assignments to True, and
+            # negative corresponds to False.
+            Assignment(*[solution[i] > 0 for i in positions])
+            for solution in solutions)
+
+    def solve_arrays(self, num_solutions=None, assumptions=(), batch_size=1024,
+                     decompose=False, executor=None, project=None):
+        """
+        Like ``solve``, but returns an iterator of boolean numpy arrays of up to
+        ``batch_size`` solutions each, whose columns are the ``solution_variables``
+        (including any variables of ``assumptions``), or the sorted variables of
+        ``project``. This avoids creating objects for each solution.
+        """
+        solutions, variables, positions = self._solve_raw(
+            num_solutions, assumptions, decompose, executor, project)
+        return _iter_solution_arrays(solutions, positions, batch_size)
+
+    def solve_bitsets(self, num_solutions=None, assumptions=(), batch_size=1024,
+                      decompose=False, executor=None, project=None):
+        """
+        Like ``solve``, but returns an iterator of solutions as integers, where bit ``i``
+        is set if ``solution_variables[i]`` is True. The integers are computed in batches
+        of ``batch_size`` solutions, as for ``solve_arrays``.
+        """
+        solutions, variables, positions = self._solve_raw(
+            num_solutions, assumptions, decompose, executor, project)
+        return _iter_solution_bitsets(
+            _iter_solution_arrays(solutions, positions, batch_size), len(variables))
+
+    def is_satisfiable(self, assumptions=(), decompose=False, executor=None):
+        return next(self.solve(1, assumptions, decompose, executor), None) is not None
+
+    def to_conjunctive_normal_form(self):
+        """
+        Returns the clauses as an And of Ors. Auxiliary variables are named ``TSEITIN_<n>``.
+        """
+        index2var = {index: var for var, index in self._var2index.items()}
+
+        def get_literal(literal):
+            var = index2var.get(abs(literal)) or Var('TSEITIN_%s' % abs(literal))
+            return var if literal > 0 else Not(var)
+
+        return And(*(Or(*map(get_literal, clause)) for clause in self.clauses))
+
+
+def _get_solver(expr, tseitin, simplify, budget):
+    if hasattr(expr, 'read'):
+        # Imported here to avoid a circular import.
+        from .dimacs import from_dimacs
+        return from_dimacs(expr, tseitin=tseitin, simplify=simplify, budget=budget)
+    elif _is_arena(expr):
+        return expr.to_solver(tseitin=tseitin, simplify=simplify, budget=budget)
+    return Solver(expr, tseitin=tseitin, simplify=simplify, budget=budget)
+
+
+def solve_SAT(expr, num_solutions=None, tseitin=False, simplify=True, budget=None,
+              decompose=False, project=None):
+    """
+    Returns a iterator of {var: truth value} assignments which satisfy the given
+    expression.
+
+    If ``simplify`` is True, the expression is simplified before it is converted to
+    conjunctive normal form (see ``Solver``).
+
+    If ``tseitin`` is True, the expression is converted to conjunctive normal form
+    using the Tseitin transformation, which avoids the exponential blowup of
+    distributing Or over And. The auxiliary variables are omitted from the
+    returned assignments, and each assignment is still yielded exactly once.
+
+    ``expr`` can also be a file object of clauses in DIMACS format, e.g. one written
+    by ``pyreasoner.dimacs.to_dimacs``, which is solved without re-encoding it, or a
+    ``pyreasoner.arena.ExpressionArena``.
+
+    If a ``Budget`` is given, ``SolverBudgetExceeded`` is raised when the conversion
+    or the solving exceeds it, rather than running indefinitely.
+
+    If ``decompose`` is True, independent parts of the expression are solved separately
+    (see ``Solver.solve``).
+
+    If ``project`` is an iterable of variables, the assignments are the distinct
+    assignments to just those variables which can be extended to solutions.
+    """
+    return _get_solver(expr, tseitin, simplify, budget).solve(
+        num_solutions, decompose=decompose, project=project)
 
 
-def is_satisfiable(expr):
+def is_satisfiable(expr, tseitin=False, simplify=True, budget=None, decompose=False):
     """
-    Returns True if expr is satisfiable.
+    Returns True if expr is satisfiable. ``expr`` can also be a DIMACS file object, and
+    ``budget`` and ``decompose`` are as for ``solve_SAT``.
     """
-    return next(solve_SAT(expr, 1), None) is not None
+    return _get_solver(expr, tseitin, simplify, budget).is_satisfiable(decompose=decompose)
@@ -0,0 +1,160 @@
+"""
+Short-circuiting evaluation of expressions under partial assignments, with Kleene's
+three-valued logic.
+
+Unlike ``ExpressionNode.eval``, which evaluates every child and combines the results
+with the &/| operators, a conjunction stops at its first False child and a disjunction
+at its first True child, so the rest of the expression is never visited. Variables
+without a value are Unknown, and the result is a truth value or, if it is Unknown, the
+residual expression with the known parts removed.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+
+from .expressions import And
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Or
+from .expressions import Var
+
+
+class _Unknown(object):
+    def __repr__(self):
+        return 'UNKNOWN'
+
+    def __reduce__(self):
+        return 'UNKNOWN'
+
+
+# The third truth value, of expressions whose value depends on unassigned variables.
+UNKNOWN = _Unknown()
+
+PartialEvaluation = collections.namedtuple(
+    'PartialEvaluation', ['value', 'residual', 'nodes_visited'])
+PartialEvaluation.__doc__ = """
+The result of ``partial_eval``: the truth value (True, False or UNKNOWN), the
+residual expression (the truth value itself unless it is UNKNOWN) and the number of
+distinct nodes which were visited.
+"""
+
+
+class _Result(object):
+    """
+    Yielded by the evaluation of a node with its result, rather than a child to
+    evaluate.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _check_truth_value(value):
+    if not isinstance(value, (bool, ExpressionNode)):
+        raise TypeError('Expected a truth value or an expression, not %r' % (value, ))
+
+
+def _evaluate_junction(node):
+    cls = type(node)
+    # The value which makes the junction constant: False for And, and True for Or.
+    absorbing_value = cls is Or
+    residual = []
+    for child in node.children:
+        value = yield child
+        _check_truth_value(value)
+        if value is absorbing_value:
+            yield _Result(absorbing_value)
+            return
+        elif isinstance(value, ExpressionNode):
+            residual.append(value)
+    if not residual:
+        yield _Result(not absorbing_value)
+    elif len(residual) == 1:
+        yield _Result(residual[0])
+    else:
+        yield _Result(cls(*residual))
+
+
+def _evaluate_not(node):
+    value = yield node.children[0]
+    _check_truth_value(value)
+    if isinstance(value, bool):
+        yield _Result(not value)
+    elif isinstance(value, Not):
+        yield _Result(value.children[0])
+    else:
+        yield _Result(Not(value))
+
+
+def _evaluate_operation(node):
+    values = []
+    for child in node.children:
+        value = yield child
+        values.append(value)
+    if any(isinstance(value, ExpressionNode) for value in values):
+        yield _Result(type(node)(*values))
+    else:
+        yield _Result(node._apply(values))
+
+
+def _evaluate_var(node, namespace):
+    # Substitutions are not followed, as for ``reify``.
+    yield _Result(node.reify(namespace))
+
+
+class _Evaluator(object):
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.results = {}
+        self.nodes_visited = 0
+
+    def _start(self, node):
+        self.nodes_visited += 1
+        if isinstance(node, Var):
+            return node, _evaluate_var(node, self.namespace)
+        elif isinstance(node, (And, Or)):
+            return node, _evaluate_junction(node)
+        elif isinstance(node, Not):
+            return node, _evaluate_not(node)
+        return node, _evaluate_operation(node)
+
+    def evaluate(self, expr):
+        """
+        Returns the value or residual of ``expr``, evaluating each distinct node once.
+        The evaluations of the nodes being visited are kept on a stack of generators,
+        so deep expressions do not recurse.
+        """
+        if not isinstance(expr, ExpressionNode):
+            return expr
+        stack = [self._start(expr)]
+        value = None
+        while True:
+            node, evaluation = stack[-1]
+            step = evaluation.send(value)
+            if isinstance(step, _Result):
+                value = self.results[node] = step.value
+                stack.pop()
+                if not stack:
+                    return value
+            elif not isinstance(step, ExpressionNode):
+                value = step
+            elif step in self.results:
+                value = self.results[step]
+            else:
+                stack.append(self._start(step))
+                value = None
+
+
+def partial_eval(expr, namespace=None, **kwargs):
+    """
+    Evaluates ``expr`` given the values of some of its variables in ``namespace`` (a
+    dict of variables or names, or an assignment), short-circuiting And and Or.
+    Returns a ``PartialEvaluation``.
+    """
+    if namespace is not None and kwargs:
+        raise ValueError('Cannot specify both namespace and kwargs')
+    namespace = namespace or kwargs
+    evaluator = _Evaluator(namespace)
+    residual = evaluator.evaluate(expr)
+    value = residual if isinstance(residual, bool) else UNKNOWN
+    return PartialEvaluation(value, residual, evaluator.nodes_visited)
@@ -0,0 +1,219 @@
+"""
+Parsing expressions from text, e.g. ``(a & ~b) | (c < 5) | d == 'x'``.
+
+The syntax follows python's: ``~`` binds tightest, then ``&``, then ``|``, then the
+comparisons ``<``, ``>`` and ``==``. Chains of the same operator, like ``a | b | c``,
+become a single n-ary node. Literals are ``True``, ``False``, numbers and quoted strings,
+and any other identifier is a variable, except for keywords and names starting with an
+underscore, which are errors. Unlike evaluating python source, parsing runs no code,
+and constant subexpressions like ``1 < 2`` are kept as nodes.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import ast
+import re
+
+from .expressions import And
+from .expressions import Eq
+from .expressions import LessThan
+from .expressions import Not
+from .expressions import Or
+from .expressions import Var
+from .utils import is_valid_identifier_for_namedtuple
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+        |(?P<name>[A-Za-z_]\w*)
+        |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+        |(?P<operator>==|[&|~<>()])
+        |(?P<error>\S)
+    )''', re.VERBOSE)
+
+_CONSTANTS = {'True': True, 'False': False}
+
+# The binding power of each operator. Higher powers bind tighter.
+_COMPARISON_POWER = 1
+_BINARY_POWERS = {
+    '<': _COMPARISON_POWER, '>': _COMPARISON_POWER, '==': _COMPARISON_POWER, '|': 2, '&': 3}
+_POWERS = dict(_BINARY_POWERS, **{'~': 4})
+
+
+class ParseError(ValueError):
+    """
+    Raised for text which is not a valid expression.
+    """
+
+    def __init__(self, message, text, position):
+        super(ParseError, self).__init__('%s at position %s of %r' % (message, position, text))
+        self.text = text
+        self.position = position
+
+
+def _build(operator, operands):
+    if operator == '~':
+        return Not(*operands)
+    elif operator == '&':
+        return And(*operands)
+    elif operator == '|':
+        return Or(*operands)
+    elif operator == '<':
+        return LessThan(*operands)
+    elif operator == '>':
+        return LessThan(*reversed(operands))
+    return Eq(*operands)
+
+
+class Parser(object):
+    """
+    An operator precedence (Pratt) parser, which keeps pending operators on an explicit
+    stack rather than recursing, so the nesting of parentheses is not limited.
+
+    Variables are cached by name, so reusing a parser for many expressions (as
+    ``parse_many`` does) avoids looking them up in the interning table.
+    """
+
+    def __init__(self):
+        self._variables = {}
+
+    def _is_valid_name(self, name):
+        return (
+            name in self._variables or name in _CONSTANTS or
+            is_valid_identifier_for_namedtuple(name))
+
+    def _get_variable(self, name):
+        if name in _CONSTANTS:
+            return _CONSTANTS[name]
+        var = self._variables.get(name)
+        if var is None:
+            var = self._variables[name] = Var(name)
+        return var
+
+    def _get_operand(self, number, name, string):
+        if name:
+            return self._get_variable(name)
+        elif number:
+            return float(number) if any(c in number for c in '.eE') else int(number)
+        return string[1:-1] if '\\' not in string else ast.literal_eval(string)
+
+    def _push_token(self, operators, operands, token, text, index, expect_operand):
+        """
+        Pushes the token at ``index`` of ``text`` onto the stacks, and returns whether an
+        operand is expected next.
+        """
+        number, name, string, operator, error = token
+        if error:
+            raise _error('Unexpected %r' % error, text, index)
+        elif expect_operand and operator in ('~', '('):
+            operators.append([operator, 1, index])
+            return True
+        elif expect_operand:
+            if operator:
+                raise _error('Expected an operand, got %r' % operator, text, index)
+            elif name and not self._is_valid_name(name):
+                raise _error('Invalid variable name %r' % name, text, index)
+            operands.append(self._get_operand(number, name, string))
+            return False
+        elif operator == ')':
+            if not _close_parenthesis(operators, operands):
+                raise _error('Unmatched )', text, index)
+            return False
+        elif operator in _BINARY_POWERS:
+            if not _push_binary_operator(operators, operands, operator, index):
+                raise _error('Chained comparison', text, index)
+            return True
+        raise _error('Expected an operator, got %r' % (
+            operator or name or number or string), text, index)
+
+    def parse(self, text):
+        """
+        Returns the expression for ``text``.
+        """
+        operands = []
+        # Pending operators, as [operator, number of operands, token index] lists. Open
+        # parentheses are pending operators which are never reduced.
+        operators = []
+
+        # Token matches are only needed to report the position of errors.
+        expect_operand = True
+        for i, token in enumerate(_TOKEN_RE.findall(text)):
+            expect_operand = self._push_token(
+                operators, operands, token, text, i, expect_operand)
+
+        if expect_operand:
+            raise ParseError('Unexpected end of input', text, len(text))
+        _reduce_until(operators, operands, '(')
+        if operators:
+            raise _error('Unmatched (', text, operators[-1][2])
+        return operands[0]
+
+
+def _reduce_top(operators, operands):
+    operator, arity, _ = operators.pop()
+    args = operands[-arity:]
+    del operands[-arity:]
+    operands.append(_build(operator, args))
+
+
+def _reduce_until(operators, operands, stop):
+    while operators and operators[-1][0] != stop:
+        _reduce_top(operators, operands)
+
+
+def _close_parenthesis(operators, operands):
+    """
+    Reduces the pending operators back to the innermost open parenthesis, and pops it.
+    Returns False if there is no open parenthesis.
+    """
+    _reduce_until(operators, operands, '(')
+    return bool(operators) and operators.pop()
+
+
+def _push_binary_operator(operators, operands, token, index):
+    """
+    Reduces the pending operators which bind at least as tightly as ``token``, then
+    pushes it. Returns False for a chained comparison.
+    """
+    power = _BINARY_POWERS[token]
+    while operators and operators[-1][0] != '(':
+        top = operators[-1]
+        if top[0] == token and power != _COMPARISON_POWER:
+            # Extend the n-ary chain instead of nesting it.
+            top[1] += 1
+            return True
+        elif _POWERS[top[0]] < power:
+            break
+        elif _POWERS[top[0]] == power == _COMPARISON_POWER:
+            return False
+        _reduce_top(operators, operands)
+    operators.append([token, 2, index])
+    return True
+
+
+def _error(message, text, token_index):
+    """
+    Returns a ParseError for the token at ``token_index`` of ``text``.
+    """
+    for i, match in enumerate(_TOKEN_RE.finditer(text)):
+        if i == token_index:
+            return ParseError(message, text, match.start(match.lastgroup))
+
+
+def parse(text):
+    """
+    Returns the expression for ``text``, e.g. ``parse('a & ~b')`` is ``And(a, Not(b))``.
+    Raises ``ParseError`` for invalid text.
+    """
+    return Parser().parse(text)
+
+
+def parse_many(lines):
+    """
+    Lazily parses an iterable of lines (e.g. a file), yielding one expression per line.
+    Blank lines and lines starting with ``#`` are skipped.
+    """
+    parser = Parser()
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            yield parser.parse(stripped)
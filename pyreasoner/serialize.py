@@ -0,0 +1,304 @@
+"""
+A compact binary format for expressions, which stores each distinct node once.
+
+The format is a header followed by a table of nodes in topological order (children
+before parents), as three arrays: an opcode per node, offsets into a flat array of
+child references, and the child references themselves. A nonnegative reference is the
+index of a node, and a negative reference ``-(i + 1)`` is the ``i``'th constant, where
+constants (variable names, numbers, strings, booleans and None) are stored once each
+after the arrays.
+
+Since the arrays are read with ``numpy.frombuffer``, ``load_mmap`` can evaluate a large
+file without copying it or constructing any nodes.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import mmap
+import struct
+from functools import reduce
+
+import numpy
+
+import six
+
+from .expressions import And
+from .expressions import Eq
+from .expressions import ExpressionNode
+from .expressions import LessThan
+from .expressions import Not
+from .expressions import Or
+from .expressions import Var
+from .expressions import fold_expr
+
+_MAGIC = b'PYRX'
+_VERSION = 1
+# Magic, version, number of nodes, number of child references, number of constants and
+# the reference to the root.
+_HEADER = struct.Struct(str('<4sB3xIIIi'))
+_CONSTANT_HEADER = struct.Struct(str('<cI'))
+_FLOAT = struct.Struct(str('<d'))
+
+_OPCODES = {Var: 0, And: 1, Or: 2, Not: 3, LessThan: 4, Eq: 5}
+_CLASSES = {opcode: cls for cls, opcode in _OPCODES.items()}
+_VAR = _OPCODES[Var]
+_NOT = _OPCODES[Not]
+
+
+def _encode_constant(value):
+    if isinstance(value, bool):
+        return b'b', b'1' if value else b'0'
+    elif value is None:
+        return b'n', b''
+    elif isinstance(value, six.integer_types):
+        return b'i', str(value).encode('ascii')
+    elif isinstance(value, float):
+        return b'f', _FLOAT.pack(value)
+    elif isinstance(value, six.text_type):
+        return b's', value.encode('utf-8')
+    elif isinstance(value, bytes):
+        return b'y', value
+    raise ValueError('Cannot serialize constant %r' % (value, ))
+
+
+def _decode_constant(tag, data):
+    if tag == b'b':
+        return data == b'1'
+    elif tag == b'n':
+        return None
+    elif tag == b'i':
+        return int(data)
+    elif tag == b'f':
+        return _FLOAT.unpack(data)[0]
+    elif tag == b's':
+        return data.decode('utf-8')
+    elif tag == b'y':
+        return data
+    raise ValueError('Unknown constant type %r' % tag)
+
+
+def dumps(expr):
+    """
+    Returns the serialized bytes of ``expr``.
+    """
+    opcodes = []
+    offsets = [0]
+    references = []
+    # The encoded constants, which are distinct for constants like True, 1 and 1.0 that
+    # compare equal.
+    constants = []
+    constant_references = {}
+
+    def get_constant_reference(value):
+        encoded = _encode_constant(value)
+        if encoded not in constant_references:
+            constant_references[encoded] = -len(constants) - 1
+            constants.append(encoded)
+        return constant_references[encoded]
+
+    def add_node(node, results):
+        if type(node) not in _OPCODES:
+            raise ValueError('Cannot serialize %r' % type(node))
+        opcodes.append(_OPCODES[type(node)])
+        if isinstance(node, Var):
+            references.append(get_constant_reference(node.name))
+        else:
+            references.extend(
+                result if type(child) in _OPCODES else get_constant_reference(child)
+                for child, result in zip(node.children, results))
+        offsets.append(len(references))
+        return len(opcodes) - 1
+
+    root = fold_expr(expr, add_node)
+    if not isinstance(expr, ExpressionNode):
+        root = get_constant_reference(expr)
+
+    pieces = [
+        _HEADER.pack(_MAGIC, _VERSION, len(opcodes), len(references), len(constants), root),
+        numpy.array(opcodes, dtype=numpy.uint8).tobytes(),
+        # Pads the opcodes so the following arrays are aligned.
+        b'\0' * (-len(opcodes) % 4),
+        numpy.array(offsets, dtype='<u4').tobytes(),
+        numpy.array(references, dtype='<i4').tobytes(),
+    ]
+    for tag, data in constants:
+        pieces.extend([_CONSTANT_HEADER.pack(tag, len(data)), data])
+    return b''.join(pieces)
+
+
+def dump(expr, fileobj):
+    """
+    Writes ``expr`` to the binary file object ``fileobj``.
+    """
+    fileobj.write(dumps(expr))
+
+
+class _ConstantValues(dict):
+    """
+    The {reference: value} dict of the values of constants, computed on first use.
+    """
+
+    def __init__(self, constants, get_constant):
+        super(_ConstantValues, self).__init__()
+        self.constants = constants
+        self.get_constant = get_constant
+
+    def __missing__(self, reference):
+        value = self.constants[-reference - 1]
+        if self.get_constant is not None:
+            value = self.get_constant(value)
+        self[reference] = value
+        return value
+
+
+class NodeTable(object):
+    """
+    Evaluation of an expression stored as a table of nodes in topological order:
+    ``opcodes``, ``offsets`` into ``references`` of the children of each node, and
+    ``constants``, with the ``root`` reference. Subclasses store the arrays.
+    """
+
+    # The number of nodes read from the arrays at a time.
+    CHUNK_SIZE = 2 ** 16
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def _fold(self, get_value, get_constant=None, reachable=None):
+        """
+        Returns the value of the root, where ``get_value(opcode, arguments)`` returns
+        the value of each node given the values of its children (or the name of a Var).
+        The value of a constant is ``get_constant(constant)``, by default the constant.
+        If ``reachable`` is given, only the nodes for which it is true are computed.
+
+        The arrays are read in chunks of ``CHUNK_SIZE`` nodes, so memory mapped arrays
+        are paged in as they are needed rather than copied as a whole, and chunks without
+        reachable nodes are skipped.
+        """
+        constant_values = _ConstantValues(self.constants, get_constant)
+        if self.root < 0:
+            return constant_values[self.root]
+        values = []
+        for start in range(0, self.root + 1, self.CHUNK_SIZE):
+            stop = min(start + self.CHUNK_SIZE, self.root + 1)
+            if reachable is not None and not any(reachable[start:stop]):
+                values.extend([None] * (stop - start))
+                continue
+            offsets = self.offsets[start:stop + 1].tolist()
+            references = self.references[offsets[0]:offsets[-1]].tolist()
+            first = offsets[0]
+            for i, opcode in enumerate(self.opcodes[start:stop].tolist()):
+                if reachable is not None and not reachable[start + i]:
+                    values.append(None)
+                    continue
+                arguments = [
+                    values[reference] if reference >= 0 else constant_values[reference]
+                    for reference in references[offsets[i] - first:offsets[i + 1] - first]]
+                values.append(get_value(opcode, arguments))
+        return values[self.root]
+
+    def to_expression(self):
+        """
+        Returns the expression, built from interned nodes.
+        """
+        return self._fold(lambda opcode, arguments: _CLASSES[opcode](*arguments))
+
+    def eval(self, namespace=None, **kwargs):
+        """
+        Evaluates the expression like ``ExpressionNode.eval``, without constructing it.
+        Variables are looked up in ``namespace`` as by ``Var.eval``: by the variable or
+        its name in a dict, or as an attribute of an assignment. Variables without a
+        value are left in the result.
+        """
+        if namespace is not None and kwargs:
+            raise ValueError('Cannot specify both namespace and kwargs')
+        namespace = namespace or kwargs
+
+        def get_value(opcode, arguments):
+            if opcode == _VAR:
+                name, = arguments
+                return Var(name).eval(namespace)
+            elif opcode == _NOT:
+                value, = arguments
+                return ~value if isinstance(value, ExpressionNode) else not value
+            cls = _CLASSES[opcode]
+            if hasattr(cls, 'default_reduce_value'):
+                return reduce(cls.operator, arguments, cls.default_reduce_value)
+            return reduce(cls.operator, arguments)
+
+        return self._fold(get_value)
+
+
+class ExpressionTable(NodeTable):
+    """
+    The node table of a serialized expression, read from a buffer (e.g. bytes or an
+    mmap) without copying its arrays.
+    """
+
+    def __init__(self, buffer):
+        magic, version, num_nodes, num_references, num_constants, self.root = (
+            _HEADER.unpack_from(buffer, 0))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('Not a serialized expression (version %s)' % _VERSION)
+        offset = _HEADER.size
+        self.opcodes = numpy.frombuffer(buffer, numpy.uint8, num_nodes, offset)
+        offset += num_nodes + (-num_nodes % 4)
+        self.offsets = numpy.frombuffer(buffer, '<u4', num_nodes + 1, offset)
+        offset += 4 * (num_nodes + 1)
+        self.references = numpy.frombuffer(buffer, '<i4', num_references, offset)
+        offset += 4 * num_references
+        self.constants = _SerializedConstants(buffer, offset, num_constants)
+
+
+class _SerializedConstants(object):
+    """
+    The sequence of the constants stored from ``offset`` of ``buffer``, which are decoded
+    when they are first used. Constants are stored one after another with their sizes,
+    so finding one reads the headers of those before it.
+    """
+
+    def __init__(self, buffer, offset, num_constants):
+        self.buffer = buffer
+        self.num_constants = num_constants
+        # The offsets of the constants found so far.
+        self.offsets = [offset]
+        self.decoded = {}
+
+    def __len__(self):
+        return self.num_constants
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.num_constants:
+            raise IndexError(i)
+        if i not in self.decoded:
+            while len(self.offsets) <= i:
+                _, size = _CONSTANT_HEADER.unpack_from(self.buffer, self.offsets[-1])
+                self.offsets.append(self.offsets[-1] + _CONSTANT_HEADER.size + size)
+            tag, size = _CONSTANT_HEADER.unpack_from(self.buffer, self.offsets[i])
+            start = self.offsets[i] + _CONSTANT_HEADER.size
+            self.decoded[i] = _decode_constant(tag, bytes(self.buffer[start:start + size]))
+        return self.decoded[i]
+
+
+def loads(data):
+    """
+    Returns the expression serialized in the bytes ``data``.
+    """
+    return ExpressionTable(data).to_expression()
+
+
+def load(fileobj):
+    """
+    Returns the expression read from the binary file object ``fileobj``.
+    """
+    return loads(fileobj.read())
+
+
+def load_mmap(path):
+    """
+    Returns an ``ExpressionTable`` for the file at ``path``, which is memory mapped
+    read-only rather than read. Loading it reads only the header. Evaluating it reads the
+    arrays in chunks and decodes the constants as they are used, so the file is paged in
+    as it is evaluated rather than copied into memory.
+    """
+    with open(path, 'rb') as fileobj:
+        return ExpressionTable(mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ))
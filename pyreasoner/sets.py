@@ -62,6 +62,33 @@ Infinity = _Infinity()
 NegativeInfinity = _NegativeInfinity()
 
 
+def _fold_sets(root, get_leaf_result, combine):
+    """
+    Returns ``combine(node, results)`` for the root of a tree of Unions and Intersections,
+    where ``results`` are the results for the node's children, and other sets are leaves
+    whose result is ``get_leaf_result(leaf)``. Uses an explicit stack, so arbitrarily
+    deeply nested sets are supported.
+    """
+    # Sets are unhashable, so results are keyed by id. The sets are kept alive by root.
+    results = {}
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if id(node) in results:
+            stack.pop()
+            continue
+        if isinstance(node, _CompositeSet):
+            pending = [child for child in node.children if id(child) not in results]
+            if pending:
+                stack.extend(reversed(pending))
+                continue
+            results[id(node)] = combine(node, [results[id(child)] for child in node.children])
+        else:
+            results[id(node)] = get_leaf_result(node)
+        stack.pop()
+    return results[id(root)]
+
+
 class BaseSet(with_metaclass(abc.ABCMeta)):
     def __contains__(self, item):
         return eval_expr(self.get_constraints(Var('x')), {'x': item})
@@ -112,10 +139,59 @@ class DiscreteSet(BaseSet):
         )
 
 
-class Union(BaseSet):
+class _CompositeSet(BaseSet):
+    """
+    A set combining its children with a set operation.
+    """
+    # A membership of any child which decides the membership of the set.
+    decisive_membership = None
+    # How the constraints of the children are combined, and the result for no children.
+    combine_constraints = None
+    empty_constraints = None
+    symbol = None
+
     def __init__(self, *children):
         self.children = children
 
+    def __repr__(self):
+        return _fold_sets(
+            self, repr, lambda node, reprs: '(%s)' % node.symbol.join(reprs))
+
+    def __contains__(self, item):
+        # Like any/all, children are checked in order until one is decisive. Each
+        # entry of the stack is a set, and an iterator over its unchecked children.
+        stack = [(self, iter(self.children))]
+        membership = None
+        while stack:
+            node, children = stack[-1]
+            if membership is node.decisive_membership:
+                stack.pop()
+                continue
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                membership = not node.decisive_membership
+            elif isinstance(child, _CompositeSet):
+                stack.append((child, iter(child.children)))
+                membership = None
+            else:
+                membership = bool(item in child)
+        return membership
+
+    def get_constraints(self, variable):
+        return _fold_sets(
+            self,
+            lambda leaf: leaf.get_constraints(variable),
+            lambda node, constraints: reduce(
+                node.combine_constraints, constraints, node.empty_constraints))
+
+
+class Union(_CompositeSet):
+    decisive_membership = True
+    combine_constraints = staticmethod(operator.or_)
+    empty_constraints = Or()
+    symbol = '∪'
+
     def __eq__(self, other):
         return isinstance(other, Union) and self.children == other.children
 
@@ -125,23 +201,12 @@ class Union(BaseSet):
         else:
             return Union(*(self.children + (other, )))
 
-    def __repr__(self):
-        return '(%s)' % '∪'.join(map(repr, self.children))
-
-    def __contains__(self, item):
-        return any(item in child for child in self.children)
-
-    def get_constraints(self, variable):
-        return reduce(
-            operator.or_,
-            (child.get_constraints(variable) for child in self.children),
-            Or()
-        )
-
 
-class Intersection(BaseSet):
-    def __init__(self, *children):
-        self.children = children
+class Intersection(_CompositeSet):
+    decisive_membership = False
+    combine_constraints = staticmethod(operator.and_)
+    empty_constraints = And()
+    symbol = '∩'
 
     def __eq__(self, other):
         return isinstance(other, Intersection) and self.children == other.children
@@ -152,19 +217,6 @@ class Intersection(BaseSet):
         else:
             return Intersection(*(self.children + (other, )))
 
-    def __repr__(self):
-        return '(%s)' % '∩'.join(map(repr, self.children))
-
-    def __contains__(self, item):
-        return all(item in child for child in self.children)
-
-    def get_constraints(self, variable):
-        return reduce(
-            operator.and_,
-            (child.get_constraints(variable) for child in self.children),
-            And()
-        )
-
 
 class OpenInterval(BaseSet):
     def __init__(self, left=NegativeInfinity, right=Infinity):
@@ -0,0 +1,151 @@
+"""
+Logically equivalent simplifications of expressions, used to shrink expressions before
+they are converted to conjunctive normal form.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+
+from .expressions import And
+from .expressions import BinaryExpression
+from .expressions import ExpressionNode
+from .expressions import Not
+from .expressions import Or
+from .expressions import fold_expr
+
+# The names of the simplification passes, as used in the statistics.
+CONSTANT_FOLDING = 'constant_folding'
+DOUBLE_NEGATION = 'double_negation'
+FLATTENING = 'flattening'
+DUPLICATES = 'duplicates'
+COMPLEMENTS = 'complements'
+ABSORPTION = 'absorption'
+SUBSUMPTION = 'subsumption'
+
+
+def _simplify_not(node, child, stats):
+    if isinstance(child, bool):
+        stats[CONSTANT_FOLDING] += 1
+        return not child
+    elif isinstance(child, Not):
+        stats[DOUBLE_NEGATION] += 1
+        return child.children[0]
+    return Not(child)
+
+
+def _flatten(cls, children, stats):
+    flattened = []
+    for child in children:
+        if isinstance(child, cls):
+            stats[FLATTENING] += 1
+            flattened.extend(child.children)
+        else:
+            flattened.append(child)
+    return flattened
+
+
+def _remove_absorbed(cls, children, stats):
+    """
+    Removes children absorbed by their siblings: x & (x | y) is x, and x | (x & y) is x.
+    """
+    dual = Or if cls is And else And
+    siblings = set(children)
+    absorbed = set(
+        child for child in children
+        if isinstance(child, dual) and any(
+            grandchild in siblings for grandchild in child.children))
+    stats[ABSORPTION] += len(absorbed)
+    return [child for child in children if child not in absorbed]
+
+
+def _simplify_junction(node, children, stats):
+    """
+    Simplifies an And or Or node whose children have already been simplified.
+    """
+    cls = type(node)
+    # The value which makes the junction constant: False for And, and True for Or.
+    absorbing_value = cls is Or
+
+    unique = []
+    seen = set()
+    for child in _flatten(cls, children, stats):
+        if isinstance(child, bool):
+            stats[CONSTANT_FOLDING] += 1
+            if child is absorbing_value:
+                return absorbing_value
+        elif child in seen:
+            stats[DUPLICATES] += 1
+        else:
+            seen.add(child)
+            unique.append(child)
+
+    if any(isinstance(child, Not) and child.children[0] in seen for child in unique):
+        # x & ~x is False, and x | ~x is True.
+        stats[COMPLEMENTS] += 1
+        return absorbing_value
+
+    unique = _remove_absorbed(cls, unique, stats)
+    if not unique:
+        return not absorbing_value
+    elif len(unique) == 1:
+        return unique[0]
+    return cls(*unique)
+
+
+def _simplify_binary_expression(node, children, stats):
+    lhs, rhs = children
+    if not isinstance(lhs, ExpressionNode) and not isinstance(rhs, ExpressionNode):
+        stats[CONSTANT_FOLDING] += 1
+        return node.operator(lhs, rhs)
+    return type(node)(lhs, rhs)
+
+
+def simplify(expr, stats=None):
+    """
+    Returns an expression logically equivalent to ``expr`` after constant folding,
+    flattening nested And/Or nodes, and removing duplicate children, complementary
+    children and absorbed children. The result may have fewer free variables than
+    ``expr``, e.g. ``a | ~a`` simplifies to ``True``.
+
+    If ``stats`` is given, it should be a ``collections.Counter``, which is incremented
+    with the number of times each pass applied.
+    """
+    if stats is None:
+        stats = collections.Counter()
+
+    def simplify_node(node, children):
+        if isinstance(node, Not):
+            return _simplify_not(node, children[0], stats)
+        elif isinstance(node, (And, Or)):
+            return _simplify_junction(node, children, stats)
+        elif isinstance(node, BinaryExpression):
+            return _simplify_binary_expression(node, children, stats)
+        return node
+
+    return fold_expr(expr, simplify_node)
+
+
+def remove_subsumed_clauses(clauses, stats=None):
+    """
+    Returns the clauses (lists of pycosat literals) which are not a superset of another
+    clause, keeping the first of any duplicates. Removing them does not change the set of
+    satisfying assignments.
+    """
+    # Each kept clause is indexed by one of its literals, so a clause only needs to be
+    # checked against the kept clauses indexed by its own literals.
+    if [] in clauses:
+        # The empty clause is unsatisfiable, and subsumes every other clause.
+        if stats is not None:
+            stats[SUBSUMPTION] += len(clauses) - 1
+        return [[]]
+    index = collections.defaultdict(list)
+    kept = []
+    for position, clause in sorted(enumerate(clauses), key=lambda item: len(item[1])):
+        literals = frozenset(clause)
+        if any(other <= literals for literal in literals for other in index[literal]):
+            if stats is not None:
+                stats[SUBSUMPTION] += 1
+            continue
+        index[next(iter(literals))].append(literals)
+        kept.append((position, clause))
+    return [clause for position, clause in sorted(kept, key=lambda item: item[0])]
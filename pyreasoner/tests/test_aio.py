@@ -0,0 +1,78 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import six
+
+from .test_expressions import make_pigeonhole_expression
+from ..expressions import Budget
+from ..expressions import SolverBudgetExceeded
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+if not six.PY2:
+    import asyncio
+
+    from ..aio import is_satisfiable_async
+    from ..aio import iter_solutions_async
+    from ..aio import solve_async
+
+a, b, c = variables('a b c')
+
+
+@unittest.skipIf(six.PY2, 'asyncio is python 3 only')
+class TestAsync(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.loop.close()
+
+    def run_until_complete(self, future):
+        return self.loop.run_until_complete(future)
+
+    def test_solve(self):
+        expr = (a | b) & ~c
+        self.assertEqual(
+            sorted(self.run_until_complete(solve_async(expr, loop=self.loop))),
+            sorted(solve_SAT(expr)))
+        self.assertIs(self.run_until_complete(is_satisfiable_async(a & ~a, loop=self.loop)), False)
+        self.assertIs(self.run_until_complete(is_satisfiable_async(a, loop=self.loop)), True)
+
+    def test_budget(self):
+        future = solve_async(
+            make_pigeonhole_expression(9), budget=Budget(prop_limit=1000), loop=self.loop)
+        with self.assertRaises(SolverBudgetExceeded):
+            self.run_until_complete(future)
+
+    def test_iteration(self):
+        expr = a | b
+        solutions = iter_solutions_async(expr, executor=self.executor, loop=self.loop)
+        found = []
+        with self.assertRaises(StopAsyncIteration):
+            while True:
+                found.append(self.run_until_complete(solutions.__anext__()))
+        self.assertEqual(sorted(found), sorted(solve_SAT(expr)))
+
+        solutions = iter_solutions_async(expr, loop=self.loop)
+        self.run_until_complete(solutions.__anext__())
+        solutions.close()
+        with self.assertRaises(SolverBudgetExceeded):
+            self.run_until_complete(solutions.__anext__())
+
+    def test_cancellation_stops_the_solver(self):
+        for solve in [solve_async, iter_solutions_async]:
+            future = solve(
+                make_pigeonhole_expression(12), executor=self.executor, loop=self.loop)
+            if solve is iter_solutions_async:
+                future = future.__anext__()
+            self.run_until_complete(asyncio.sleep(0.2))
+            future.cancel()
+            self.run_until_complete(asyncio.sleep(0))
+            start = time.time()
+            # The executor only has one thread, so this waits for the solver to stop.
+            self.executor.submit(lambda: None).result()
+            self.assertLess(time.time() - start, 2)
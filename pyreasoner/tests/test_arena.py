@@ -0,0 +1,125 @@
+import pickle
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..arena import ExpressionArena
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import Or
+from ..expressions import Var
+from ..expressions import convert_to_conjunctive_normal_form
+from ..expressions import eval_expr
+from ..expressions import get_depth
+from ..expressions import get_free_variables
+from ..expressions import get_node_count
+from ..expressions import is_logically_equivalent
+from ..expressions import is_satisfiable
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c = variables('a b c')
+
+
+class TestSlots(TestCase):
+    def test_no_instance_dict(self):
+        for node in [a, a & b, a | b, ~a, LessThan(a, 1), Eq(a, 'x')]:
+            self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_cached_values(self):
+        expr = (a & ~b) | c
+        self.assertEqual(expr.free_variables, {a, b, c})
+        self.assertIs(expr.free_variables, expr._free_variables)
+        self.assertEqual((expr.depth, expr.node_count), (4, 6))
+        self.assertIs(expr.compile(), expr.compile())
+        self.assertIs(Not(expr).distribute_inwards(), (~a | b) & ~c)
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            a.name = 'b'
+        with self.assertRaises(AttributeError):
+            (a & b).children = (a, )
+        with self.assertRaises(AttributeError):
+            a.other = 1
+
+    def test_binary_expressions(self):
+        expr = LessThan(a, 3)
+        self.assertEqual((expr.lhs, expr.rhs), (a, 3))
+        self.assertIs(pickle.loads(pickle.dumps(expr)), expr)
+
+
+class TestExpressionArena(TestCase):
+    def test_build(self):
+        arena = ExpressionArena()
+        x = arena.add_var('x')
+        y = arena.add_var('y')
+        arena.add(Or, x, arena.add(Not, y), arena.constant(False))
+        self.assertIs(arena.to_expression(), Var('x') | ~Var('y') | False)
+        self.assertEqual(len(arena), 4)
+        self.assertEqual(arena.nbytes, 4 + 4 * 5 + 4 * 6)
+        with self.assertRaises(ValueError):
+            arena.add(Var, x)
+        with self.assertRaises(ValueError):
+            arena.add(And, x, 10)
+        with self.assertRaises(ValueError):
+            arena.add_var('_x')
+
+    def test_unreachable_nodes(self):
+        arena = ExpressionArena()
+        x = arena.add_var('x')
+        arena.add_var('y')
+        arena.root = arena.add(And, x, x)
+        self.assertEqual(get_free_variables(arena), {Var('x')})
+        self.assertEqual(len(list(solve_SAT(arena, tseitin=True))), 1)
+
+    def test_relations(self):
+        expr = LessThan(a, 2) & Eq(b, 'x')
+        arena = ExpressionArena.from_expression(expr)
+        self.assertIs(eval_expr(arena, {'a': 1, 'b': 'x'}), True)
+        self.assertIs(arena.to_expression(), expr)
+        self.assertIs(ExpressionArena.from_expression(True).to_expression(), True)
+
+    def test_namespaces(self):
+        expr = a & (b | c | a) & ~c
+        arena = ExpressionArena.from_expression(expr)
+        self.assertIs(eval_expr(arena, expr.assignment_class(a=True, b=False, c=False)), True)
+        self.assertIs(eval_expr(arena, {a: True, b: False, c: True}), False)
+        self.assertIs(eval_expr(arena, {a: True, 'b': True, 'c': False}), True)
+        self.assertIs(eval_expr(arena, {a: b, b: True, c: False}), True)
+        self.assertIs(eval_expr(arena, {c: False}), expr.eval({c: False}))
+
+    def test_sharing(self):
+        expr = a & b
+        for i in range(100):
+            expr = Not(expr) | expr
+        arena = ExpressionArena.from_expression(expr)
+        self.assertEqual(len(arena), 3 + 2 * 100)
+        self.assertEqual(get_node_count(arena), get_node_count(expr))
+
+    def test_deep_expression(self):
+        expr = a
+        for i in range(5000):
+            expr = Not(expr) & b
+        arena = ExpressionArena.from_expression(expr)
+        self.assertEqual(get_depth(arena), get_depth(expr))
+        self.assertTrue(is_satisfiable(arena, tseitin=True))
+
+    @hypothesis.given(boolean_expressions)
+    def test_matches_expression(self, expr):
+        arena = ExpressionArena.from_expression(expr)
+        self.assertIs(arena.to_expression(), expr)
+        self.assertEqual(get_free_variables(arena), get_free_variables(expr))
+        self.assertEqual(get_depth(arena), get_depth(expr))
+        self.assertEqual(get_node_count(arena), get_node_count(expr))
+        namespace = {'a': True, 'b': False}
+        self.assertIs(eval_expr(arena, namespace), eval_expr(expr, namespace))
+        for tseitin in [False, True]:
+            self.assertEqual(
+                set(solve_SAT(arena, tseitin=tseitin)), set(solve_SAT(expr, tseitin=tseitin)))
+        self.assertTrue(is_logically_equivalent(
+            convert_to_conjunctive_normal_form(arena), expr))
+        cnf = convert_to_conjunctive_normal_form(arena, tseitin=True)
+        self.assertEqual(is_satisfiable(cnf), is_satisfiable(expr))
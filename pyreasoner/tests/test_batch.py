@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from ..batch import is_satisfiable_many
+from ..batch import solve_many
+from ..expressions import Not
+from ..expressions import is_satisfiable
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c = variables('a b c')
+
+EXPRESSIONS = [a & ~a, a | b, a & ~b & c, True, False, ~(a | c)] * 7
+
+
+def as_dicts(solutions):
+    return [dict(solution._asdict()) for solution in solutions]
+
+
+class TestBatch(TestCase):
+    def test_in_process(self):
+        self.assertEqual(
+            list(solve_many(EXPRESSIONS, workers=1, chunksize=4)),
+            [as_dicts(solve_SAT(expr)) for expr in EXPRESSIONS])
+        self.assertEqual(
+            sorted(solve_many(EXPRESSIONS, workers=1, ordered=False)),
+            sorted(enumerate(as_dicts(solve_SAT(expr)) for expr in EXPRESSIONS)))
+
+    def test_pool(self):
+        expected = [is_satisfiable(expr) for expr in EXPRESSIONS]
+        self.assertEqual(
+            list(is_satisfiable_many(iter(EXPRESSIONS), workers=2, chunksize=3)), expected)
+        self.assertEqual(
+            sorted(is_satisfiable_many(EXPRESSIONS, workers=2, chunksize=5, ordered=False)),
+            list(enumerate(expected)))
+        self.assertEqual(list(is_satisfiable_many([], workers=2)), [])
+
+    def test_solutions_in_pool(self):
+        solutions = list(solve_many(EXPRESSIONS, num_solutions=1, workers=2, tseitin=True))
+        self.assertEqual(
+            solutions, [as_dicts(solve_SAT(expr, 1, tseitin=True)) for expr in EXPRESSIONS])
+
+    def test_deep_expression(self):
+        expr = a
+        for i in range(5000):
+            expr = Not(expr) & b
+        # Deeper than the recursion limit, so the expression could not be pickled.
+        self.assertEqual(list(is_satisfiable_many([expr], workers=2, tseitin=True)), [True])
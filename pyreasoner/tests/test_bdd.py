@@ -0,0 +1,139 @@
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..bdd import BDDManager
+from ..bdd import get_alphabetical_order
+from ..bdd import get_appearance_order
+from ..bdd import get_bdd
+from ..bdd import get_occurrence_order
+from ..counting import count_solutions
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import Or
+from ..expressions import get_free_variables
+from ..expressions import is_logically_equivalent
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c, d = variables('a b c d')
+
+
+class TestOrderings(TestCase):
+    def test_appearance_order(self):
+        self.assertEqual(get_appearance_order((c | a) & ~(b | c) & d), [c, a, b, d])
+
+    def test_occurrence_order(self):
+        self.assertEqual(get_occurrence_order((c | a) & (b | a) & (d | a | b)), [a, b, c, d])
+
+    def test_manager_ordering(self):
+        self.assertEqual(BDDManager(ordering='alphabetical').compile(c | a).manager.variables,
+                         [a, c])
+        self.assertEqual(BDDManager(ordering='appearance').compile(c | a).manager.variables,
+                         [c, a])
+        reverse_alphabetical = lambda expr: get_alphabetical_order(expr)[::-1]  # noqa
+        self.assertEqual(
+            BDDManager([b], ordering=reverse_alphabetical).compile(c | a | b).manager.variables,
+            [b, c, a])
+
+
+class TestBDD(TestCase):
+    def test_canonical(self):
+        manager = BDDManager()
+        self.assertEqual(manager.compile(~(a & b)), manager.compile(~a | ~b))
+        self.assertEqual(manager.compile(a | ~a), manager.true)
+        self.assertEqual(manager.compile(a & ~a), manager.false)
+        self.assertNotEqual(manager.compile(a & b), manager.compile(a | b))
+        self.assertTrue(manager.compile(Or(b, And())).is_true)
+
+    def test_operators(self):
+        manager = BDDManager()
+        x, y = manager.compile(a), manager.compile(b)
+        self.assertEqual(x & y, manager.compile(a & b))
+        self.assertEqual(x | y, manager.compile(a | b))
+        self.assertEqual(x ^ y, manager.compile((a & ~b) | (~a & b)))
+        self.assertEqual(~x, manager.compile(~a))
+        self.assertEqual(x & True, x)
+        self.assertEqual(False | y, y)
+        with self.assertRaises(ValueError):
+            x & get_bdd(b)
+
+    def test_restrict(self):
+        bdd = get_bdd((a & b) | c)
+        self.assertEqual(bdd.restrict(a=True), bdd.manager.compile(b | c))
+        self.assertEqual(bdd.restrict({c: False, b: True}), bdd.manager.compile(a))
+        self.assertTrue(bdd.restrict(c=True).is_true)
+
+    def test_exists(self):
+        bdd = get_bdd((a & b) | (~a & c))
+        self.assertEqual(bdd.exists([a]), bdd.manager.compile(b | c))
+        self.assertTrue(bdd.exists([a, b]).is_true)
+
+    def test_count(self):
+        bdd = get_bdd((a & b) | c)
+        self.assertEqual(bdd.count(), 5)
+        self.assertEqual(bdd.count([a, b, c, d]), 10)
+        with self.assertRaises(ValueError):
+            bdd.count([a])
+        self.assertEqual(get_bdd(a | ~a).count(), 1)
+        xs = variables(['x%s' % i for i in range(200)])
+        self.assertEqual(get_bdd(Or(*xs)).count(), 2 ** 200 - 1)
+
+    def test_iter_solutions(self):
+        bdd = get_bdd(~c & (b | a))
+        self.assertEqual(set(bdd.iter_solutions()), {
+            (False, True, False), (True, False, False), (True, True, False)})
+        self.assertEqual(len(list(bdd.iter_solutions([a, b, c, d]))), 6)
+        self.assertEqual(list(get_bdd(True).iter_solutions()), [()])
+        self.assertEqual(list(get_bdd(False).iter_solutions()), [])
+
+    def test_node_sharing(self):
+        xs = variables(['x%s' % i for i in range(50)])
+        bdd = get_bdd(And(*(x | y for x, y in zip(xs, xs[1:]))))
+        self.assertEqual(bdd.node_count, 2 * 49)
+        self.assertEqual(bdd.support, frozenset(xs))
+
+    def test_many_variables(self):
+        # Deeper than the recursion limit, though the BDD is linear in size.
+        xs = variables(['x%s' % i for i in range(1500)])
+        expr = And(*(x | y for x, y in zip(xs, xs[1:])))
+        bdd = get_bdd(expr)
+        self.assertEqual(bdd.node_count, 2 * 1499)
+        # Every odd variable is forced to be True.
+        restricted = bdd.restrict({x: False for x in xs[::2]})
+        self.assertEqual(restricted.node_count, 750)
+        self.assertEqual(restricted.count(), 1)
+        self.assertTrue(bdd.exists(xs[1::2]).is_true)
+        self.assertEqual(bdd.count() % 2, 1)
+        self.assertEqual(bdd.count(), count_solutions(expr, method='bdd'))
+        self.assertEqual(bdd.manager.compile(bdd.to_expression()), bdd)
+        self.assertTrue(expr.eval(next(bdd.iter_solutions())._asdict()))
+
+    def test_computed_table(self):
+        manager = BDDManager(cache_size=1)
+        self.assertEqual(manager.compile((a | b) & (c | d)),
+                         manager.compile((a & c) | (a & d) | (b & c) | (b & d)))
+        self.assertGreater(manager.cache_misses, 0)
+
+    def test_non_boolean_expressions(self):
+        with self.assertRaises(TypeError):
+            get_bdd(a & Eq(b, 1))
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=500)
+    def test_matches_truth_table(self, expr):
+        bdd = get_bdd(expr)
+        solutions = set(solve_SAT(expr))
+        free_variables = get_free_variables(expr)
+        self.assertEqual(set(bdd.iter_solutions(free_variables)), solutions)
+        self.assertEqual(bdd.count(free_variables), len(solutions))
+        self.assertTrue(is_logically_equivalent(bdd.to_expression(), expr))
+
+    @hypothesis.given(boolean_expressions, boolean_expressions)
+    @hypothesis.settings(max_examples=500)
+    def test_equivalence(self, expr1, expr2):
+        manager = BDDManager(ordering='occurrence')
+        self.assertEqual(
+            manager.compile(expr1) == manager.compile(expr2),
+            is_logically_equivalent(expr1, expr2))
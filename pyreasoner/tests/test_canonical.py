@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..cache import EVICTIONS
+from ..cache import HITS
+from ..cache import MISSES
+from ..cache import QueryCache
+from ..canonical import canonicalize
+from ..canonical import structural_hash
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import Or
+from ..expressions import is_logically_equivalent
+from ..expressions import is_satisfiable
+from ..expressions import reify_expr
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c, d, e = variables('a b c d e')
+
+
+class TestCanonicalize(TestCase):
+    def test_reordering_and_renaming(self):
+        expr = (a | b) & (c | ~d) & LessThan(e, 3)
+        canonical = canonicalize(expr).expr
+        self.assertIs(canonicalize(LessThan(e, 3) & (~d | c) & (b | a)).expr, canonical)
+        self.assertIs(canonicalize(((~a | b) & LessThan(c, 3)) & (d | e)).expr, canonical)
+        self.assertIsNot(canonicalize(LessThan(3, e) & (a | b) & (c | ~d)).expr, canonical)
+
+    def test_flattening(self):
+        self.assertIs(canonicalize(And(a, And(b, Or(c, Or(d, e))))).expr,
+                      canonicalize(And(a, b, Or(c, d, e))).expr)
+
+    def test_constants(self):
+        self.assertEqual(canonicalize(True), (True, {}))
+        self.assertIsNot(canonicalize(Eq(a, 1)).expr, canonicalize(Eq(a, True)).expr)
+
+    def test_structural_hash(self):
+        self.assertEqual(structural_hash((a | b) & c), structural_hash((a | b) & c))
+        self.assertNotEqual(structural_hash(a & b), structural_hash(b & a))
+        self.assertNotEqual(structural_hash(a & (b & c)), structural_hash(a & b & c))
+        self.assertNotEqual(structural_hash(Eq(a, 1)), structural_hash(Eq(a, 1.0)))
+        self.assertEqual(len(structural_hash(False)), 40)
+        self.assertNotEqual(structural_hash(Eq(a, 'b')), structural_hash(Eq(a, b)))
+        self.assertNotEqual(structural_hash(And(a, Not('v1'))), structural_hash(And(a, ~b)))
+
+    @hypothesis.given(boolean_expressions)
+    def test_renaming(self, expr):
+        canonical, renaming = canonicalize(expr)
+        self.assertTrue(is_logically_equivalent(reify_expr(expr, renaming), canonical))
+        self.assertEqual(
+            sorted(var.name for var in renaming.values()),
+            sorted('v%s' % i for i in range(len(renaming))))
+
+
+class TestQueryCache(TestCase):
+    def test_hits(self):
+        cache = QueryCache()
+        self.assertTrue(cache.is_satisfiable((a | b) & ~c))
+        self.assertTrue(cache.is_satisfiable(~d & (e | a)))
+        self.assertFalse(cache.is_satisfiable(a & ~a))
+        self.assertEqual(cache.statistics, {HITS: 1, MISSES: 2})
+
+    def test_solutions(self):
+        cache = QueryCache()
+        expected = set(solve_SAT((a | b) & ~c))
+        self.assertEqual(set(cache.solve_SAT((a | b) & ~c)), expected)
+        self.assertEqual(set(cache.solve_SAT(~c & (b | a))), expected)
+        self.assertEqual(
+            set(cache.solve_SAT(~a & (d | e))), set(solve_SAT(~a & (d | e))))
+        self.assertEqual(cache.statistics[HITS], 2)
+        self.assertEqual(len(cache.solve_SAT(a | b, 1)), 1)
+        self.assertEqual(cache.solve_SAT(False), [])
+
+    def test_conjunctive_normal_form(self):
+        cache = QueryCache()
+        expr = (a & b) | (c & ~d)
+        cnf = cache.convert_to_conjunctive_normal_form(expr)
+        self.assertTrue(cnf.is_conjunctive_normal_form)
+        self.assertTrue(is_logically_equivalent(cnf, expr))
+        renamed = cache.convert_to_conjunctive_normal_form((b & e) | (~a & c))
+        self.assertTrue(is_logically_equivalent(renamed, (b & e) | (~a & c)))
+        self.assertEqual(cache.statistics[HITS], 1)
+        self.assertTrue(is_satisfiable(cache.convert_to_conjunctive_normal_form(expr, True)))
+
+    def test_variables_and_strings(self):
+        cache = QueryCache()
+        self.assertTrue(cache.is_satisfiable(And(a, Not(b))))
+        with self.assertRaises(TypeError):
+            cache.is_satisfiable(And(a, Not('v1')))
+
+    def test_equivalence(self):
+        cache = QueryCache()
+        self.assertTrue(cache.is_logically_equivalent(~(a & b), ~a | ~b))
+        self.assertTrue(cache.is_logically_equivalent(~(c & d), ~c | ~d))
+        self.assertFalse(cache.is_logically_equivalent(a, b))
+        self.assertEqual(cache.statistics, {HITS: 1, MISSES: 2})
+
+    def test_eviction(self):
+        cache = QueryCache(maxsize=2)
+        for expr in [a, a & b, a & b & c, a]:
+            cache.is_satisfiable(expr)
+        self.assertEqual(cache.statistics, {MISSES: 4, EVICTIONS: 2})
+        self.assertEqual(len(cache), 2)
+        cache = QueryCache(max_cost=5)
+        cache.solve_SAT(a | b)
+        self.assertEqual((len(cache), cache.cost), (1, 4))
+        cache.solve_SAT(a & b)
+        self.assertEqual((len(cache), cache.cost, cache.statistics[EVICTIONS]), (1, 2, 1))
+        cache.solve_SAT(a | b | c)
+        self.assertEqual(len(cache), 1)
+
+    def test_persistence(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'cache.pickle')
+            cache = QueryCache(path=path)
+            expr = a
+            for i in range(3000):
+                expr = Not(expr) | b
+            cache.convert_to_conjunctive_normal_form(expr)
+            cache.solve_SAT(a | b)
+            cache.save()
+            cache = QueryCache(path=path)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(set(cache.solve_SAT(c | d)), set(solve_SAT(c | d)))
+            self.assertEqual(cache.statistics, {HITS: 1})
+        finally:
+            shutil.rmtree(directory)
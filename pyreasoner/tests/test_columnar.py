@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import hypothesis
+from hypothesis import strategies as st
+
+import numpy
+
+from .strategies import boolean_expressions
+from ..columnar import evaluate_batch
+from ..columnar import iter_evaluate_batch
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Or
+from ..expressions import eval_expr
+from ..expressions import variables
+
+a, b, c = variables('a b c')
+
+NAMES = 'abcdef'
+
+
+class Table(object):
+    """
+    A minimal columnar table, like a ``pyarrow.Table``.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.num_rows = len(next(iter(columns.values())))
+
+    def column(self, name):
+        return self.columns[name]
+
+
+def make_columns(num_rows, seed=0):
+    random = numpy.random.RandomState(seed)
+    return {name: random.randint(0, 2, num_rows).astype(bool) for name in NAMES}
+
+
+def eval_rows(expr, columns):
+    num_rows = len(next(iter(columns.values())))
+    return [
+        eval_expr(expr, {name: bool(column[i]) for name, column in columns.items()})
+        for i in range(num_rows)]
+
+
+class TestEvaluateBatch(TestCase):
+    def test_relations(self):
+        columns = {'a': numpy.array([1, 5, 3]), 'b': numpy.array(['x', 'y', 'x'])}
+        expr = LessThan(a, 4) & Eq(b, 'x')
+        self.assertEqual(evaluate_batch(expr, columns).tolist(), [True, False, True])
+        self.assertEqual(evaluate_batch(~expr, columns).tolist(), [False, True, False])
+
+    def test_constants(self):
+        columns = make_columns(5)
+        self.assertEqual(evaluate_batch(True, columns).tolist(), [True] * 5)
+        self.assertEqual(evaluate_batch(And(), columns).tolist(), [True] * 5)
+        self.assertEqual(evaluate_batch(a | Or(), columns).tolist(), columns['a'].tolist())
+
+    def test_structured_array_and_table(self):
+        columns = make_columns(100)
+        expr = (a & ~b) | c
+        expected = eval_rows(expr, columns)
+        records = numpy.zeros(100, dtype=[(name, bool) for name in NAMES])
+        for name in NAMES:
+            records[name] = columns[name]
+        self.assertEqual(evaluate_batch(expr, records).tolist(), expected)
+        self.assertEqual(evaluate_batch(expr, Table(columns)).tolist(), expected)
+
+    def test_chunks(self):
+        columns = make_columns(1000)
+        expr = (a | b) & ~(c & a)
+        expected = evaluate_batch(expr, columns)
+        self.assertTrue(numpy.array_equal(evaluate_batch(expr, columns, 64), expected))
+        chunks = (
+            {name: column[start:start + 300] for name, column in columns.items()}
+            for start in range(0, 1000, 300))
+        self.assertTrue(numpy.array_equal(
+            numpy.concatenate(list(iter_evaluate_batch(expr, chunks))), expected))
+
+    def test_memmap(self):
+        directory = tempfile.mkdtemp()
+        try:
+            columns = {}
+            for name, column in make_columns(10000).items():
+                columns[name] = numpy.memmap(
+                    os.path.join(directory, name), dtype=bool, mode='w+', shape=(10000, ))
+                columns[name][:] = column
+            expr = a & (b | ~c)
+            self.assertEqual(
+                evaluate_batch(expr, columns, chunksize=1024).tolist(),
+                eval_rows(expr, columns))
+            del columns
+        finally:
+            shutil.rmtree(directory)
+
+    @hypothesis.given(boolean_expressions, st.integers(1, 20))
+    def test_matches_eval(self, expr, chunksize):
+        columns = make_columns(50)
+        expected = eval_rows(expr, columns)
+        self.assertEqual(evaluate_batch(expr, columns).tolist(), expected)
+        self.assertEqual(evaluate_batch(expr, columns, chunksize).tolist(), expected)
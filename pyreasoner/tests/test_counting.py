@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import hypothesis
+from hypothesis import strategies as st
+
+from .strategies import EXAMPLE_VARIABLES
+from .strategies import boolean_expressions
+from ..counting import count_solutions
+from ..expressions import And
+from ..expressions import Or
+from ..expressions import get_free_variables
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c, d = variables('a b c d')
+
+
+def count_projected_solutions(expr, projected):
+    return len({
+        tuple(getattr(solution, var.name) for var in projected)
+        for solution in solve_SAT(expr)
+    })
+
+
+class TestCountSolutions(TestCase):
+    def test_simple(self):
+        self.assertEqual(count_solutions(a | b), 3)
+        self.assertEqual(count_solutions(a & b), 1)
+        self.assertEqual(count_solutions(a & ~a), 0)
+        self.assertEqual(count_solutions(True), 1)
+        self.assertEqual(count_solutions(False), 0)
+        self.assertEqual(count_solutions(Or()), 0)
+
+    def test_extra_variables(self):
+        self.assertEqual(count_solutions(a | b, [a, b, c]), 6)
+        self.assertEqual(count_solutions(a | b, [a, b, c], method='bdd'), 6)
+
+    def test_projection(self):
+        expr = (a & b) | (c & d)
+        self.assertEqual(count_solutions(expr, [a]), 2)
+        self.assertEqual(count_solutions(expr, [a, b]), 4)
+        self.assertEqual(count_solutions(expr & ~c, [a, b]), 1)
+        self.assertEqual(count_solutions(expr, [a, b], method='bdd'), 4)
+
+    def test_astronomical_counts(self):
+        xs = variables(['x%s' % i for i in range(300)])
+        self.assertEqual(count_solutions(Or(*xs)), 2 ** 300 - 1)
+        # Independent components multiply.
+        expr = And(*(x | y for x, y in zip(xs[::2], xs[1::2])))
+        self.assertEqual(count_solutions(expr), 3 ** 150)
+        self.assertEqual(count_solutions(expr, xs[::2]), 2 ** 150)
+
+    def test_long_chain(self):
+        # Assignments without two adjacent false variables are counted by the Fibonacci
+        # numbers.
+        xs = variables(['x%s' % i for i in range(3000)])
+        expected, previous = 2, 1
+        for i in range(len(xs) - 1):
+            expected, previous = expected + previous, expected
+        self.assertEqual(count_solutions(And(*(x | y for x, y in zip(xs, xs[1:])))), expected)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            count_solutions(a, method='enumerate')
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=500)
+    def test_matches_enumeration(self, expr):
+        expected = len(list(solve_SAT(expr)))
+        self.assertEqual(count_solutions(expr), expected)
+        self.assertEqual(count_solutions(expr, method='bdd'), expected)
+
+    @hypothesis.given(boolean_expressions, st.sets(st.sampled_from(EXAMPLE_VARIABLES)))
+    @hypothesis.settings(max_examples=500)
+    def test_projection_matches_enumeration(self, expr, projected):
+        projected = sorted(projected & get_free_variables(expr), key=str)
+        expected = count_projected_solutions(expr, projected)
+        self.assertEqual(count_solutions(expr, projected), expected)
+        self.assertEqual(count_solutions(expr, projected, method='bdd'), expected)
@@ -0,0 +1,65 @@
+import io
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..dimacs import from_dimacs
+from ..dimacs import to_dimacs
+from ..expressions import is_satisfiable
+from ..expressions import solve_SAT
+from ..expressions import variables
+
+a, b, c = variables('a b c')
+
+
+def write(expr, **kwargs):
+    fileobj = io.StringIO()
+    to_dimacs(expr, fileobj, **kwargs)
+    fileobj.seek(0)
+    return fileobj
+
+
+class TestDimacs(TestCase):
+    def test_format(self):
+        self.assertEqual(write((a | b) & ~c).getvalue(), '\n'.join([
+            'c var 1 a',
+            'c var 2 b',
+            'c var 3 c',
+            'p cnf 3 2',
+            '1 2 0',
+            '-3 0',
+            '',
+        ]))
+
+    @hypothesis.given(boolean_expressions)
+    def test_round_trip(self, expr):
+        expected = set(solve_SAT(expr))
+        self.assertEqual(set(solve_SAT(write(expr))), expected)
+        self.assertEqual(set(from_dimacs(write(expr, tseitin=True)).solve()), expected)
+
+    def test_solver_can_be_extended(self):
+        solver = from_dimacs(write(a | b, tseitin=True))
+        solver.add(~a)
+        self.assertEqual([solution._asdict() for solution in solver.solve()], [
+            {'a': False, 'b': True}])
+
+    def test_unnamed_variables(self):
+        text = '\n'.join([
+            'c A SATLIB style instance',
+            'p cnf 4 3',
+            ' 1 -2',
+            '  0',
+            '2 -3 0',
+            '3 0',
+            '%',
+            '0',
+        ])
+        solutions = list(solve_SAT(io.StringIO(text)))
+        self.assertEqual(len(solutions), 2)
+        for solution in solutions:
+            self.assertEqual((solution.x1, solution.x2, solution.x3), (True, True, True))
+
+    def test_unsatisfiable(self):
+        self.assertFalse(is_satisfiable(write(a & ~a, simplify=False)))
+        self.assertFalse(is_satisfiable(io.StringIO('p cnf 1 2\n1 0\n-1 0\n')))
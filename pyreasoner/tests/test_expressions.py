@@ -1,24 +1,47 @@
+import itertools
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
 import hypothesis
 
 from nose.tools import assert_true
 
+import numpy
+
+import pycosat
+
 from .strategies import boolean_expressions
 from ..expressions import And
+from ..expressions import Budget
 from ..expressions import Eq
 from ..expressions import LessThan
+from ..expressions import MAX_COMPILED_ARGUMENTS
 from ..expressions import Not
 from ..expressions import Or
+from ..expressions import Solver
+from ..expressions import SolverBudgetExceeded
 from ..expressions import Var
+from ..expressions import _InterningMeta
 from ..expressions import convert_to_conjunctive_normal_form
 from ..expressions import eval_expr
+from ..expressions import find_counterexample
+from ..expressions import fold_expr
+from ..expressions import get_depth
 from ..expressions import get_free_variables
+from ..expressions import get_node_count
 from ..expressions import get_truth_table
 from ..expressions import is_conjunctive_normal_form
 from ..expressions import is_logically_equivalent
 from ..expressions import is_satisfiable
 from ..expressions import reify_expr
+from ..expressions import reify_many
 from ..expressions import solve_SAT
 from ..expressions import variables
 
@@ -66,6 +89,48 @@ class TestConstructVariables(TestCase):
             Var('in')  # builtin
 
 
+class TestInterning(TestCase):
+    def test_identical_nodes_are_shared(self):
+        self.assertIs(Var('a'), a)
+        self.assertIs(And(a, b), a & b)
+        self.assertIs(Or(a & b, ~c), (a & b) | ~c)
+        self.assertIs(Not(a & b).distribute_inwards(), ~a | ~b)
+        self.assertIs(Eq(a, 1), Eq(a, 1))
+        self.assertIsNot(Var(), Var())
+
+    def test_constants_of_different_types_are_distinct(self):
+        self.assertIsNot(Eq(a, 1), Eq(a, True))
+        self.assertIsNot(Eq(a, 1), Eq(a, 1.0))
+        self.assertNotEqual(Or(a, True), Or(a, 1))
+
+    def test_hash(self):
+        self.assertEqual(hash(a & b), hash(And(a, b)))
+        self.assertEqual(len({a & b, And(a, b), a | b}), 2)
+
+    def test_unhashable_constants(self):
+        constant = [1]
+        self.assertIs(Eq(a, constant), Eq(a, constant))
+        self.assertIsNot(Eq(a, constant), Eq(a, [1]))
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            a.name = 'b'
+        with self.assertRaises(AttributeError):
+            (a & b).children = (a, )
+        with self.assertRaises(AttributeError):
+            LessThan(a, 1).rhs = 2
+
+    def test_pickle(self):
+        expr = (a & b) | ~(a & b) | Eq(c, 1)
+        self.assertIs(pickle.loads(pickle.dumps(expr)), expr)
+
+    def test_pickle_assignment(self):
+        assignment = next(solve_SAT(a & ~b))
+        loaded = pickle.loads(pickle.dumps(assignment))
+        self.assertEqual(loaded, assignment)
+        self.assertIs(type(loaded), (a & ~b).assignment_class)
+
+
 class TestExpressionBooleanOperations(TestCase):
     def test_operations(self):
         self.assertEqual(a & True, And(a, True))
@@ -132,10 +197,33 @@ class TestConjunctiveNormalForm(TestCase):
         self.assertTrue(
             is_conjunctive_normal_form(convert_to_conjunctive_normal_form(expr)))
 
+    def test_non_boolean_expressions(self):
+        for expr in [a < 1, ~(a < 1), And(a, Not('x')), ~~~Eq(a, 1)]:
+            with self.assertRaises(TypeError):
+                convert_to_conjunctive_normal_form(expr)
+        with self.assertRaises(TypeError):
+            is_satisfiable(~(a < 1))
+
     def test_empty_expressions(self):
         self.assertEqual(convert_to_conjunctive_normal_form(Or()), And(Or()))
         self.assertEqual(convert_to_conjunctive_normal_form(And()), And())
 
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    def test_tseitin_conversion_is_always_cnf(self, expr):
+        self.assertTrue(
+            is_conjunctive_normal_form(convert_to_conjunctive_normal_form(expr, tseitin=True)))
+
+    def test_tseitin_conversion_is_linear(self):
+        xs = variables(['x%s' % i for i in range(20)])
+        ys = variables(['y%s' % i for i in range(20)])
+        expr = Or(*(x & y for x, y in zip(xs, ys)))
+        cnf = convert_to_conjunctive_normal_form(expr, tseitin=True)
+        # 3 clauses for each And, 21 for the Or, and one for the root.
+        self.assertEqual(len(cnf.children), 3 * 20 + 21 + 1)
+        self.assertTrue(is_satisfiable(expr, tseitin=True))
+        self.assertFalse(is_satisfiable(expr & And(*map(Not, xs)), tseitin=True))
+
 
 class TestGetFreeVariables(TestCase):
     def test(self):
@@ -146,6 +234,37 @@ class TestGetFreeVariables(TestCase):
         self.assertEqual(get_free_variables(a & b), {a, b})
         self.assertEqual(get_free_variables(~(a & b)), {a, b})
         self.assertEqual(get_free_variables(~(a | b)), {a, b})
+        self.assertEqual(get_free_variables(Or()), set())
+        self.assertEqual(get_free_variables(True), set())
+
+    def test_cached(self):
+        expr = (a & b) | c
+        self.assertIs(expr.free_variables, expr.free_variables)
+        self.assertIs(expr.assignment_class, expr.assignment_class)
+
+
+class TestMetadata(TestCase):
+    def test_depth(self):
+        self.assertEqual(get_depth(True), 1)
+        self.assertEqual(a.depth, 1)
+        self.assertEqual((~a).depth, 2)
+        self.assertEqual(((a & b) | c).depth, 3)
+        self.assertEqual(Or().depth, 1)
+        self.assertEqual(Eq(a, 1).depth, 2)
+
+    def test_node_count(self):
+        self.assertEqual(get_node_count(True), 1)
+        self.assertEqual(a.node_count, 1)
+        self.assertEqual((~a).node_count, 2)
+        self.assertEqual(((a & b) | (a & b)).node_count, 7)
+        self.assertEqual(Or(a, True).node_count, 3)
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    def test_is_conjunctive_normal_form_is_cached(self, expr):
+        hypothesis.assume(not isinstance(expr, bool))
+        self.assertIs(expr.is_conjunctive_normal_form, is_conjunctive_normal_form(expr))
+        self.assertIs(expr.is_conjunctive_normal_form, expr.is_conjunctive_normal_form)
 
 
 class TestTruthTable(TestCase):
@@ -245,6 +364,35 @@ class TestReify(TestCase):
     def test_idempotency_with_empty_namespace(self, expr):
         self.assertEqual(reify_expr(expr, {}), expr)
 
+    def test_unchanged_subtrees_are_not_rebuilt(self):
+        rules = And(*(Or(Var('x%s' % i), ~Var('y%s' % i)) for i in range(100)))
+        expr = (a | c) & rules
+        with mock.patch.object(
+                _InterningMeta, '__call__', autospec=True,
+                side_effect=_InterningMeta.__call__) as construct:
+            reified = expr.reify(a=b)
+        self.assertIs(reified.children[1], rules)
+        # Only (b | c) and the root are constructed, besides variables for the names in
+        # the namespace.
+        self.assertEqual(
+            [args[0] for args, _ in construct.call_args_list if args[0] is not Var],
+            [Or, And])
+        self.assertIs(reified, (b | c) & rules)
+        self.assertIs(expr.reify(d=True), expr)
+
+    def test_unhashable_constants(self):
+        self.assertIs(Eq(a, [1]).reify(a=2).children[0], 2)
+
+    @hypothesis.given(boolean_expressions)
+    def test_reify_many(self, expr):
+        namespaces = [{}, {'a': True}, {a: False, 'b': c}, {'c': a, 'd': ~e}]
+        self.assertEqual(
+            reify_many(expr, namespaces), [reify_expr(expr, ns) for ns in namespaces])
+        self.assertEqual(reify_many(expr, namespaces)[1], fold_expr(
+            expr, lambda node, children: (
+                node.reify(a=True) if isinstance(node, Var) else type(node)(*children))))
+        self.assertEqual(reify_many(True, [{}, {}]), [True, True])
+
     def assert_permutation_of_variables(self, expr):
         vars = list(get_free_variables(expr))
         hypothesis.assume(len(vars) > 1)
@@ -263,6 +411,44 @@ class TestReify(TestCase):
         self.assert_permutation_of_variables(expr)
 
 
+class TestLogicalEquivalence(TestCase):
+    def test_equivalent(self):
+        self.assertTrue(is_logically_equivalent(~(a & b), ~a | ~b))
+        self.assertTrue(is_logically_equivalent(a | ~a, True))
+        self.assertTrue(is_logically_equivalent(True, Not(False)))
+        self.assertIsNone(find_counterexample(a & (b | c), (a & b) | (a & c)))
+
+    def test_counterexample(self):
+        counterexample = find_counterexample(a | b, a & b)
+        self.assertEqual(counterexample._fields, ('a', 'b'))
+        self.assertNotEqual((a | b).eval(counterexample), (a & b).eval(counterexample))
+        self.assertEqual(find_counterexample(a, b), (False, True))
+        self.assertEqual(find_counterexample(True, False), ())
+
+    def test_many_variables(self):
+        xs = variables(['x%s' % i for i in range(100)])
+        expr1 = Not(Or(*(x & y for x, y in zip(xs, xs[1:]))))
+        expr2 = And(*(~x | ~y for x, y in zip(xs, xs[1:])))
+        self.assertTrue(is_logically_equivalent(expr1, expr2))
+        counterexample = find_counterexample(expr1, expr2 | xs[50])
+        self.assertEqual(len(counterexample), 100)
+        self.assertNotEqual(expr1.eval(counterexample), (expr2 | xs[50]).eval(counterexample))
+
+    def test_relational_expressions_with_many_variables(self):
+        xs = variables(['x%s' % i for i in range(17)])
+        expr = And(*xs[1:]) | Eq(xs[0], True)
+        self.assertTrue(is_logically_equivalent(expr, And(*xs[1:]) | xs[0]))
+        self.assertIsNotNone(find_counterexample(expr, Eq(xs[0], False)))
+
+    @hypothesis.given(boolean_expressions, boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    def test_matches_truth_tables(self, expr1, expr2):
+        miter = Or(And(expr1, Not(expr2)), And(Not(expr1), expr2))
+        differences = set(solve_SAT_truth_table(miter))
+        self.assertEqual(is_logically_equivalent(expr1, expr2), not differences)
+        self.assertEqual(next(solve_SAT(miter, 1, tseitin=True), None) is None, not differences)
+
+
 def solve_SAT_truth_table(expr):
     """
     Solve SAT by building a full truth table.
@@ -319,6 +505,404 @@ class TestSAT(TestCase):
         pycosat_solutions = set(solve_SAT(expr))
         self.assertEqual(truth_table_solutions, pycosat_solutions)
 
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    def test_tseitin_sat_matches_truth_table(self, expr):
+        truth_table_solutions = set(solve_SAT_truth_table(expr))
+        pycosat_solutions = list(solve_SAT(expr, tseitin=True))
+        self.assertEqual(len(pycosat_solutions), len(truth_table_solutions))
+        self.assertEqual(truth_table_solutions, set(pycosat_solutions))
+
+    def test_tseitin_hides_auxiliary_variables(self):
+        expr = (a & b) | (c & d)
+        solutions = list(solve_SAT(expr, tseitin=True))
+        self.assertEqual(len(solutions), 7)
+        for solution in solutions:
+            self.assertEqual(solution._fields, ('a', 'b', 'c', 'd'))
+
+
+class TestCompile(TestCase):
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    @with_examples(CNF_EXPRESSIONS)
+    def test_compiled_matches_eval(self, expr):
+        hypothesis.assume(not isinstance(expr, bool))
+        compiled = expr.compile()
+        for assignment, value in get_truth_table(expr).items():
+            self.assertEqual(compiled(*assignment), value)
+            self.assertEqual(compiled(**assignment._asdict()), value)
+
+    def test_cached(self):
+        expr = a & ~b
+        self.assertIs(expr.compile(), expr.compile())
+
+    def test_empty_operations(self):
+        self.assertIs(And().compile()(), True)
+        self.assertIs(Or().compile()(), False)
+        self.assertIs(Or(a, And()).compile()(a=False), True)
+
+    def test_relational_expressions(self):
+        expr = (a < 5) & Eq(b, 'x') | Eq(c, [1])
+        compiled = expr.compile()
+        self.assertTrue(compiled(a=4, b='x', c=None))
+        self.assertFalse(compiled(a=5, b='x', c=None))
+        self.assertTrue(compiled(a=5, b='y', c=[1]))
+
+    def test_short_circuits(self):
+        # Comparing with None raises a TypeError on python 3, so this would fail if
+        # the right hand side were evaluated.
+        self.assertFalse((b & (a < 5)).compile()(a=None, b=False))
+
+    def test_deep_expressions(self):
+        expr = a
+        for i in range(5000):
+            expr = (expr & b) if i % 2 else (expr | c)
+        compiled = expr.compile()
+        for assignment, value in get_truth_table(expr).items():
+            self.assertEqual(compiled(*assignment), value)
+
+    def test_many_variables(self):
+        names = ['x%s' % i for i in range(MAX_COMPILED_ARGUMENTS + 45)]
+        expr = And(*[Var(name) for name in names])
+        compiled = expr.compile()
+        values = dict.fromkeys(names, True)
+        self.assertIs(compiled(**values), True)
+        self.assertIs(compiled(*[True] * len(names)), True)
+        values['x7'] = False
+        self.assertIs(compiled(**values), False)
+        self.assertIs(compiled(False, **dict.fromkeys(sorted(names)[1:], True)), False)
+        with self.assertRaises(TypeError):
+            compiled(True)
+        with self.assertRaises(TypeError):
+            compiled(True, **values)
+
+    def test_shared_subexpressions(self):
+        expr = a
+        for i in range(10):
+            expr = (expr | b) & (expr | c)
+        compiled = expr.compile()
+        for assignment, value in get_truth_table(expr).items():
+            self.assertEqual(compiled(*assignment), value)
+
+
+class TestSolver(TestCase):
+    def test_queries(self):
+        solver = Solver((a | b) & (~a | c))
+        self.assertTrue(solver.is_satisfiable())
+        self.assertTrue(solver.is_satisfiable(assumptions=[a]))
+        self.assertFalse(solver.is_satisfiable(assumptions=[a, ~c]))
+        self.assertEqual(list(solver.solve(assumptions=[~b])), [(True, False, True)])
+        self.assertEqual(len(list(solver.solve())), 4)
+        self.assertEqual(len(list(solver.solve(num_solutions=2))), 2)
+
+    def test_add(self):
+        solver = Solver(tseitin=True)
+        self.assertEqual(list(solver.solve()), [()])
+        solver.add(a | b)
+        solver.add(~a)
+        self.assertEqual(list(solver.solve()), [(False, True)])
+        solver.add(~b)
+        self.assertFalse(solver.is_satisfiable())
+
+    def test_push_pop(self):
+        solver = Solver(a | b, tseitin=True)
+        solver.push()
+        solver.add(~a & ~(b & c))
+        self.assertEqual(list(solver.solve()), [(False, True, False)])
+        solver.push()
+        solver.add(c)
+        self.assertFalse(solver.is_satisfiable())
+        solver.pop()
+        self.assertTrue(solver.is_satisfiable())
+        solver.pop()
+        self.assertEqual(solver.variables, [a, b])
+        self.assertEqual(set(solver.solve()), {(True, True), (True, False), (False, True)})
+
+    def test_assumptions_are_temporary(self):
+        solver = Solver(a, tseitin=True)
+        self.assertFalse(solver.is_satisfiable(assumptions=[~a | (b & ~b)]))
+        self.assertEqual(solver.variables, [a])
+        self.assertEqual(len(solver.clauses), 1)
+        self.assertEqual(list(solver.solve()), [(True, )])
+
+    def test_solutions_are_lazy(self):
+        solver = Solver(a | b)
+        solutions = solver.solve()
+        solver.add(~a)
+        self.assertEqual(len(list(solutions)), 3)
+
+    def test_solution_arrays(self):
+        solver = Solver(c & (a | b))
+        self.assertEqual(solver.solution_variables, [a, b, c])
+        arrays = list(solver.solve_arrays(batch_size=2))
+        self.assertEqual([array.shape for array in arrays], [(2, 3), (1, 3)])
+        self.assertEqual(
+            set(map(tuple, numpy.concatenate(arrays).tolist())), set(solver.solve()))
+        self.assertEqual(list(Solver().solve_arrays())[0].shape, (1, 0))
+        arrays = list(solver.solve_arrays(assumptions=[~a & d], decompose=True))
+        self.assertEqual(arrays[0].tolist(), [[False, True, True, True]])
+
+    def test_solution_bitsets(self):
+        solver = Solver(c & (a | b))
+        self.assertEqual(sorted(solver.solve_bitsets(batch_size=2)), [0b101, 0b110, 0b111])
+        self.assertEqual(list(solver.solve_bitsets(assumptions=[~b])), [0b101])
+        many = variables(['v%02d' % i for i in range(70)])
+        solver = Solver(And(*many[1:]) & ~many[0])
+        self.assertEqual(list(solver.solve_bitsets()), [(1 << 70) - 2])
+
+    def test_truth_literals(self):
+        self.assertFalse(Solver(Or(False, And())).is_satisfiable(assumptions=[False]))
+        self.assertEqual(Solver(Or(False, a)).clauses, [[1]])
+        self.assertEqual(Solver(And(True, a, Or(True, b)), tseitin=True).clauses, [[1]])
+
+    def test_non_boolean_expressions(self):
+        with self.assertRaises(TypeError):
+            Solver(a & Eq(b, 1), tseitin=True)
+
+    @hypothesis.given(boolean_expressions, boolean_expressions)
+    @hypothesis.settings(max_examples=500)
+    def test_matches_solve_SAT(self, base, query):
+        for tseitin in [False, True]:
+            solver = Solver(base, tseitin=tseitin)
+            self.assertEqual(
+                set(solver.solve(assumptions=[query])), set(solve_SAT(base & query)))
+            self.assertEqual(set(solver.solve()), set(solve_SAT(base)))
+
+
+class TestDecomposition(TestCase):
+    def test_independent_parts(self):
+        parts = [Or(*variables('x%s y%s' % (i, i))) for i in range(12)]
+        solutions = solve_SAT(And(*parts), decompose=True)
+        # The 3 ** 12 products are found lazily.
+        first = list(itertools.islice(solutions, 5))
+        self.assertEqual(len(set(first)), 5)
+        self.assertTrue(all(And(*parts).eval(solution._asdict()) for solution in first))
+
+    def test_unsatisfiable_part_short_circuits(self):
+        solver = Solver(And(a, ~a, *(Or(*variables('x%s y%s' % (i, i))) for i in range(5))),
+                        simplify=False)
+        with mock.patch('pycosat.solve', side_effect=pycosat.solve) as solve:
+            self.assertFalse(solver.is_satisfiable(decompose=True))
+        self.assertEqual(solve.call_count, 1)
+        self.assertFalse(Solver(False).is_satisfiable(decompose=True))
+
+    def test_unconstrained_variables(self):
+        expr = (a | ~a) & b
+        self.assertEqual(set(solve_SAT(expr, decompose=True)), set(solve_SAT(expr)))
+        self.assertEqual(len(list(solve_SAT(expr, decompose=True))), 2)
+
+    def test_executor(self):
+        expr = (a | b) & (c | ~d) & ~e
+        with ThreadPoolExecutor(2) as executor:
+            solutions = list(Solver(expr).solve(decompose=True, executor=executor))
+        self.assertEqual(set(solutions), set(solve_SAT(expr)))
+
+    @hypothesis.given(boolean_expressions)
+    def test_matches_solve_SAT(self, expr):
+        for tseitin in [False, True]:
+            solutions = list(solve_SAT(expr, tseitin=tseitin, decompose=True))
+            self.assertEqual(len(solutions), len(set(solutions)))
+            self.assertEqual(set(solutions), set(solve_SAT(expr)))
+            budget = Budget(timeout=60)
+            self.assertEqual(
+                set(solve_SAT(expr, tseitin=tseitin, budget=budget, decompose=True)),
+                set(solutions))
+
+
+class TestProjection(TestCase):
+    def test_projected_solutions(self):
+        expr = (a | b | c) & (d | e)
+        solutions = list(solve_SAT(expr, project=[b, a]))
+        self.assertEqual(
+            sorted(tuple(solution._asdict().items()) for solution in solutions),
+            sorted({tuple((name, value) for name, value in solution._asdict().items()
+                          if name in 'ab')
+                    for solution in solve_SAT(expr)}))
+        self.assertEqual(solutions[0]._fields, ('a', 'b'))
+
+    def test_solver_calls(self):
+        x = variables(' '.join('x%s' % i for i in range(10)))
+        solver = Solver(And(a | b, *(x_i | ~a for x_i in x)))
+        self.assertEqual(len(list(solver.solve(project=[a, b], count_saved=True))), 3)
+        # One call per projected solution, and one which finds no more.
+        self.assertEqual(solver.statistics['projected_solver_calls'], 4)
+        self.assertEqual(solver.statistics['projected_solver_calls_saved'], 2 ** 10 + 2 - 3)
+
+    def test_assumptions_and_budget(self):
+        solver = Solver(a | b)
+        self.assertEqual(
+            sorted(solution.c for solution in solver.solve(assumptions=[c | ~b], project=[c])),
+            [False, True])
+        self.assertEqual(
+            [solution.c for solution in solver.solve(assumptions=[c & ~b], project=[c])],
+            [True])
+        solver = Solver(make_pigeonhole_expression(8), budget=Budget(prop_limit=100))
+        with self.assertRaises(SolverBudgetExceeded):
+            list(solver.solve(project=[Var('p0_0')]))
+
+    def test_unconstrained_and_decompose(self):
+        self.assertEqual(
+            sorted(solution.c for solution in Solver(a).solve(project=[c])), [False, True])
+        with self.assertRaises(ValueError):
+            list(Solver(a).solve(project=[a], decompose=True))
+
+    def test_arrays(self):
+        arrays = list(Solver(a & (b | c)).solve_arrays(project=[c, a]))
+        self.assertEqual(sorted(map(tuple, numpy.concatenate(arrays).tolist())),
+                         [(True, False), (True, True)])
+
+    @hypothesis.given(boolean_expressions)
+    def test_matches_solve_SAT(self, expr):
+        for tseitin in [False, True]:
+            projected = list(solve_SAT(expr, tseitin=tseitin, project=[a]))
+            self.assertEqual(len(projected), len(set(projected)))
+            expected = set()
+            for solution in solve_SAT(expr):
+                values = solution._asdict()
+                expected.update([values['a']] if 'a' in values else [False, True])
+            self.assertEqual({solution.a for solution in projected}, expected)
+
+
+def make_pigeonhole_expression(num_holes):
+    """
+    Returns the unsatisfiable expression that ``num_holes + 1`` pigeons fit in
+    ``num_holes`` holes with at most one pigeon each, which is hard for SAT solvers.
+    """
+    holes = [
+        variables(['p%s_%s' % (pigeon, hole) for hole in range(num_holes)])
+        for pigeon in range(num_holes + 1)]
+    return And(*[Or(*pigeon) for pigeon in holes] + [
+        ~pigeon1[hole] | ~pigeon2[hole]
+        for hole in range(num_holes)
+        for i, pigeon1 in enumerate(holes) for pigeon2 in holes[i + 1:]])
+
+
+class TestBudget(TestCase):
+    def test_prop_limit(self):
+        expr = make_pigeonhole_expression(9)
+        with self.assertRaises(SolverBudgetExceeded):
+            is_satisfiable(expr, budget=Budget(prop_limit=1000))
+        self.assertTrue(is_satisfiable(a & ~b, budget=Budget(prop_limit=1000)))
+
+    def test_timeout(self):
+        solver = Solver(make_pigeonhole_expression(10), budget=Budget(timeout=0.2))
+        start = time.time()
+        with self.assertRaises(SolverBudgetExceeded):
+            solver.is_satisfiable()
+        self.assertLess(time.time() - start, 2)
+
+    def test_timeout_with_prop_limit(self):
+        expr = make_pigeonhole_expression(10)
+        with self.assertRaises(SolverBudgetExceeded):
+            is_satisfiable(expr, budget=Budget(timeout=10, prop_limit=1000))
+
+    def test_size_limits(self):
+        # The conjunctive normal form has 2 ** 10 clauses.
+        expr = Or(*(And(*variables('x%s y%s' % (i, i))) for i in range(10)))
+        with self.assertRaises(SolverBudgetExceeded):
+            Solver(expr, simplify=False, budget=Budget(max_clauses=100))
+        with self.assertRaises(SolverBudgetExceeded):
+            Solver(expr, tseitin=True, budget=Budget(max_variables=25))
+        with self.assertRaises(SolverBudgetExceeded):
+            Solver(expr, budget=Budget(conversion_timeout=0))
+        solver = Solver(expr, tseitin=True, budget=Budget(max_variables=31))
+        self.assertTrue(solver.is_satisfiable())
+
+    def test_variable_limit(self):
+        xs = variables(['x%s' % i for i in range(100)])
+        for tseitin in [False, True]:
+            with self.assertRaises(SolverBudgetExceeded):
+                is_satisfiable(Or(*xs), tseitin=tseitin, budget=Budget(max_variables=5))
+        solver = Solver(a | b, budget=Budget(max_variables=3))
+        with self.assertRaises(SolverBudgetExceeded):
+            solver.add(c | d)
+        self.assertEqual(solver.variables, [a, b])
+
+    def test_size_limits_for_clauses(self):
+        clauses = [[i, i + 1] for i in range(1, 51)]
+        names = {index: Var('x%s' % index) for index in range(1, 52)}
+        for budget in [Budget(max_clauses=5), Budget(max_variables=5)]:
+            with self.assertRaises(SolverBudgetExceeded):
+                Solver.from_clauses(iter(clauses), names, budget=budget)
+            with self.assertRaises(SolverBudgetExceeded):
+                Solver.from_clauses(iter(clauses), {}, budget=budget)
+        solver = Solver.from_clauses(clauses, names, budget=Budget(max_clauses=50))
+        self.assertTrue(solver.is_satisfiable())
+
+    def test_size_limits_do_not_limit_solving(self):
+        expr = make_pigeonhole_expression(6)
+        self.assertFalse(is_satisfiable(expr, budget=Budget(max_clauses=1000)))
+
+    def test_rolls_back_constraints_over_budget(self):
+        solver = Solver(a | b, budget=Budget(max_clauses=3))
+        with self.assertRaises(SolverBudgetExceeded):
+            solver.add((c & d) | (d & e) | (c & e))
+        self.assertEqual(solver.variables, [a, b])
+        self.assertEqual(len(list(solver.solve())), 3)
+
+    @hypothesis.given(boolean_expressions)
+    def test_matches_solve_SAT(self, expr):
+        for tseitin in [False, True]:
+            self.assertEqual(
+                set(solve_SAT(expr, tseitin=tseitin, budget=Budget(timeout=60))),
+                set(solve_SAT(expr)))
+
+
+def make_deep_expression(depth):
+    """
+    Returns an expression with ``depth`` alternating And and Or nodes, nested deeper
+    than the recursion limit.
+    """
+    expr = a
+    for i in range(depth):
+        expr = (expr & ~b) if i % 2 else (expr | Not(c))
+    return expr
+
+
+class TestDeepExpressions(TestCase):
+    depth = 20000
+
+    def setUp(self):
+        self.expr = make_deep_expression(self.depth)
+
+    def test_metadata(self):
+        self.assertEqual(get_depth(self.expr), self.depth + 2)
+        self.assertEqual(get_node_count(self.expr), 3 * self.depth + 1)
+        self.assertEqual(get_free_variables(self.expr), {a, b, c})
+
+    def test_str(self):
+        self.assertTrue(str(self.expr).startswith('(' * self.depth + 'a | ~c) & ~b)'))
+
+    def test_eval_and_reify(self):
+        self.assertIs(self.expr.eval(a=False, b=False, c=False), True)
+        self.assertIs(self.expr.reify(a=False, b=False, c=False).eval(), True)
+        reified = self.expr.reify(a=True)
+        self.assertEqual(get_free_variables(reified), {b, c})
+        self.assertEqual(get_node_count(reified), get_node_count(self.expr))
+
+    def test_negation(self):
+        expr = a
+        for _ in range(self.depth):
+            expr = Not(expr | b)
+        # Only the outermost negation is pushed inwards.
+        self.assertIs(expr.distribute_inwards().children[1], ~b)
+        # ~(~(x | b) | b) is x & ~b, so pairs of levels cancel out.
+        self.assertTrue(is_logically_equivalent(expr, a & ~b))
+
+    def test_conjunctive_normal_form(self):
+        # Or(...) rather than |, which would flatten the children.
+        expr = a
+        for i in range(self.depth):
+            expr = Or(expr, b) if i % 2 else Not(And(Not(expr), ~c))
+        cnf = convert_to_conjunctive_normal_form(expr)
+        self.assertEqual(len(cnf.children), 1)
+        self.assertEqual(len(cnf.children[0].children), self.depth + 1)
+        self.assertEqual(get_free_variables(cnf), {a, b, c})
+
+    def test_solving(self):
+        self.assertEqual(set(solve_SAT(self.expr, tseitin=True)), set(
+            assignment for assignment, value in get_truth_table(self.expr).items() if value))
+
 
 class TestRelationalExpressions(TestCase):
     def test_equality(self):
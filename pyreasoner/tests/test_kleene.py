@@ -0,0 +1,75 @@
+import pickle
+from unittest import TestCase
+
+import hypothesis
+from hypothesis import strategies as st
+
+from .strategies import EXAMPLE_VARIABLES
+from .strategies import boolean_expressions
+from ..expressions import And
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import Or
+from ..expressions import eval_expr
+from ..expressions import get_free_variables
+from ..expressions import get_node_count
+from ..expressions import is_logically_equivalent
+from ..expressions import reify_expr
+from ..expressions import variables
+from ..kleene import UNKNOWN
+from ..kleene import partial_eval
+
+a, b, c = variables('a b c')
+
+
+def make_chain(length):
+    expr = a
+    for i in range(length):
+        expr = b | Not(expr)
+    return expr
+
+
+class TestPartialEval(TestCase):
+    def test_short_circuits(self):
+        huge = make_chain(1000)
+        result = partial_eval(And(c, huge), c=False)
+        self.assertEqual(result, (False, False, 2))
+        result = partial_eval(Or(huge, c), c=True, b=True)
+        # The outermost Or of the chain is True because of b.
+        self.assertEqual(result, (True, True, 3))
+
+    def test_residual(self):
+        result = partial_eval((a & b) | ~c | (b & ~~a), a=True)
+        self.assertIs(result.value, UNKNOWN)
+        self.assertIs(result.residual, Or(b, ~c, b))
+        self.assertIs(partial_eval(~~a).residual, a)
+        self.assertEqual(partial_eval(a & b, {a: True, 'b': True}).value, True)
+
+    def test_relations(self):
+        self.assertEqual(partial_eval(LessThan(a, b) & c, a=1, b=2).residual, c)
+        self.assertEqual(partial_eval(LessThan(a, b) | c, a=1).residual, LessThan(1, b) | c)
+        with self.assertRaises(TypeError):
+            partial_eval(a & b, a=1)
+
+    def test_deep_expression(self):
+        expr = make_chain(5000)
+        self.assertEqual(partial_eval(expr, a=True, b=False), (True, True, 10002))
+        self.assertEqual(partial_eval(expr, b=False).residual, a)
+
+    def test_pickle_unknown(self):
+        self.assertIs(pickle.loads(pickle.dumps(UNKNOWN)), UNKNOWN)
+
+    @hypothesis.given(
+        boolean_expressions, st.dictionaries(st.sampled_from('abcdef'), st.booleans()))
+    def test_matches_eval(self, expr, namespace):
+        result = partial_eval(expr, namespace)
+        self.assertLessEqual(result.nodes_visited, get_node_count(expr))
+        if result.value is UNKNOWN:
+            self.assertTrue(is_logically_equivalent(result.residual, reify_expr(expr, namespace)))
+            self.assertTrue(set(get_free_variables(result.residual)).isdisjoint(
+                var for var in EXAMPLE_VARIABLES if var.name in namespace))
+        else:
+            self.assertIs(result.value, result.residual)
+            full = dict.fromkeys('abcdef', False)
+            full.update(namespace)
+            self.assertIs(result.value, eval_expr(expr, full))
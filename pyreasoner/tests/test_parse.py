@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import Or
+from ..expressions import variables
+from ..parse import ParseError
+from ..parse import parse
+from ..parse import parse_many
+
+a, b, c, d = variables('a b c d')
+
+
+class TestParse(TestCase):
+    def test_atoms(self):
+        self.assertIs(parse('a'), a)
+        self.assertIs(parse(' True '), True)
+        self.assertIs(parse('False'), False)
+
+    def test_precedence(self):
+        self.assertIs(parse('a | b & ~c'), Or(a, And(b, Not(c))))
+        self.assertIs(parse('~a & b | c'), Or(And(Not(a), b), c))
+        self.assertIs(parse('~(a | b)'), Not(Or(a, b)))
+        self.assertIs(parse('~~a'), Not(Not(a)))
+        self.assertIs(parse('a < 5 | b'), LessThan(a, Or(5, b)))
+
+    def test_chains_are_flattened(self):
+        self.assertIs(parse('a | b | c | d'), Or(a, b, c, d))
+        self.assertIs(parse('a & b | c & d & a'), Or(And(a, b), And(c, d, a)))
+        self.assertIs(parse('(a | b) | c'), Or(Or(a, b), c))
+        self.assertIs(parse('((((a))))'), a)
+
+    def test_comparisons(self):
+        self.assertIs(parse('(a < 5) & (b == "x")'), And(LessThan(a, 5), Eq(b, 'x')))
+        self.assertIs(parse('a > -2.5'), LessThan(-2.5, a))
+        self.assertIs(parse("c == 'it\\'s'"), Eq(c, "it's"))
+        self.assertIs(parse('1e3 == d'), Eq(1000.0, d))
+        self.assertEqual(type(parse('a == 10').rhs), int)
+
+    def test_errors(self):
+        for text in ['', 'a &', '& a', 'a b', '(a | b', 'a | b)', 'a < b < c', 'a + b', '~']:
+            with self.assertRaises(ParseError):
+                parse(text)
+        with self.assertRaises(ParseError) as context:
+            parse('a & (b | $)')
+        self.assertEqual(context.exception.position, 9)
+        for name in ['and', 'None', '_x']:
+            with self.assertRaises(ParseError) as context:
+                parse('a | %s' % name)
+            self.assertEqual(context.exception.position, 4)
+
+    def test_deep_nesting(self):
+        expr = parse('~(' * 5000 + 'a' + ')' * 5000)
+        self.assertEqual(expr.depth, 5001)
+
+    def test_parse_many(self):
+        lines = ['a & b\n', '\n', '# A comment\n', '  ~c | d  \n']
+        self.assertEqual(list(parse_many(lines)), [And(a, b), Or(Not(c), d)])
+
+    @hypothesis.given(boolean_expressions)
+    def test_round_trip(self, expr):
+        text = str(expr)
+        if 'Not(' not in text:
+            self.assertIs(parse(text), expr)
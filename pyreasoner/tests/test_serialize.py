@@ -0,0 +1,99 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import eval_expr
+from ..expressions import variables
+from ..serialize import ExpressionTable
+from ..serialize import dump
+from ..serialize import dumps
+from ..serialize import load
+from ..serialize import load_mmap
+from ..serialize import loads
+
+a, b, c = variables('a b c')
+
+
+class TestSerialize(TestCase):
+    def test_constants(self):
+        for value in [True, False, 1, 1.0, -0.5, 2 ** 70, 'x', None]:
+            loaded = loads(dumps(Eq(a, value)))
+            self.assertIs(loaded, Eq(a, value))
+            self.assertIs(type(loaded.rhs), type(value))
+        self.assertIs(loads(dumps(True)), True)
+
+    def test_relations(self):
+        expr = LessThan(a, 2.5) | Eq(b, 'on') | ~LessThan(0, c)
+        self.assertIs(loads(dumps(expr)), expr)
+
+    def test_sharing(self):
+        expr = a & b
+        for i in range(100):
+            expr = Not(expr) | expr
+        table = ExpressionTable(dumps(expr))
+        self.assertEqual(len(table), 3 + 2 * 100)
+        self.assertIs(table.to_expression(), expr)
+
+    def test_chunks(self):
+        expr = a
+        for i in range(50):
+            expr = Not(expr) & Eq(b, i)
+        table = ExpressionTable(dumps(expr))
+        table.CHUNK_SIZE = 7
+        self.assertIs(table.to_expression(), expr)
+        self.assertIs(table.eval(a=True, b=1), eval_expr(expr, {'a': True, 'b': 1}))
+
+    def test_constants_are_decoded_when_used(self):
+        table = ExpressionTable(dumps(Eq(a, 'x') | Eq(b, 2)))
+        self.assertEqual(len(table.constants), 4)
+        self.assertEqual(table.constants[1], 'x')
+        self.assertEqual(sorted(table.constants.decoded), [1])
+        with self.assertRaises(IndexError):
+            table.constants[4]
+
+    def test_unserializable(self):
+        with self.assertRaises(ValueError):
+            dumps(Eq(a, [1]))
+        with self.assertRaises(ValueError):
+            loads(b'junk' * 10)
+
+    def test_file(self):
+        fileobj = io.BytesIO()
+        dump(a & ~b, fileobj)
+        fileobj.seek(0)
+        self.assertIs(load(fileobj), a & ~b)
+
+    def test_mmap(self):
+        expr = (a & LessThan(b, 3)) | Eq(c, 'x')
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'expr.bin')
+            with open(path, 'wb') as fileobj:
+                dump(expr, fileobj)
+            table = load_mmap(path)
+            self.assertIs(table.eval(a=True, b=2, c='y'), True)
+            self.assertIs(table.eval(a=False, b=2, c='y'), False)
+            self.assertIs(table.eval(a=False, c='y'), expr.eval(a=False, c='y'))
+        finally:
+            shutil.rmtree(directory)
+
+    @hypothesis.given(boolean_expressions)
+    def test_round_trip(self, expr):
+        data = dumps(expr)
+        self.assertIs(loads(data), expr)
+        namespace = {'a': True, 'b': False}
+        self.assertIs(ExpressionTable(data).eval(namespace), eval_expr(expr, namespace))
+
+    def test_deep_expression(self):
+        expr = a
+        for i in range(5000):
+            expr = Not(expr) & b
+        self.assertIs(loads(dumps(expr)), expr)
@@ -136,3 +136,28 @@ class TestSetOperations(TestCase):
         self.assertIn(1, INT_0_2 | INT_2_3)
         self.assertIn(2.5, INT_0_2 | INT_2_3)
         self.assertNotIn(2, INT_0_2 | INT_2_3)
+
+
+class _UncheckableSet(DiscreteSet):
+    def __contains__(self, item):
+        raise AssertionError('Membership should have been short-circuited')
+
+
+class TestNestedSets(TestCase):
+    def test_short_circuits(self):
+        self.assertIn(1, Union(INT_0_2, _UncheckableSet([])))
+        self.assertNotIn(3, Intersection(INT_0_2, _UncheckableSet([])))
+        self.assertNotIn(1, Union())
+        self.assertIn(1, Intersection())
+
+    def test_deeply_nested_sets(self):
+        nested = INT_0_2
+        for _ in range(5000):
+            nested = Union(Intersection(nested, INT_0_1), INT_4_5)
+        self.assertIn(0.5, nested)
+        self.assertIn(4.5, nested)
+        self.assertNotIn(1.5, nested)
+        self.assertTrue(repr(nested).startswith('((' * 5000 + '(0, 2)∩(0, 1))∪(4, 5))'))
+        constraints = nested.get_constraints(a)
+        self.assertTrue(constraints.eval(a=0.5))
+        self.assertFalse(constraints.eval(a=1.5))
@@ -0,0 +1,98 @@
+import collections
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Not
+from ..expressions import Or
+from ..expressions import Solver
+from ..expressions import get_node_count
+from ..expressions import is_logically_equivalent
+from ..expressions import solve_SAT
+from ..expressions import variables
+from ..simplify import remove_subsumed_clauses
+from ..simplify import simplify
+
+a, b, c, d = variables('a b c d')
+
+
+class TestSimplify(TestCase):
+    def test_constant_folding(self):
+        self.assertIs(simplify(a & False), False)
+        self.assertIs(simplify(a | True), True)
+        self.assertIs(simplify(And(True, a)), a)
+        self.assertIs(simplify(Or(False, a, b)), Or(a, b))
+        self.assertIs(simplify(Not(Or())), True)
+        self.assertIs(simplify(Eq(1, 1)), True)
+        self.assertIs(simplify(LessThan(a, 1) | Eq(1, 2)), LessThan(a, 1))
+
+    def test_flattening(self):
+        self.assertIs(simplify(And(a, And(b, And(c, d)))), And(a, b, c, d))
+        self.assertIs(simplify(Or(a, Not(Not(Or(b, c))))), Or(a, b, c))
+
+    def test_duplicates_and_complements(self):
+        self.assertIs(simplify(And(a, b, a)), And(a, b))
+        self.assertIs(simplify(a & ~a & b), False)
+        self.assertIs(simplify((a & b) | c | ~(a & b)), True)
+
+    def test_absorption(self):
+        self.assertIs(simplify(a & (a | b)), a)
+        self.assertIs(simplify(a | (a & b) | (c & d)), a | (c & d))
+        self.assertIs(simplify(~a & (b | ~a) & c), ~a & c)
+
+    def test_statistics(self):
+        stats = collections.Counter()
+        simplify(And(a, And(b, c, True), a | c, Not(Not(d)), d), stats)
+        self.assertEqual(stats, {
+            'constant_folding': 1, 'flattening': 1, 'double_negation': 1,
+            'duplicates': 1, 'absorption': 1})
+
+    def test_shared_subexpressions(self):
+        shared = a | b
+        for _ in range(30):
+            shared = (shared | c) & (shared | d)
+        # Each shared subexpression is only simplified once.
+        self.assertIs(simplify(shared), shared)
+        self.assertIs(simplify(shared & a), shared & a)
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=500)
+    def test_equivalent(self, expr):
+        simplified = simplify(expr)
+        self.assertTrue(is_logically_equivalent(simplified, expr))
+        self.assertLessEqual(get_node_count(simplified), get_node_count(expr))
+        self.assertIs(simplify(simplified), simplified)
+
+
+class TestRemoveSubsumedClauses(TestCase):
+    def test_remove_subsumed_clauses(self):
+        stats = collections.Counter()
+        self.assertEqual(
+            remove_subsumed_clauses([[1, 2, 3], [2, -4], [3, 1], [-4, 2, 5], [1, 3]], stats),
+            [[2, -4], [3, 1]])
+        self.assertEqual(stats['subsumption'], 3)
+        self.assertEqual(remove_subsumed_clauses([[1, 2], [], [3]]), [[]])
+
+
+class TestSolverSimplification(TestCase):
+    def test_eliminated_variables_are_enumerated(self):
+        self.assertEqual(len(list(solve_SAT(a | ~a | b))), 4)
+        self.assertEqual(len(list(solve_SAT((a | ~a) & b, tseitin=True))), 2)
+
+    def test_statistics(self):
+        solver = Solver((a | b) & (a | b | c) & (a | a))
+        self.assertEqual(solver.clauses, [[1]])
+        self.assertEqual(solver.statistics['absorption'], 2)
+        self.assertEqual(Solver((a | b | c) & (a | b), simplify=False).clauses,
+                         [[1, 2, 3], [1, 2]])
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=300)
+    def test_same_solutions(self, expr):
+        expected = set(solve_SAT(expr, simplify=False))
+        self.assertEqual(set(solve_SAT(expr)), expected)
+        self.assertEqual(set(solve_SAT(expr, tseitin=True)), expected)
@@ -0,0 +1,84 @@
+import itertools
+from unittest import TestCase
+
+import hypothesis
+
+from .strategies import boolean_expressions
+from ..expressions import And
+from ..expressions import Eq
+from ..expressions import LessThan
+from ..expressions import Or
+from ..expressions import eval_expr
+from ..expressions import get_assignment_class
+from ..expressions import variables
+from ..truth_tables import get_packed_truth_table
+
+a, b, c = variables('a b c')
+
+
+def get_truth_table_by_enumeration(expr):
+    Assignment = get_assignment_class(expr)
+    assignments = itertools.starmap(
+        Assignment, itertools.product((True, False), repeat=len(Assignment._fields)))
+    return {
+        assignment: bool(eval_expr(expr, assignment._asdict())) for assignment in assignments
+    }
+
+
+class TestPackedTruthTable(TestCase):
+    def test_row_order(self):
+        table = get_packed_truth_table(a & ~b)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(list(table.values()), [False, False, True, False])
+        self.assertEqual(list(table), [(False, False), (False, True), (True, False), (True, True)])
+
+    def test_lookup(self):
+        table = get_packed_truth_table(a & ~b)
+        self.assertTrue(table[(True, False)])
+        self.assertTrue(table[table.assignment_class(a=True, b=False)])
+        self.assertTrue(table[{'a': True, 'b': False}])
+        self.assertFalse(table[{'a': True, 'b': True}])
+        with self.assertRaises(ValueError):
+            table[(True, )]
+
+    def test_constants(self):
+        self.assertEqual(get_packed_truth_table(True).to_dict(), {(): True})
+        self.assertEqual(get_packed_truth_table(Or()).to_dict(), {(): False})
+        self.assertEqual(get_packed_truth_table(And()).count(), 1)
+
+    def test_relational_expressions(self):
+        self.assertEqual(
+            get_packed_truth_table(Eq(a, b) | LessThan(c, 1)).to_dict(),
+            get_truth_table_by_enumeration(Eq(a, b) | LessThan(c, 1)))
+        self.assertEqual(get_packed_truth_table(Eq(a, 'x')).count(), 0)
+
+    def test_many_variables(self):
+        xs = variables(['x%s' % i for i in range(20)])
+        table = get_packed_truth_table(Or(*xs) & ~(xs[0] & xs[19]))
+        self.assertEqual(table.count(), 2 ** 20 - 1 - 2 ** 18)
+        self.assertFalse(table[[False] * 20])
+        self.assertTrue(table[[True] + [False] * 19])
+        self.assertFalse(table[[True] * 20])
+
+    def test_iter_solutions(self):
+        expr = (a | b) & ~c
+        table = get_packed_truth_table(expr)
+        self.assertEqual(list(table.iter_solutions()), [
+            (False, True, False), (True, False, False), (True, True, False)])
+        self.assertEqual(table.count(), 3)
+
+    def test_equality(self):
+        self.assertEqual(get_packed_truth_table(~(a & b)), get_packed_truth_table(~a | ~b))
+        self.assertNotEqual(get_packed_truth_table(~(a & b)), get_packed_truth_table(~a & ~b))
+        self.assertNotEqual(get_packed_truth_table(a), get_packed_truth_table(b))
+
+    @hypothesis.given(boolean_expressions)
+    @hypothesis.settings(max_examples=1000)
+    def test_matches_enumeration(self, expr):
+        table = get_packed_truth_table(expr)
+        expected = get_truth_table_by_enumeration(expr)
+        self.assertEqual(table.to_dict(), expected)
+        self.assertEqual(table.count(), sum(expected.values()))
+        self.assertEqual(
+            set(table.iter_solutions()),
+            {assignment for assignment, value in expected.items() if value})
@@ -0,0 +1,202 @@
+from __future__ import absolute_import, division, unicode_literals
+
+import itertools
+from functools import reduce
+
+import numpy
+
+from .expressions import And
+from .expressions import BinaryExpression
+from .expressions import Not
+from .expressions import Or
+from .expressions import Var
+from .expressions import fold_expr
+from .expressions import get_assignment_class
+
+WORD_BITS = 64
+ALL_ONES = numpy.uint64(2 ** WORD_BITS - 1)
+
+# Rows are packed into little-endian 64 bit words, so row ``r`` is bit ``r % 64`` of
+# word ``r // 64``. Variables whose value changes more often than once per word have a
+# pattern which is the same in every word, e.g. 0b1010...10 for the last variable.
+SUBWORD_PATTERNS = [
+    numpy.uint64(sum(1 << bit for bit in range(WORD_BITS) if (bit >> k) & 1))
+    for k in range(6)
+]
+
+if hasattr(numpy, 'bitwise_count'):
+    def _popcount(words):
+        return int(numpy.bitwise_count(words).sum())
+else:  # pragma: no cover
+    _BYTE_POPCOUNTS = numpy.array([bin(i).count('1') for i in range(256)], dtype=numpy.uint8)
+
+    def _popcount(words):
+        return int(_BYTE_POPCOUNTS[words.view(numpy.uint8)].sum(dtype=numpy.int64))
+
+
+class PackedTruthTable(object):
+    """
+    The truth table of an expression, stored as one bit per assignment.
+
+    Assignments are ordered as binary numbers over the alphabetically ordered
+    variables, with the first variable as the most significant bit and False as 0.
+    So for variables ``(a, b)``, the rows are ``(F, F), (F, T), (T, F), (T, T)``.
+    """
+
+    def __init__(self, assignment_class, words):
+        self.assignment_class = assignment_class
+        self.words = words
+
+    @property
+    def num_variables(self):
+        return len(self.assignment_class._fields)
+
+    def __len__(self):
+        return 2 ** self.num_variables
+
+    def get_index(self, assignment):
+        """
+        Returns the row of ``assignment``, which may be an ``assignment_class`` instance,
+        a sequence of truth values in the same order, or a ``{name: value}`` dict.
+        """
+        if isinstance(assignment, dict):
+            assignment = [assignment[name] for name in self.assignment_class._fields]
+        if len(assignment) != self.num_variables:
+            raise ValueError('Expected %s truth values, got %r' % (
+                self.num_variables, assignment))
+        return reduce(lambda index, value: 2 * index + bool(value), assignment, 0)
+
+    def __getitem__(self, assignment):
+        index = self.get_index(assignment)
+        return bool((int(self.words[index // WORD_BITS]) >> (index % WORD_BITS)) & 1)
+
+    def count(self):
+        """
+        Returns the number of satisfying assignments.
+        """
+        return _popcount(self.words)
+
+    def values(self):
+        """
+        Returns a boolean array of the truth value of each row.
+        """
+        # Shifts rather than numpy.unpackbits, whose bitorder argument needs numpy 1.17,
+        # which does not support python 2.
+        shifts = numpy.arange(WORD_BITS, dtype=numpy.uint64)
+        bits = (self.words[:, numpy.newaxis] >> shifts) & numpy.uint64(1)
+        return bits.ravel()[:len(self)].astype(bool)
+
+    def __iter__(self):
+        return itertools.starmap(
+            self.assignment_class,
+            itertools.product((False, True), repeat=self.num_variables))
+
+    def items(self):
+        return zip(self, (bool(value) for value in self.values()))
+
+    def iter_solutions(self):
+        """
+        Yields the satisfying assignments in row order.
+        """
+        fields = self.assignment_class._fields
+        for index in numpy.flatnonzero(self.values()):
+            index = int(index)
+            yield self.assignment_class(*(
+                bool((index >> (len(fields) - 1 - i)) & 1) for i in range(len(fields))))
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, PackedTruthTable) and
+            self.assignment_class._fields == other.assignment_class._fields and
+            numpy.array_equal(self.words, other.words))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'PackedTruthTable(%s, %s/%s true)' % (
+            ', '.join(self.assignment_class._fields), self.count(), len(self))
+
+
+class _Evaluator(object):
+    """
+    Evaluates an expression over every row of a truth table at once.
+
+    Intermediate values are either packed arrays of words, or constants for
+    subexpressions without free variables.
+    """
+
+    def __init__(self, variables):
+        self.num_rows = 2 ** len(variables)
+        self.num_words = max(1, self.num_rows // WORD_BITS)
+        self.positions = {
+            var: len(variables) - 1 - i for i, var in enumerate(variables)}
+
+    def get_variable_words(self, var):
+        k = self.positions[var]
+        if k < 6:
+            return numpy.full(self.num_words, SUBWORD_PATTERNS[k], dtype=numpy.uint64)
+        is_set = (numpy.arange(self.num_words) >> (k - 6)) & 1
+        return numpy.where(is_set.astype(bool), ALL_ONES, numpy.uint64(0))
+
+    def to_words(self, value):
+        if isinstance(value, numpy.ndarray):
+            return value
+        return numpy.full(
+            self.num_words, ALL_ONES if value else numpy.uint64(0), dtype=numpy.uint64)
+
+    def apply_binary(self, function, lhs, rhs):
+        if not isinstance(lhs, numpy.ndarray) and not isinstance(rhs, numpy.ndarray):
+            return function(lhs, rhs)
+        # Boolean inputs only take two values, so the result can be computed from the
+        # truth table of the function restricted to those values.
+        result = numpy.zeros(self.num_words, dtype=numpy.uint64)
+        lhs_values = (False, True) if isinstance(lhs, numpy.ndarray) else (lhs, )
+        rhs_values = (False, True) if isinstance(rhs, numpy.ndarray) else (rhs, )
+        for lhs_value, rhs_value in itertools.product(lhs_values, rhs_values):
+            if function(lhs_value, rhs_value):
+                mask = numpy.full(self.num_words, ALL_ONES, dtype=numpy.uint64)
+                for words, value in ((lhs, lhs_value), (rhs, rhs_value)):
+                    if isinstance(words, numpy.ndarray):
+                        mask &= words if value else ~words
+                result |= mask
+        return result
+
+    def evaluate(self, expr):
+        return fold_expr(expr, self.evaluate_node)
+
+    def evaluate_node(self, node, children):
+        if isinstance(node, Var):
+            return self.get_variable_words(node)
+        elif isinstance(node, Not):
+            child, = children
+            return ~child if isinstance(child, numpy.ndarray) else not child
+        elif isinstance(node, (And, Or)):
+            default = self.to_words(isinstance(node, And))
+            return reduce(node.operator, map(self.to_words, children), default)
+        elif isinstance(node, BinaryExpression):
+            return self.apply_binary(node.operator, *children)
+        else:  # pragma: no cover
+            raise TypeError('Unhandled expression %r' % node)
+
+
+def get_packed_truth_table(expr):
+    """
+    Returns a ``PackedTruthTable`` for ``expr``, computed with vectorized bitwise operations
+    rather than by evaluating ``expr`` once per assignment.
+
+    The table takes ``2 ** n / 8`` bytes for ``n`` free variables, as does each
+    intermediate value while it is being computed.
+    """
+    AssignmentClass = get_assignment_class(expr)
+    evaluator = _Evaluator([Var(name) for name in AssignmentClass._fields])
+    words = evaluator.to_words(evaluator.evaluate(expr))
+    if evaluator.num_rows < WORD_BITS:
+        # Clear the unused bits of the only word.
+        words = words & numpy.uint64(2 ** evaluator.num_rows - 1)
+    return PackedTruthTable(AssignmentClass, words)
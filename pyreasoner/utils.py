@@ -12,3 +12,26 @@ def is_valid_identifier_for_namedtuple(name):
         not name.startswith('_') and  # _names are disallowed by namedtuple
         not keyword.iskeyword(name) and
         isidentifier(name))
+
+
+class cached_property(object):
+    """
+    Like ``property``, but the value is computed on first access and then stored on
+    the instance as the attribute ``_<name>``, which classes with ``__slots__`` must
+    declare.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+        self.attribute = '_' + func.__name__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.attribute)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.attribute, value)
+            return value